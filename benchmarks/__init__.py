@@ -0,0 +1,5 @@
+"""
+Benchmarks, run from the project root with:
+
+    make benchmark BENCHMARK=<module name>
+"""
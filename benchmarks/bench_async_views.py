@@ -0,0 +1,80 @@
+"""
+Compare the sync and async account views under the ASGI handler: logins/s
+with concurrent login requests, and the latency of the home page served
+alongside them.
+"""
+
+import asyncio
+import time
+
+from .utils import report, setup
+
+CONCURRENCY = 16
+LOGINS = 64
+
+
+async def run(client, login_url):
+    login_durations = []
+    light_durations = []
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    done = asyncio.Event()
+
+    async def login():
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post(
+                login_url, {"username": "bench@example.com", "password": "password"}
+            )
+            assert response.status_code == 302, response.status_code
+            login_durations.append(time.perf_counter() - start)
+
+    async def light_requests():
+        while not done.is_set():
+            start = time.perf_counter()
+            await client.get("/")
+            light_durations.append(time.perf_counter() - start)
+
+    light = asyncio.create_task(light_requests())
+    started_at = time.perf_counter()
+    try:
+        await asyncio.gather(*(login() for _ in range(LOGINS)))
+    finally:
+        done.set()
+    elapsed = time.perf_counter() - started_at
+    await light
+    return elapsed, login_durations, light_durations
+
+
+def main():
+    setup(database=True)
+
+    from django.contrib.auth import get_user_model
+    from django.test import AsyncClient, override_settings
+    from django.urls import reverse
+
+    # The test settings use a fast hasher, measure the real one.
+    hashing = override_settings(
+        PASSWORD_HASHERS=["project.accounts.hashers.PBKDF2PasswordHasher"],
+        PASSWORD_HASHING_POOL=True,
+    )
+    hashing.enable()
+    get_user_model().objects.create_user("bench", "bench@example.com", "password")
+
+    for urlconf in ("config.urls", "project.accounts.tests.async_urls"):
+        with override_settings(ROOT_URLCONF=urlconf, ALLOWED_HOSTS=["testserver"]):
+            elapsed, logins, light = asyncio.run(
+                run(AsyncClient(), reverse("accounts:login"))
+            )
+        name = "async views" if "async" in urlconf else "sync views"
+        print(f"{name}: {LOGINS / elapsed:.1f} logins/s, {CONCURRENCY} concurrent")
+        report("  login", logins)
+        report("  home page", light)
+
+    hashing.disable()
+    from project.accounts import hashers
+
+    hashers.shutdown_executor()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Compare `iexact` lookups with lookups on the casefolded username and email
+columns, and print the query plan of each.
+"""
+
+from .utils import report, setup, timed
+
+USERS = 100_000
+LOOKUPS = 500
+
+
+def main():
+    setup(database=True)
+
+    from django.contrib.auth import get_user_model
+
+    from project.accounts.managers import casefold
+
+    UserModel = get_user_model()
+    UserModel.objects.bulk_create(
+        (
+            UserModel(
+                username=f"User{i}",
+                username_ci=casefold(f"User{i}"),
+                email=f"User{i}@example.com",
+                email_ci=casefold(f"User{i}@example.com"),
+            )
+            for i in range(USERS)
+        ),
+        batch_size=5000,
+    )
+
+    lookups = {
+        "username__iexact": lambda i: UserModel.objects.filter(
+            username__iexact=f"USER{i}"
+        ),
+        "filter_by_username": lambda i: UserModel.objects.filter_by_username(
+            f"USER{i}"
+        ),
+        "email__iexact": lambda i: UserModel.objects.filter(
+            email__iexact=f"USER{i}@EXAMPLE.COM"
+        ),
+        "filter_by_email": lambda i: UserModel.objects.filter_by_email(
+            f"USER{i}@EXAMPLE.COM"
+        ),
+    }
+    step = USERS // LOOKUPS
+    for name, lookup in lookups.items():
+        durations = [timed(lookup(i).exists) for i in range(0, USERS, step)]
+        report(name, durations)
+        print(f"{'':<40} {lookup(0).values('pk').explain()}")
+
+
+if __name__ == "__main__":
+    main()
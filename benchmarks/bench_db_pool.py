@@ -0,0 +1,88 @@
+"""
+Compare persistent connections (CONN_MAX_AGE) with a connection pool at the
+same request rate: connections opened and request latency. Runs against a
+temporary SQLite file, with the pooled SQLite backend.
+"""
+
+import os
+import tempfile
+import threading
+import time
+
+from .utils import report, setup, timed
+
+THREADS = 16
+REQUESTS = 50
+# Seconds between the requests of each thread.
+INTERVAL = 0.01
+POOL_SIZE = 4
+
+
+def main():
+    setup()
+
+    from django.db import connection
+    from django.db.backends.signals import connection_created
+    from django.db.backends.sqlite3.base import DatabaseWrapper
+
+    from project.core.db.backends.sqlite3.base import (
+        DatabaseWrapper as PooledDatabaseWrapper,
+    )
+
+    directory = tempfile.TemporaryDirectory()
+    settings_dict = {
+        **connection.settings_dict,
+        "NAME": os.path.join(directory.name, "bench.sqlite3"),
+    }
+    modes = {
+        "CONN_MAX_AGE": (DatabaseWrapper, {"CONN_MAX_AGE": 60}),
+        "pool": (
+            PooledDatabaseWrapper,
+            {"CONN_MAX_AGE": 0, "POOL": {"MAX_SIZE": POOL_SIZE}},
+        ),
+    }
+
+    def request(wrapper):
+        with wrapper.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        # Time spent rendering the response, without using the database.
+        time.sleep(0.002)
+        # What Django does at the end of each request.
+        wrapper.close_if_unusable_or_obsolete()
+
+    for name, (wrapper_class, options) in modes.items():
+        created = []
+
+        def count(sender, connection, **kwargs):
+            created.append(connection)
+
+        connection_created.connect(count, weak=False)
+        durations = []
+
+        def serve():
+            # Django gives each thread its own connection object.
+            wrapper = wrapper_class({**settings_dict, **options}, alias=name)
+            for _ in range(REQUESTS):
+                durations.append(timed(request, wrapper))
+                time.sleep(INTERVAL)
+            wrapper.close()
+
+        threads = [threading.Thread(target=serve) for _ in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        connection_created.disconnect(count)
+
+        if name == "pool":
+            opened = PooledDatabaseWrapper(settings_dict, alias=name).get_pool()
+            opened = opened.get_stats()["created"]
+        else:
+            opened = len(created)
+        print(f"{name}: {opened} connections opened by {THREADS} threads")
+        report("  request", durations)
+    directory.cleanup()
+
+
+if __name__ == "__main__":
+    main()
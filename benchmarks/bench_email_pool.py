@@ -0,0 +1,39 @@
+"""
+Compare the throughput of the pooled SMTP backend with Django's SMTP backend,
+sending one message per connection as accounts.utils.send_mail does.
+"""
+
+from .utils import report, setup, timed
+
+MESSAGES = 200
+LATENCY = 0.002  # seconds added to every SMTP reply
+
+
+def main():
+    setup()
+
+    from django.core.mail import EmailMessage, get_connection
+
+    from project.core.tests.smtpserver import SMTPServer
+
+    def send(backend, server):
+        EmailMessage(
+            "Subject",
+            "Body",
+            "from@example.com",
+            ["to@example.com"],
+            connection=get_connection(backend, host=server.host, port=server.port),
+        ).send()
+
+    for backend in (
+        "django.core.mail.backends.smtp.EmailBackend",
+        "project.core.mail.backends.pooled.EmailBackend",
+    ):
+        with SMTPServer(latency=LATENCY) as server:
+            durations = [timed(send, backend, server) for _ in range(MESSAGES)]
+            report(backend.rsplit(".", 2)[-2], durations)
+            print(f"{'':<40} {server.sessions} SMTP session(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+Time /healthz and /readyz through the WSGI handler, next to the home page
+going through the whole middleware stack.
+"""
+
+from .utils import report, setup, timed
+
+REQUESTS = 2000
+
+
+def main():
+    setup(database=True)
+
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.test import RequestFactory, override_settings
+
+    handler = WSGIHandler()
+    factory = RequestFactory()
+
+    def start_response(status, headers):
+        assert status.startswith(("200", "302")), status
+
+    def get(environ):
+        response = handler(environ, start_response)
+        b"".join(response)
+        response.close()
+
+    with override_settings(ALLOWED_HOSTS=["testserver"]):
+        for path in ("/healthz", "/readyz", "/"):
+            environ = factory.get(path).environ
+            get(environ)
+            report(path, [timed(get, environ) for _ in range(REQUESTS)])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Replay a credential stuffing attack against one account while legitimate
+users log in, with and without login throttling, and compare the latency
+of the legitimate logins.
+"""
+
+import threading
+import time
+
+from .utils import report, setup, timed
+
+ATTACKERS = 4
+LOGINS = 20
+
+
+def main():
+    setup(database=True)
+
+    from django.contrib.auth import get_user_model
+    from django.core.cache import cache
+    from django.test import RequestFactory, override_settings
+
+    from project.accounts.forms import AuthenticationForm
+    from project.accounts.throttling import get_login_metrics
+
+    # The test settings use a fast hasher, measure the real one.
+    hashing = override_settings(
+        PASSWORD_HASHERS=["project.accounts.hashers.PBKDF2PasswordHasher"]
+    )
+    hashing.enable()
+    UserModel = get_user_model()
+    UserModel.objects.create_user("victim", "victim@example.com", "password")
+    for i in range(LOGINS):
+        UserModel.objects.create_user(f"user{i}", f"user{i}@example.com", "password")
+
+    def login(email, password, ip):
+        request = RequestFactory().post("/", REMOTE_ADDR=ip)
+        form = AuthenticationForm(
+            request, data={"username": email, "password": password}
+        )
+        return form.is_valid()
+
+    def attack(stop, counter):
+        while not stop.is_set():
+            login("victim@example.com", "guess", "203.0.113.1")
+            counter.append(1)
+            # Network round trip of the attacking client.
+            time.sleep(0.005)
+
+    for limit in (0, 10):
+        with override_settings(
+            LOGIN_THROTTLE_USERNAME_LIMIT=limit, LOGIN_THROTTLE_IP_LIMIT=limit * 10
+        ):
+            cache.clear()
+            stop = threading.Event()
+            attempts = []
+            attackers = [
+                threading.Thread(target=attack, args=(stop, attempts))
+                for _ in range(ATTACKERS)
+            ]
+            for attacker in attackers:
+                attacker.start()
+            durations = [
+                timed(login, f"user{i}@example.com", "password", f"198.51.100.{i}")
+                for i in range(LOGINS)
+            ]
+            stop.set()
+            for attacker in attackers:
+                attacker.join()
+            name = "throttled" if limit else "unthrottled"
+            print(f"{name}: {len(attempts)} attack attempts")
+            report("  legitimate login", durations)
+            if limit:
+                metrics = get_login_metrics()
+                print(
+                    f"  {metrics['throttled']} logins throttled, "
+                    f"{metrics['saved_seconds']:.1f}s of hashing saved"
+                )
+    hashing.disable()
+
+
+if __name__ == "__main__":
+    main()
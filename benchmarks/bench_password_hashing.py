@@ -0,0 +1,63 @@
+"""
+Compare logins/s with PBKDF2 run in the request threads and in the hashing
+process pool, while a thread serving light requests measures its latency.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .utils import report, setup, timed
+
+THREADS = 8
+LOGINS = 64
+
+
+def main():
+    setup()
+
+    from django.template import engines
+    from django.test import override_settings
+
+    from project.accounts import hashers
+
+    hasher = hashers.PBKDF2PasswordHasher()
+    encoded = hasher.encode("password", hasher.salt())
+    template = engines["django"].from_string("{% for i in items %}{{ i }}{% endfor %}")
+
+    def light_requests(stop, durations):
+        while not stop.is_set():
+            durations.append(timed(template.render, {"items": range(200)}))
+            time.sleep(0.001)
+
+    for pool in (False, True):
+        with override_settings(PASSWORD_HASHING_POOL=pool):
+            if pool:
+                # Start the pool outside of the measurement.
+                hasher.verify("password", encoded)
+            stop = threading.Event()
+            light_durations = []
+            light = threading.Thread(
+                target=light_requests, args=(stop, light_durations)
+            )
+            light.start()
+            started_at = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=THREADS) as executor:
+                login_durations = list(
+                    executor.map(
+                        lambda _: timed(hasher.verify, "password", encoded),
+                        range(LOGINS),
+                    )
+                )
+            elapsed = time.perf_counter() - started_at
+            stop.set()
+            light.join()
+            name = "pool" if pool else "request thread"
+            print(f"{name}: {LOGINS / elapsed:.1f} logins/s with {THREADS} threads")
+            report("  login", login_durations)
+            report("  light request", light_durations)
+    hashers.shutdown_executor()
+
+
+if __name__ == "__main__":
+    main()
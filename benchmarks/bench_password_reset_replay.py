@@ -0,0 +1,62 @@
+"""
+Replay password reset requests, most of them repeating an earlier one, with
+and without throttling, and compare their latency and the emails sent.
+"""
+
+import random
+
+from .utils import report, setup, timed
+
+USERS = 20
+REQUESTS = 500
+
+
+def main():
+    setup(database=True)
+
+    from django.contrib.auth import get_user_model
+    from django.core import mail
+    from django.core.cache import cache
+    from django.db import connection
+    from django.test import Client, override_settings
+    from django.test.utils import CaptureQueriesContext
+    from django.urls import reverse
+
+    from project.accounts.throttling import get_password_reset_metrics
+
+    UserModel = get_user_model()
+    for i in range(USERS):
+        UserModel.objects.create_user(f"user{i}", f"user{i}@example.com", "password")
+
+    random.seed(0)
+    replay = [
+        (f"user{random.randrange(USERS)}@example.com", f"10.0.0.{random.randrange(50)}")
+        for _ in range(REQUESTS)
+    ]
+    client = Client()
+    url = reverse("accounts:password_reset")
+
+    for enabled in (False, True):
+        with override_settings(
+            ALLOWED_HOSTS=["testserver"],
+            EMAIL_DELIVERY="sync",
+            PASSWORD_RESET_THROTTLE_EMAIL_LIMIT=3 if enabled else 0,
+            PASSWORD_RESET_THROTTLE_IP_LIMIT=20 if enabled else 0,
+            PASSWORD_RESET_DEDUPE_WINDOW=300 if enabled else 0,
+        ):
+            cache.clear()
+            mail.outbox = []
+            with CaptureQueriesContext(connection) as queries:
+                durations = [
+                    timed(client.post, url, {"email": email}, REMOTE_ADDR=ip)
+                    for email, ip in replay
+                ]
+        name = "throttled" if enabled else "unthrottled"
+        print(f"{name}: {len(mail.outbox)} emails sent, {len(queries)} queries")
+        report("  password reset request", durations)
+        if enabled:
+            print(f"  {get_password_reset_metrics()}")
+
+
+if __name__ == "__main__":
+    main()
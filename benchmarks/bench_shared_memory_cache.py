@@ -0,0 +1,81 @@
+"""
+Run a read-mostly workload (90% reads, 10% writes) from several processes at
+once, against the shared memory cache, LocMemCache and the file cache.
+
+LocMemCache isn't shared, so each process misses the keys the others set,
+which shows in its hit ratio.
+"""
+
+import multiprocessing
+import os
+import random
+import tempfile
+
+from .utils import report, setup, timed
+
+WORKERS = 4
+OPERATIONS = 5000
+KEYS = 500
+
+
+def work(cache, seed, results):
+    rng = random.Random(seed)
+    value = {"id": 1, "email": "user@example.com", "groups": list(range(10))}
+    durations = []
+    reads = hits = 0
+    for _ in range(OPERATIONS):
+        key = f"key{rng.randrange(KEYS)}"
+        if rng.random() < 0.1:
+            durations.append(timed(cache.set, key, value))
+        else:
+            reads += 1
+            found = []
+            durations.append(timed(lambda: found.append(cache.get(key))))
+            hits += found[0] is not None
+    results.put((durations, reads, hits))
+
+
+def main():
+    setup()
+
+    from django.core.cache.backends.filebased import FileBasedCache
+    from django.core.cache.backends.locmem import LocMemCache
+
+    from project.core.cache.backends.sharedmem import SharedMemoryCache
+
+    context = multiprocessing.get_context("fork")
+    with tempfile.TemporaryDirectory() as directory:
+        backends = {
+            "shared memory": lambda: SharedMemoryCache(
+                os.path.join(directory, "shm"),
+                {"OPTIONS": {"MAX_ENTRIES": 2 * KEYS}},
+            ),
+            "locmem": lambda: LocMemCache(
+                "bench", {"OPTIONS": {"MAX_ENTRIES": 2 * KEYS}}
+            ),
+            "file": lambda: FileBasedCache(
+                os.path.join(directory, "file"),
+                {"OPTIONS": {"MAX_ENTRIES": 2 * KEYS}},
+            ),
+        }
+        for name, make_cache in backends.items():
+            results = context.Queue()
+            processes = [
+                context.Process(target=work, args=(make_cache(), seed, results))
+                for seed in range(WORKERS)
+            ]
+            for process in processes:
+                process.start()
+            durations, reads, hits = [], 0, 0
+            for _ in processes:
+                worker_durations, worker_reads, worker_hits = results.get()
+                durations += worker_durations
+                reads += worker_reads
+                hits += worker_hits
+            for process in processes:
+                process.join()
+            report(f"{name} x{WORKERS}, {100 * hits / reads:.0f}% hits", durations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Time reads from the tiered cache, when served by its L1 and when every read
+misses L1, next to reads from its shared (L2) memory-mapped cache alone. A file cache
+can't be the L2, it has no atomic incr().
+"""
+
+import os
+import tempfile
+
+from .utils import report, setup, timed
+
+READS = 5000
+KEYS = 100
+
+
+def main():
+    setup()
+
+    from django.core.cache import caches
+    from django.test import override_settings
+
+    with tempfile.TemporaryDirectory() as location, override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "project.core.cache.backends.tiered.TieredCache",
+                "LOCATION": "bench",
+                "OPTIONS": {"L2": "shared", "MAX_ENTRIES": KEYS},
+            },
+            "shared": {
+                "BACKEND": "project.core.cache.backends.sharedmem.SharedMemoryCache",
+                "LOCATION": os.path.join(location, "cache"),
+            },
+        }
+    ):
+        tiered, shared = caches["default"], caches["shared"]
+        value = {"id": 1, "email": "user@example.com", "groups": list(range(10))}
+        tiered.set_many({f"key{n}": value for n in range(KEYS)})
+
+        report(
+            "shared memory cache",
+            [timed(shared.get, f"key{n % KEYS}") for n in range(READS)],
+        )
+        report(
+            "tiered, L1 hits",
+            [timed(tiered.get, f"key{n % KEYS}") for n in range(READS)],
+        )
+
+        def get_cold(key):
+            tiered._l1.clear()
+            tiered.get(key)
+
+        report(
+            "tiered, L1 misses",
+            [timed(get_cold, f"key{n % KEYS}") for n in range(READS)],
+        )
+        print(tiered.get_stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import os
+import statistics
+import time
+
+import django
+
+
+def setup(database=False):
+    """
+    Configure Django with the test settings. With `database`, also create
+    a throwaway test database with every app's tables.
+    """
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.test")
+    django.setup()
+    if database:
+        from django.apps import apps
+        from django.conf import settings
+        from django.db import connection
+
+        # The project doesn't ship migrations, create the tables directly.
+        settings.MIGRATION_MODULES = {
+            app_config.label: None for app_config in apps.get_app_configs()
+        }
+        connection.creation.create_test_db(verbosity=0)
+
+
+def timed(func, *args, **kwargs):
+    """Call `func` and return its duration in seconds."""
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def report(name, durations):
+    """Print throughput and latency percentiles for a list of durations."""
+    total = sum(durations)
+    if len(durations) > 1:
+        quantiles = statistics.quantiles(durations, n=100)
+    else:
+        quantiles = durations * 99
+    print(
+        f"{name:<40} {len(durations) / total:>10.1f} ops/s"
+        f"  p50 {quantiles[49] * 1000:>8.3f} ms"
+        f"  p95 {quantiles[94] * 1000:>8.3f} ms"
+        f"  p99 {quantiles[98] * 1000:>8.3f} ms"
+    )
@@ -54,6 +54,21 @@ DATABASES = {
         default=f"sqlite:///{sqlite_path}",
     )
 }
+# Read replicas, as comma separated database URLs (two SQLite files work for
+# local testing). They are named "replica1", "replica2", ...
+DATABASE_REPLICAS = []
+for index, url in enumerate(env.list("DATABASE_REPLICA_URLS", default=[]), start=1):
+    DATABASES[f"replica{index}"] = {
+        **env.db_url_config(url),
+        # Tests read the test database through the replica connections.
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(f"replica{index}")
+# https://docs.djangoproject.com/en/dev/ref/settings/#database-routers
+DATABASE_ROUTERS = ["project.core.routers.ReplicaRouter"]
+# Seconds during which a client that wrote to the database reads from the
+# primary, to see its writes before they reach the replicas.
+DATABASE_REPLICA_PIN_SECONDS = env.int("DATABASE_REPLICA_PIN_SECONDS", default=5)
 
 # URLS
 # ------------------------------------------------------------------------------
@@ -93,7 +108,9 @@ MIGRATION_MODULES = {}  # Default
 # ------------------------------------------------------------------------------
 # https://docs.djangoproject.com/en/dev/ref/settings/#authentication-backends
 AUTHENTICATION_BACKENDS = [
-    "django.contrib.auth.backends.ModelBackend",  # Default
+    # django.contrib.auth.backends.ModelBackend with an async authenticate(),
+    # loading users and their permissions from the cache
+    "project.accounts.backends.ModelBackend",
 ]
 # https://docs.djangoproject.com/en/dev/ref/settings/#auth-user-model
 AUTH_USER_MODEL = "accounts.User"
@@ -105,16 +122,68 @@ LOGIN_URL = "/accounts/login/"  # Default
 LOGOUT_REDIRECT_URL = None  # Default
 # https://docs.djangoproject.com/en/dev/ref/settings/#password-reset-timeout
 PASSWORD_RESET_TIMEOUT = 259200  # Default (3 days, in seconds)
+# Serve the async-native account views, for ASGI deployments.
+ACCOUNTS_ASYNC_VIEWS = env.bool("DJANGO_ACCOUNTS_ASYNC_VIEWS", default=False)
+# Failed logins allowed per username and per client IP (0 disables the limit)
+# over a sliding window of LOGIN_THROTTLE_WINDOW seconds.
+LOGIN_THROTTLE_USERNAME_LIMIT = env.int(
+    "DJANGO_LOGIN_THROTTLE_USERNAME_LIMIT", default=10
+)
+LOGIN_THROTTLE_IP_LIMIT = env.int("DJANGO_LOGIN_THROTTLE_IP_LIMIT", default=100)
+LOGIN_THROTTLE_WINDOW = env.int("DJANGO_LOGIN_THROTTLE_WINDOW", default=900)
+# Password reset requests allowed per email address and per client IP over a
+# sliding window of PASSWORD_RESET_THROTTLE_WINDOW seconds.
+PASSWORD_RESET_THROTTLE_EMAIL_LIMIT = env.int(
+    "DJANGO_PASSWORD_RESET_THROTTLE_EMAIL_LIMIT", default=3
+)
+PASSWORD_RESET_THROTTLE_IP_LIMIT = env.int(
+    "DJANGO_PASSWORD_RESET_THROTTLE_IP_LIMIT", default=20
+)
+PASSWORD_RESET_THROTTLE_WINDOW = env.int(
+    "DJANGO_PASSWORD_RESET_THROTTLE_WINDOW", default=3600
+)
+# Seconds during which a repeated password reset request for the same email
+# address is answered without sending another email (0 disables).
+PASSWORD_RESET_DEDUPE_WINDOW = env.int(
+    "DJANGO_PASSWORD_RESET_DEDUPE_WINDOW", default=300
+)
+# Cache storing the users of authenticated requests and their permissions, for
+# AUTH_CACHE_TIMEOUT seconds (0 disables).
+AUTH_CACHE = env("DJANGO_AUTH_CACHE", default="default")
+AUTH_CACHE_TIMEOUT = env.int("DJANGO_AUTH_CACHE_TIMEOUT", default=300)
+# Buffer last_login updates in ACTIVITY_CACHE, written by the flush_activity
+# command, falling back to immediate updates when it didn't run in the last
+# LAST_LOGIN_MAX_STALENESS seconds.
+LAST_LOGIN_WRITE_BEHIND = env.bool("DJANGO_LAST_LOGIN_WRITE_BEHIND", default=False)
+LAST_LOGIN_MAX_STALENESS = env.int("DJANGO_LAST_LOGIN_MAX_STALENESS", default=300)
+# Record when authenticated users were last seen at most every
+# LAST_SEEN_INTERVAL seconds (0 disables), buffered like last_login.
+LAST_SEEN_INTERVAL = env.int("DJANGO_LAST_SEEN_INTERVAL", default=300)
+LAST_SEEN_MAX_STALENESS = env.int("DJANGO_LAST_SEEN_MAX_STALENESS", default=900)
+ACTIVITY_CACHE = env("DJANGO_ACTIVITY_CACHE", default="default")
+# Cache storing the rate limiting counters.
+THROTTLE_CACHE = env("DJANGO_THROTTLE_CACHE", default="default")
+# request.META key holding the client IP address, e.g. HTTP_X_FORWARDED_FOR
+# behind a proxy that sets it.
+THROTTLE_IP_META_KEY = env("DJANGO_THROTTLE_IP_META_KEY", default="REMOTE_ADDR")
+# Number of trusted proxies appending the address they were connected from to
+# THROTTLE_IP_META_KEY, when it's a list. The client IP is the entry added by
+# the outermost one, the entries before it are set by the client.
+THROTTLE_TRUSTED_PROXY_COUNT = env.int("DJANGO_THROTTLE_TRUSTED_PROXY_COUNT", default=1)
 
 
 # PASSWORDS
 # ------------------------------------------------------------------------------
 # https://docs.djangoproject.com/en/dev/ref/settings/#password-hashers
 PASSWORD_HASHERS = [
-    "django.contrib.auth.hashers.PBKDF2PasswordHasher",
-    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "project.accounts.hashers.PBKDF2PasswordHasher",
+    "project.accounts.hashers.PBKDF2SHA1PasswordHasher",
     "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
 ]
+# Run PBKDF2 in a pool of worker processes instead of the request thread.
+PASSWORD_HASHING_POOL = env.bool("DJANGO_PASSWORD_HASHING_POOL", default=False)
+# Number of hashing processes, defaults to the number of CPUs.
+PASSWORD_HASHING_POOL_SIZE = env.int("DJANGO_PASSWORD_HASHING_POOL_SIZE", default=None)
 # https://docs.djangoproject.com/en/dev/ref/settings/#auth-password-validators
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -135,18 +204,32 @@ AUTH_PASSWORD_VALIDATORS = [
 # ------------------------------------------------------------------------------
 # https://docs.djangoproject.com/en/dev/ref/settings/#middleware
 MIDDLEWARE = [
+    # Answers /healthz and /readyz without running the other middleware.
+    "project.core.middleware.HealthCheckMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
+    "project.core.middleware.ReplicaMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.locale.LocaleMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "project.accounts.middleware.LastSeenMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.common.BrokenLinkEmailsMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# HEALTH CHECKS
+# ------------------------------------------------------------------------------
+# Seconds during which /readyz reuses the result of its database and cache checks.
+HEALTH_CHECK_CACHE_TTL = env.float("DJANGO_HEALTH_CHECK_CACHE_TTL", default=2)
+# Networks of the clients, such as the orchestrator's probes, that /readyz shows its
+# checks to. Other clients only get whether the node is ready.
+HEALTH_CHECK_DETAIL_NETWORKS = env.list(
+    "DJANGO_HEALTH_CHECK_DETAIL_NETWORKS", default=[]
+)
+
 # STORAGES
 # ------------------------------------------------------------------------------
 # https://docs.djangoproject.com/en/dev/ref/settings/#storages
@@ -165,12 +248,31 @@ STORAGES = {
 # ------------------------------------------------------------------------------
 # https://docs.djangoproject.com/en/dev/ref/settings/#caches
 CACHES = {
-    # Default
+    # Default, an in-process cache in front of the shared one
     "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-        "LOCATION": "",
-    }
+        "BACKEND": "project.core.cache.backends.tiered.TieredCache",
+        "LOCATION": "default",
+        "OPTIONS": {
+            "L2": "shared",
+            "MAX_ENTRIES": env.int("DJANGO_CACHE_L1_MAX_ENTRIES", default=1000),
+            "L1_TIMEOUT": env.float("DJANGO_CACHE_L1_TIMEOUT", default=5),
+            "SYNC_INTERVAL": env.float("DJANGO_CACHE_SYNC_INTERVAL", default=1),
+        },
+    },
+    # Shared by every process, e.g. rediscache://127.0.0.1:6379/1. Production
+    # requires it, the default only holds for a single process.
+    "shared": env.cache("DJANGO_CACHE_URL", default="locmemcache://"),
 }
+# Single host deployments can share a memory-mapped file instead, e.g. on /dev/shm
+if env.str("DJANGO_CACHE_SHARED_MEMORY_PATH", default=""):
+    CACHES["shared"] = {
+        "BACKEND": "project.core.cache.backends.sharedmem.SharedMemoryCache",
+        "LOCATION": env.str("DJANGO_CACHE_SHARED_MEMORY_PATH"),
+        "OPTIONS": {
+            "MAX_ENTRIES": env.int("DJANGO_CACHE_SHARED_MEMORY_ENTRIES", default=10000),
+            "SLOT_SIZE": env.int("DJANGO_CACHE_SHARED_MEMORY_SLOT_SIZE", default=4096),
+        },
+    }
 
 # STATIC
 # ------------------------------------------------------------------------------
@@ -224,6 +326,18 @@ FORM_RENDERER = "django.forms.renderers.TemplatesSetting"
 # https://docs.djangoproject.com/en/dev/ref/settings/#fixture-dirs
 FIXTURE_DIRS = []  # Default
 
+# SESSIONS
+# ------------------------------------------------------------------------------
+# https://docs.djangoproject.com/en/dev/ref/settings/#session-engine
+# Database sessions indexed by user and read from the cache, see
+# project.accounts.sessions.cached_db. The import_sessions command copies the
+# sessions of django.contrib.sessions over.
+SESSION_ENGINE = "project.accounts.sessions.cached_db"
+# https://docs.djangoproject.com/en/dev/ref/settings/#session-cache-alias
+SESSION_CACHE_ALIAS = env("DJANGO_SESSION_CACHE_ALIAS", default="default")
+# Expired sessions deleted per statement by the purge_sessions command.
+SESSION_PURGE_BATCH_SIZE = env.int("DJANGO_SESSION_PURGE_BATCH_SIZE", default=1000)
+
 # SECURITY
 # ------------------------------------------------------------------------------
 # https://docs.djangoproject.com/en/dev/ref/settings/#session-cookie-httponly
@@ -246,7 +360,7 @@ USE_X_FORWARDED_HOST = False  # Default
 # https://docs.djangoproject.com/en/dev/ref/settings/#email-backend
 EMAIL_BACKEND = env(
     "DJANGO_EMAIL_BACKEND",
-    default="django.core.mail.backends.smtp.EmailBackend",
+    default="project.core.mail.backends.pooled.EmailBackend",
 )
 # https://docs.djangoproject.com/en/dev/ref/settings/#email-host
 EMAIL_HOST = env("DJANGO_EMAIL_HOST", default="localhost")
@@ -266,6 +380,31 @@ EMAIL_SSL_CERTFILE = env("DJANGO_EMAIL_SSL_CERTFILE", default=None)
 EMAIL_SSL_KEYFILE = env("DJANGO_EMAIL_SSL_KEYFILE", default=None)
 # https://docs.djangoproject.com/en/dev/ref/settings/#email-timeout
 EMAIL_TIMEOUT = None  # Default
+# Pooled SMTP backend ('project.core.mail.backends.pooled.EmailBackend'): idle
+# sessions kept per process, seconds after which idle sessions are closed and
+# seconds after which idle sessions are checked with a NOOP before reuse.
+EMAIL_POOL_SIZE = env.int("DJANGO_EMAIL_POOL_SIZE", default=4)
+EMAIL_POOL_MAX_IDLE = env.int("DJANGO_EMAIL_POOL_MAX_IDLE", default=60)
+EMAIL_POOL_HEALTH_CHECK_INTERVAL = env.int(
+    "DJANGO_EMAIL_POOL_HEALTH_CHECK_INTERVAL", default=10
+)
+# Account emails are either stored in the outbox and delivered by the
+# 'send_outbox' management command ("outbox"), or sent once the request
+# transaction is committed, by the request thread ("sync") or a background
+# thread ("background"). Only the outbox keeps the emails
+# that fail to send or that a dying process didn't send yet.
+EMAIL_DELIVERY = env("DJANGO_EMAIL_DELIVERY", default="outbox")
+# Number of threads sending emails in the "background" delivery mode.
+EMAIL_BACKGROUND_WORKERS = env.int("DJANGO_EMAIL_BACKGROUND_WORKERS", default=2)
+# Number of outbox messages sent over a single connection.
+EMAIL_OUTBOX_BATCH_SIZE = env.int("DJANGO_EMAIL_OUTBOX_BATCH_SIZE", default=100)
+# Failed deliveries after which an outbox message is given up.
+EMAIL_OUTBOX_MAX_ATTEMPTS = env.int("DJANGO_EMAIL_OUTBOX_MAX_ATTEMPTS", default=5)
+# Seconds before the first retry of a failed delivery, doubled on every retry.
+EMAIL_OUTBOX_RETRY_DELAY = env.int("DJANGO_EMAIL_OUTBOX_RETRY_DELAY", default=60)
+# Seconds a worker has to send the batch it claimed before other workers can
+# claim it again. Must exceed the time to send EMAIL_OUTBOX_BATCH_SIZE emails.
+EMAIL_OUTBOX_LEASE = env.int("DJANGO_EMAIL_OUTBOX_LEASE", default=600)
 
 # ADMIN
 # ------------------------------------------------------------------------------
@@ -275,6 +414,12 @@ ADMIN_URL = "admin/"
 ADMINS = []  # Default
 # https://docs.djangoproject.com/en/dev/ref/settings/#managers
 MANAGERS = []  # Default
+# Large changelists show the row count estimated by the database instead of
+# counting when the estimate is at least ESTIMATED_COUNT_THRESHOLD, and
+# fetch pages past the first KEYSET_PAGINATION_OFFSET rows by keyset.
+# See project.core.paginator.
+ESTIMATED_COUNT_THRESHOLD = env.int("DJANGO_ESTIMATED_COUNT_THRESHOLD", default=100_000)
+KEYSET_PAGINATION_OFFSET = env.int("DJANGO_KEYSET_PAGINATION_OFFSET", default=10_000)
 
 # LOGGING
 # ------------------------------------------------------------------------------
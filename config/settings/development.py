@@ -17,17 +17,6 @@ SECRET_KEY = env.str(
 # https://docs.djangoproject.com/en/dev/ref/settings/#allowed-hosts
 ALLOWED_HOSTS = [".localhost", "127.0.0.1", "[::1]"]
 
-# CACHES
-# ------------------------------------------------------------------------------
-# https://docs.djangoproject.com/en/dev/ref/settings/#caches
-CACHES = {
-    # Default
-    "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-        "LOCATION": "",
-    }
-}
-
 # SECURITY
 # ------------------------------------------------------------------------------
 # https://docs.djangoproject.com/en/dev/ref/settings/#csrf-trusted-origins
@@ -42,6 +31,8 @@ EMAIL_BACKEND = env(
 )
 # https://docs.djangoproject.com/en/dev/ref/settings/#email-timeout
 EMAIL_TIMEOUT = 5
+# Send account emails right away, no need to run the outbox worker.
+EMAIL_DELIVERY = env("DJANGO_EMAIL_DELIVERY", default="sync")
 
 # INSTALLED APPS
 # ------------------------------------------------------------------------------
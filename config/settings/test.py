@@ -15,6 +15,11 @@ SECRET_KEY = env(
 # https://docs.djangoproject.com/en/dev/ref/settings/#test-runner
 TEST_RUNNER = "django.test.runner.DiscoverRunner"
 
+# DATABASES
+# ------------------------------------------------------------------------------
+# Tests read from the primary, routing tests set DATABASE_REPLICAS themselves.
+DATABASE_REPLICAS = []
+
 # CACHES
 # ------------------------------------------------------------------------------
 # https://docs.djangoproject.com/en/dev/ref/settings/#caches
@@ -25,6 +30,12 @@ CACHES = {
     }
 }
 
+# AUTHENTICATION
+# ------------------------------------------------------------------------------
+# Rolling back a test doesn't invalidate the users it cached, and the next test
+# may reuse their ids. Tests of the caching enable it themselves.
+AUTH_CACHE_TIMEOUT = 0
+
 # PASSWORDS
 # ------------------------------------------------------------------------------
 # https://docs.djangoproject.com/en/dev/ref/settings/#password-hashers
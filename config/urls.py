@@ -5,6 +5,9 @@ from django.views import defaults as default_views
 from django.views.generic import TemplateView
 from django.views.generic.base import RedirectView
 
+from project.core import views as core_views
+from project.core.decorators import read_only
+
 # settings
 DEBUG = settings.DEBUG
 INSTALLED_APPS = settings.INSTALLED_APPS
@@ -15,9 +18,12 @@ MEDIA_ROOT = settings.MEDIA_ROOT
 urlpatterns = [
     path(
         "",
-        TemplateView.as_view(template_name="pages/home.html"),
+        read_only(TemplateView.as_view(template_name="pages/home.html")),
         name="home",
     ),
+    # Health checks, answered by HealthCheckMiddleware when it's installed.
+    path("healthz", core_views.healthz, name="healthz"),
+    path("readyz", core_views.readyz, name="readyz"),
     # Favicon
     path("favicon.ico", RedirectView.as_view(url="/static/images/icons/favicon.ico")),
     # Django Admin
@@ -0,0 +1,181 @@
+"""
+Write-behind buffering of user timestamps: last_login, and last_seen.
+
+Instead of an UPDATE per event, timestamps are appended to a log kept in
+the ACTIVITY_CACHE cache: a counter, and one entry per event holding the
+user id and the timestamp. The `flush_activity` management command reads
+the new entries, keeps the latest timestamp of each user, and writes them
+with bulk updates that never move a timestamp back.
+
+The entries are numbered by the counter, so the cache must increment it
+atomically, as Redis and Memcached do: the accounts.E001 system check
+rejects the file and database caches.
+
+When the log wasn't flushed in the allowed staleness, recording an event
+fails so that callers write it right away instead: the timestamps stay
+accurate when the command isn't running.
+"""
+
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import models
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from project.core import routers
+
+# Entries must outlive a few flush intervals.
+ENTRY_TIMEOUT = 24 * 3600
+# Entries read at most by a flush, older ones are dropped.
+MAX_PENDING = 1_000_000
+# Seconds a flush holds its lock, in case it dies without releasing it.
+FLUSH_LOCK_TIMEOUT = 600
+
+
+def get_cache():
+    return caches[settings.ACTIVITY_CACHE]
+
+
+class WriteBehindBuffer:
+    """Buffer the timestamps of the `field` datetime field of users."""
+
+    def __init__(self, field):
+        self.field = field
+        self.prefix = f"activity:{field}"
+
+    def get_state(self):
+        """
+        Return the state of the last flush: the last entry flushed
+        ("cursor"), the last entry at the time ("head"), and when it ran
+        ("flushed_at").
+        """
+        return get_cache().get(f"{self.prefix}:state") or {}
+
+    def is_flushed(self, max_staleness):
+        """Return whether the log was flushed in the last `max_staleness` s."""
+        flushed_at = self.get_state().get("flushed_at")
+        return flushed_at is not None and time.time() - flushed_at <= max_staleness
+
+    def record(self, user_id, timestamp, max_staleness):
+        """
+        Buffer `timestamp` for the user. Return False, without buffering it,
+        when the log wasn't flushed in the last `max_staleness` seconds.
+        """
+        if not self.is_flushed(max_staleness):
+            return False
+        cache = get_cache()
+        count_key = f"{self.prefix}:count"
+        cache.add(count_key, 0, timeout=None)
+        try:
+            index = cache.incr(count_key)
+        except ValueError:
+            # Evicted in between.
+            return False
+        cache.set(f"{self.prefix}:{index}", (user_id, timestamp), timeout=ENTRY_TIMEOUT)
+        return True
+
+    def flush(self, batch_size=1000):
+        """
+        Write the buffered timestamps, the latest one of each user, and
+        return the number of users updated.
+        """
+        cache = get_cache()
+        lock_key = f"{self.prefix}:lock"
+        if not cache.add(lock_key, True, timeout=FLUSH_LOCK_TIMEOUT):
+            # Another flush is running.
+            return 0
+        try:
+            return self._flush(cache, batch_size)
+        finally:
+            cache.delete(lock_key)
+
+    def _flush(self, cache, batch_size):
+        count = cache.get(f"{self.prefix}:count") or 0
+        state = self.get_state()
+        cursor = state.get("cursor")
+        head = state.get("head", 0)
+        if cursor is None or cursor > count:
+            # First flush, or the counter was evicted and restarted.
+            cursor = head = 0
+        cursor = max(cursor, count - MAX_PENDING)
+
+        latest = {}
+        retry_from = None
+        for start in range(cursor + 1, count + 1, batch_size):
+            indexes = range(start, min(start + batch_size, count + 1))
+            entries = cache.get_many([f"{self.prefix}:{n}" for n in indexes])
+            for n in indexes:
+                entry = entries.get(f"{self.prefix}:{n}")
+                if entry is None:
+                    # Entries counted since the previous flush may still be
+                    # written, read them again next time. Older ones expired.
+                    if n > head and retry_from is None:
+                        retry_from = n
+                    continue
+                user_id, timestamp = entry
+                if user_id not in latest or timestamp > latest[user_id]:
+                    latest[user_id] = timestamp
+
+        updated = self.write(latest, batch_size)
+        new_cursor = count if retry_from is None else retry_from - 1
+        for start in range(cursor + 1, new_cursor + 1, batch_size):
+            cache.delete_many(
+                [
+                    f"{self.prefix}:{n}"
+                    for n in range(start, min(start + batch_size, new_cursor + 1))
+                ]
+            )
+        cache.set(
+            f"{self.prefix}:state",
+            {"cursor": new_cursor, "head": count, "flushed_at": time.time()},
+            timeout=None,
+        )
+        return updated
+
+    def write(self, timestamps, batch_size=1000):
+        """
+        Set the field of the users to the timestamps of the `timestamps`
+        dict, by user id, unless they hold later ones.
+        """
+        UserModel = get_user_model()
+        field = UserModel._meta.get_field(self.field)
+        users = []
+        for user_id, timestamp in timestamps.items():
+            value = models.Value(timestamp, output_field=field)
+            users.append(
+                UserModel(
+                    pk=user_id,
+                    **{self.field: Greatest(Coalesce(self.field, value), value)},
+                )
+            )
+        if not users:
+            return 0
+        return UserModel._default_manager.bulk_update(
+            users, [self.field], batch_size=batch_size
+        )
+
+
+last_login_buffer = WriteBehindBuffer("last_login")
+last_seen_buffer = WriteBehindBuffer("last_seen")
+
+
+def record_last_seen(user_id, now=None):
+    """
+    Record that the user was seen, unless it was in the last
+    LAST_SEEN_INTERVAL seconds. Return whether it was recorded.
+    """
+    if not get_cache().add(
+        f"activity:last_seen:recent:{user_id}",
+        True,
+        timeout=settings.LAST_SEEN_INTERVAL,
+    ):
+        return False
+    now = timezone.now() if now is None else now
+    if not last_seen_buffer.record(user_id, now, settings.LAST_SEEN_MAX_STALENESS):
+        # Not worth reading the next requests from the primary.
+        with routers.unpinned():
+            last_seen_buffer.write({user_id: now})
+    return True
@@ -1,13 +1,102 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
+from django.utils.translation import ngettext
+from django.contrib.admin.views.main import PAGE_VAR, ChangeList
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.contrib.auth.models import Permission
+from django.forms.models import BaseInlineFormSet
+from django.utils.functional import cached_property
+
+from project.core.paginator import CURSOR_VAR, EstimatedCountPaginator
 
 from .forms import UserCreationForm, UserChangeForm
+from .models import UserSession
+from .sessions import get_session_store_class
 
 UserModel = get_user_model()
 
 
+class PermissionListFilter(admin.SimpleListFilter):
+    """
+    Filter the active users granted a permission, directly, by a group or as
+    superusers.
+    """
+
+    title = _("permission")
+    parameter_name = "perm"
+
+    def lookups(self, request, model_admin):
+        return [
+            (f"{app_label}.{codename}", name)
+            for app_label, codename, name in Permission.objects.order_by(
+                "content_type__app_label", "codename"
+            ).values_list("content_type__app_label", "codename", "name")
+        ]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(
+                pk__in=UserModel.objects.with_perms([self.value()]).values("pk")
+            )
+
+
+class UserSessionFormSet(BaseInlineFormSet):
+    def delete_existing(self, obj, commit=True):
+        # Through the session engine, which also drops the cached session.
+        if commit:
+            get_session_store_class()().delete(obj.session_key)
+
+
+class UserSessionInline(admin.TabularInline):
+    """The unexpired sessions of a user, which can be deleted."""
+
+    model = UserSession
+    formset = UserSessionFormSet
+    fields = ("created_at", "user_agent", "ip_address", "expire_date")
+    readonly_fields = fields
+    extra = 0
+    max_num = 0
+    ordering = ("-created_at",)
+    verbose_name_plural = _("active sessions")
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).filter(expire_date__gt=timezone.now())
+
+
+class UserChangeList(ChangeList):
+    """
+    Changelist whose links to the previous and next pages carry their keyset
+    cursors, see EstimatedCountPaginator.
+    """
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    @cached_property
+    def next_page_cursor(self):
+        if not self.multi_page or (self.show_all and self.can_show_all):
+            return None
+        return self.paginator.get_cursor(self.page_num, self.result_list)
+
+    @cached_property
+    def previous_page_cursor(self):
+        if not self.multi_page or (self.show_all and self.can_show_all):
+            return None
+        return self.paginator.get_previous_cursor(self.page_num, self.result_list)
+
+    def get_query_string(self, new_params=None, remove=None):
+        new_params = {**(new_params or {}), CURSOR_VAR: None}
+        if new_params.get(PAGE_VAR) == self.page_num + 1:
+            new_params[CURSOR_VAR] = self.next_page_cursor
+        elif new_params.get(PAGE_VAR) == self.page_num - 1:
+            new_params[CURSOR_VAR] = self.previous_page_cursor
+        return super().get_query_string(new_params, remove)
+
+
 @admin.register(UserModel)
 class UserAdmin(BaseUserAdmin):
     """
@@ -41,7 +130,10 @@ class UserAdmin(BaseUserAdmin):
                 ),
             },
         ),
-        (_("Important dates"), {"fields": ("last_login", "date_joined")}),
+        (
+            _("Important dates"),
+            {"fields": ("last_login", "last_seen", "date_joined")},
+        ),
     )
     add_fieldsets = (
         (
@@ -62,6 +154,12 @@ class UserAdmin(BaseUserAdmin):
             },
         ),
     )
+    readonly_fields = ("last_seen",)
+    paginator = EstimatedCountPaginator
+    # Only the filtered users are counted.
+    show_full_result_count = False
+    inlines = (UserSessionInline,)
+    actions = ("log_out_everywhere",)
     form = UserChangeForm
     add_form = UserCreationForm
     list_display = (
@@ -69,10 +167,47 @@ class UserAdmin(BaseUserAdmin):
         "email",
         "is_staff",
     )
-    list_filter = ("is_staff", "is_superuser", "is_active", "groups")
+    list_filter = (
+        "is_staff",
+        "is_superuser",
+        "is_active",
+        "groups",
+        PermissionListFilter,
+    )
     search_fields = ("username", "email", "first_name", "last_name")
     ordering = ("username", "email")
     filter_horizontal = (
         "groups",
         "user_permissions",
     )
+
+    def get_changelist(self, request, **kwargs):
+        return UserChangeList
+
+    def get_paginator(
+        self, request, queryset, per_page, orphans=0, allow_empty_first_page=True
+    ):
+        return self.paginator(
+            queryset,
+            per_page,
+            orphans,
+            allow_empty_first_page,
+            keyset=self.get_ordering(request),
+            cursor=request.GET.get(CURSOR_VAR),
+        )
+
+    @admin.action(description=_("Log out of all sessions"), permissions=["change"])
+    def log_out_everywhere(self, request, queryset):
+        count = get_session_store_class().delete_user_sessions(
+            queryset.values("pk"), keep=request.session.session_key
+        )
+        self.message_user(
+            request,
+            ngettext(
+                "Deleted %(count)d session.",
+                "Deleted %(count)d sessions.",
+                count,
+            )
+            % {"count": count},
+            messages.SUCCESS,
+        )
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class AccountsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "project.accounts"
+
+    def ready(self):
+        from django.contrib.auth.signals import user_logged_in
+
+        from . import checks, signals  # noqa: F401
+
+        # signals.record_last_login updates last_login instead.
+        user_logged_in.disconnect(dispatch_uid="update_last_login")
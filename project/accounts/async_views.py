@@ -0,0 +1,233 @@
+"""
+Async-native versions of the account views, enabled with ACCOUNTS_ASYNC_VIEWS.
+
+Under an ASGI server they run on the event loop instead of a worker thread.
+Passwords are checked with the async hashing API (see accounts.hashers) and
+users are loaded with the async ORM. Work that is still sync-only in Django
+4.2 (sessions, login/logout, sending mail, saving forms) runs in a thread
+with sync_to_async().
+
+RedirectURLMixin and PasswordContextMixin don't do any I/O and are shared
+with the sync views.
+"""
+
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.contrib.auth import login as auth_login
+from django.contrib.auth import logout as auth_logout
+from django.contrib.auth.views import redirect_to_login
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponseRedirect
+from django.utils.cache import add_never_cache_headers
+from django.utils.translation import gettext_lazy as _
+from django.views.generic import View
+
+from project.core.mixins import NonAtomicMixin
+
+from . import views
+from .forms import AsyncAuthenticationForm, AsyncPasswordChangeForm
+from .utils import aget_user_via_uidb64
+
+
+async def ais_authenticated(request):
+    """Load the lazy request.user, in a thread, and return is_authenticated."""
+    return await sync_to_async(lambda: request.user.is_authenticated)()
+
+
+class AsyncViewMixin(NonAtomicMixin):
+    """
+    Async replacement of the dispatch() decorators of the sync views, which
+    don't support coroutines in Django 4.2. CSRF protection is still applied
+    by CsrfViewMiddleware.
+
+    Django can't wrap async views in ATOMIC_REQUESTS transactions, their
+    queries run in autocommit mode.
+    """
+
+    login_required = False
+    never_cache = False
+    redirect_authenticated_user = False
+    sensitive_post_parameters = False
+
+    async def dispatch(self, request, *args, **kwargs):
+        if self.sensitive_post_parameters:
+            request.sensitive_post_parameters = "__ALL__"
+        if self.login_required and not await ais_authenticated(request):
+            return redirect_to_login(request.get_full_path())
+        if self.redirect_authenticated_user and await ais_authenticated(request):
+            redirect_to = self.get_success_url()
+            if redirect_to == request.path:
+                raise ValueError(
+                    "Redirection loop for authenticated user detected. Check "
+                    "the redirect URL of %s." % self.__class__.__name__
+                )
+            return HttpResponseRedirect(redirect_to)
+        # Skip the decorated sync dispatch() of the view being extended.
+        response = await View.dispatch(self, request, *args, **kwargs)
+        if self.never_cache:
+            add_never_cache_headers(response)
+        return response
+
+
+class AsyncTemplateMixin:
+    async def get(self, request, *args, **kwargs):
+        return self.render_to_response(self.get_context_data(**kwargs))
+
+
+class AsyncFormMixin:
+    """
+    Validate forms with their `ais_valid()` method when they have one, and in
+    a thread otherwise. form_valid() runs in a thread.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        return self.render_to_response(self.get_context_data())
+
+    async def post(self, request, *args, **kwargs):
+        form = self.get_form()
+        if await self.ais_valid(form):
+            return await self.aform_valid(form)
+        return self.form_invalid(form)
+
+    async def put(self, *args, **kwargs):
+        return await self.post(*args, **kwargs)
+
+    async def ais_valid(self, form):
+        if hasattr(form, "ais_valid"):
+            return await form.ais_valid()
+        return await sync_to_async(form.is_valid)()
+
+    async def aform_valid(self, form):
+        return await sync_to_async(self.form_valid)(form)
+
+
+class AsyncSignUpView(AsyncViewMixin, AsyncFormMixin, views.SignUpView):
+    never_cache = True
+    redirect_authenticated_user = True
+    sensitive_post_parameters = True
+
+
+signup_view = AsyncSignUpView.as_view()
+
+
+class AsyncLoginView(AsyncViewMixin, AsyncFormMixin, views.LoginView):
+    form_class = AsyncAuthenticationForm
+    never_cache = True
+    redirect_authenticated_user = True
+    sensitive_post_parameters = True
+
+    async def aform_valid(self, form):
+        """Security check complete. Log the user in."""
+        await sync_to_async(auth_login)(self.request, form.get_user())
+        return HttpResponseRedirect(self.get_success_url())
+
+
+login_view = AsyncLoginView.as_view()
+
+
+class AsyncLogoutView(AsyncViewMixin, views.LogoutView):
+    never_cache = True
+
+    async def post(self, request, *args, **kwargs):
+        """Logout may be done via POST."""
+        await sync_to_async(auth_logout)(request)
+        redirect_to = self.get_success_url()
+        messages.success(
+            request=self.request, message=_("You have been logged out successfully.")
+        )
+        if redirect_to != request.get_full_path():
+            # Redirect to target page once the session has been cleared.
+            return HttpResponseRedirect(redirect_to)
+        return self.render_to_response(self.get_context_data(**kwargs))
+
+
+logout_view = AsyncLogoutView.as_view()
+
+
+class AsyncPasswordResetView(AsyncViewMixin, AsyncFormMixin, views.PasswordResetView):
+    pass
+
+
+password_reset_view = AsyncPasswordResetView.as_view()
+
+
+class AsyncPasswordResetDoneView(
+    AsyncViewMixin, AsyncTemplateMixin, views.PasswordResetDoneView
+):
+    pass
+
+
+password_reset_done_view = AsyncPasswordResetDoneView.as_view()
+
+
+class AsyncPasswordResetConfirmView(
+    AsyncViewMixin, AsyncFormMixin, views.PasswordResetConfirmView
+):
+    never_cache = True
+    sensitive_post_parameters = True
+
+    async def dispatch(self, request, *args, **kwargs):
+        if "uidb64" not in kwargs or "token" not in kwargs:
+            raise ImproperlyConfigured(
+                "The URL path must contain 'uidb64' and 'token' parameters."
+            )
+
+        self.validlink = False
+        self.user = await aget_user_via_uidb64(uidb64=kwargs["uidb64"])
+
+        if self.user is not None:
+            token = kwargs["token"]
+            if token == self.reset_url_token:
+                session_token = await sync_to_async(request.session.get)(
+                    views.INTERNAL_RESET_SESSION_TOKEN
+                )
+                if self.token_generator.check_token(self.user, session_token):
+                    # if the token is valid, display the password reset form.
+                    self.validlink = True
+                    return await super().dispatch(request, *args, **kwargs)
+            else:
+                if self.token_generator.check_token(self.user, token):
+                    # Store the token in the session and redirect to the
+                    # password reset form at a URL without the token. That
+                    # avoids the possibility of leaking the token in the
+                    # HTTP Referer header.
+                    await sync_to_async(request.session.__setitem__)(
+                        views.INTERNAL_RESET_SESSION_TOKEN, token
+                    )
+                    redirect_url = request.path.replace(token, self.reset_url_token)
+                    return HttpResponseRedirect(redirect_to=redirect_url)
+
+        # Display the "Password reset unsuccessful" page.
+        response = self.render_to_response(self.get_context_data())
+        add_never_cache_headers(response)
+        return response
+
+
+password_reset_confirm_view = AsyncPasswordResetConfirmView.as_view()
+
+
+class AsyncPasswordResetCompleteView(
+    AsyncViewMixin, AsyncTemplateMixin, views.PasswordResetCompleteView
+):
+    pass
+
+
+password_reset_complete_view = AsyncPasswordResetCompleteView.as_view()
+
+
+class AsyncPasswordChangeView(AsyncViewMixin, AsyncFormMixin, views.PasswordChangeView):
+    form_class = AsyncPasswordChangeForm
+    login_required = True
+    sensitive_post_parameters = True
+
+
+password_change_view = AsyncPasswordChangeView.as_view()
+
+
+class AsyncPasswordChangeDoneView(
+    AsyncViewMixin, AsyncTemplateMixin, views.PasswordChangeDoneView
+):
+    login_required = True
+
+
+password_change_done_view = AsyncPasswordChangeDoneView.as_view()
@@ -0,0 +1,139 @@
+import inspect
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend as BaseModelBackend
+from django.contrib.auth.signals import user_login_failed
+from django.core.cache import caches
+from django.core.exceptions import PermissionDenied
+
+from .hashers import acheck_password, amake_password
+
+UserModel = get_user_model()
+
+
+async def aauthenticate(request=None, **credentials):
+    """
+    Async version of django.contrib.auth.authenticate().
+
+    Backends without an `aauthenticate()` method are run in a thread.
+    """
+    for backend, backend_path in auth._get_backends(return_tuples=True):
+        backend_signature = inspect.signature(backend.authenticate)
+        try:
+            backend_signature.bind(request, **credentials)
+        except TypeError:
+            # This backend doesn't accept these credentials as arguments. Try
+            # the next one.
+            continue
+        try:
+            if hasattr(backend, "aauthenticate"):
+                user = await backend.aauthenticate(request, **credentials)
+            else:
+                user = await sync_to_async(backend.authenticate)(request, **credentials)
+        except PermissionDenied:
+            # This backend says to stop in our tracks - this user should not be
+            # allowed in at all.
+            break
+        if user is None:
+            continue
+        # Annotate the user object with the path of the backend.
+        user.backend = backend_path
+        return user
+
+    # The credentials supplied are invalid to all backends, fire signal
+    await sync_to_async(user_login_failed.send)(
+        sender=__name__,
+        credentials=auth._clean_credentials(credentials),
+        request=request,
+    )
+
+
+def get_user_cache():
+    return caches[settings.AUTH_CACHE]
+
+
+def get_user_cache_version():
+    """
+    Return the version of the cached users, bumped when groups or permissions
+    change. It starts from the time so that it never goes back to a version
+    whose entries are still cached when it's evicted.
+    """
+    cache = get_user_cache()
+    version = cache.get("auth:version")
+    if version is None:
+        cache.add("auth:version", time.time_ns(), timeout=None)
+        version = cache.get("auth:version")
+    return version
+
+
+def invalidate_user(user_id):
+    """Drop the cached snapshot of a user."""
+    get_user_cache().delete(f"auth:user:{user_id}", version=get_user_cache_version())
+
+
+def invalidate_users():
+    """Drop the cached snapshots of every user."""
+    cache = get_user_cache()
+    try:
+        cache.incr("auth:version")
+    except ValueError:
+        cache.add("auth:version", time.time_ns(), timeout=None)
+
+
+class ModelBackend(BaseModelBackend):
+    """
+    django.contrib.auth.backends.ModelBackend with an async authenticate(),
+    loading users from the AUTH_CACHE cache, along with their permissions, so
+    that authenticated requests don't query the user and permission tables.
+
+    The snapshots are cached for AUTH_CACHE_TIMEOUT seconds (0 disables the
+    caching), and dropped by the signal handlers of project.accounts.signals
+    when the user, its groups or permissions change.
+    """
+
+    async def aauthenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return
+        try:
+            user = await UserModel._default_manager.aget(
+                **{UserModel.USERNAME_FIELD: username}
+            )
+        except UserModel.DoesNotExist:
+            # Run the default password hasher once to reduce the timing
+            # difference between an existing and a nonexistent user (#20760).
+            await amake_password(password)
+        else:
+
+            def setter(raw_password):
+                user.set_password(raw_password)
+                user._password = None
+                user.save(update_fields=["password"])
+
+            if await acheck_password(
+                password, user.password, setter
+            ) and self.user_can_authenticate(user):
+                return user
+
+    def get_user(self, user_id):
+        timeout = settings.AUTH_CACHE_TIMEOUT
+        if not timeout:
+            return super().get_user(user_id)
+        cache = get_user_cache()
+        key = f"auth:user:{user_id}"
+        version = get_user_cache_version()
+        user = cache.get(key, version=version)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            # Resolve the permissions, cached on the instance by
+            # ModelBackend.get_all_permissions().
+            self.get_all_permissions(user)
+            cache.set(key, user, timeout=timeout, version=version)
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+
+from project.core.cache import has_atomic_incr
+
+
+@checks.register(checks.Tags.caches)
+def check_activity_cache(app_configs, **kwargs):
+    """
+    The write-behind buffers of project.accounts.activity number their log
+    entries with incr(), concurrent events would overwrite each other's.
+    """
+    if not (settings.LAST_LOGIN_WRITE_BEHIND or settings.LAST_SEEN_INTERVAL):
+        return []
+    if has_atomic_incr(caches[settings.ACTIVITY_CACHE]):
+        return []
+    return [
+        checks.Error(
+            f"The ACTIVITY_CACHE cache {settings.ACTIVITY_CACHE!r} doesn't "
+            "increment counters atomically.",
+            hint=(
+                "Use Redis or Memcached, or disable LAST_LOGIN_WRITE_BEHIND and "
+                "LAST_SEEN_INTERVAL."
+            ),
+            id="accounts.E001",
+        )
+    ]
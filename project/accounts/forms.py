@@ -1,5 +1,9 @@
+import time
+
+from asgiref.sync import sync_to_async
 from django import forms
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
 from django.contrib.auth import password_validation, get_user_model, authenticate
 from django.contrib.auth.forms import UsernameField, ReadOnlyPasswordHashField
 from django.utils.translation import gettext_lazy as _
@@ -7,6 +11,9 @@ from django.utils.text import capfirst
 
 from .utils import generate_and_mail_link
 from .tokens import default_token_generator
+from .backends import aauthenticate
+from .hashers import acheck_password
+from .throttling import LoginThrottle
 
 UserModel = get_user_model()
 
@@ -87,40 +94,57 @@ class BaseUserCreationForm(forms.ModelForm):
 
 
 class UserCreationForm(BaseUserCreationForm):
-    def clean_username(self):
-        """Reject usernames that differ only in case."""
-        username = self.cleaned_data.get("username")
-        if (
-            username
-            and self._meta.model.objects.filter(username__iexact=username).exists()
-        ):
-            self._update_errors(
-                ValidationError(
-                    message={
-                        "username": self.instance.unique_error_message(
-                            self._meta.model, ["username"]
-                        )
-                    }
-                )
-            )
-        else:
-            return username
-
-    def clean_email(self):
-        """Reject email that differ only in case."""
-        email = self.cleaned_data.get("email")
-        if email and self._meta.model.objects.filter(email__iexact=email).exists():
-            self._update_errors(
-                ValidationError(
-                    message={
-                        "email": self.instance.unique_error_message(
-                            self._meta.model, ["email"]
-                        )
-                    }
-                )
+    """
+    Reject usernames and emails that differ only in case from existing ones.
+
+    Both are checked in a single query by clean(). A concurrent signup taking
+    them between clean() and save() is caught by the unique constraints and
+    reported with the same errors.
+    """
+
+    def clean(self):
+        cleaned_data = super().clean()
+        self._add_unavailable_errors()
+        return cleaned_data
+
+    def validate_unique(self):
+        """
+        Skip the case-sensitive username and email uniqueness queries, clean()
+        already checked them case-insensitively.
+        """
+        exclude = self._get_validation_exclusions()
+        exclude.update({"username", "email"})
+        try:
+            self.instance.validate_unique(exclude=exclude)
+        except ValidationError as e:
+            self._update_errors(e)
+
+    def save(self, commit=True):
+        """
+        Raise ValidationError, with the form errors set, if a concurrent
+        signup took the username or email.
+        """
+        if not commit:
+            return super().save(commit=False)
+        try:
+            with transaction.atomic():
+                return super().save(commit=True)
+        except IntegrityError:
+            if not self._add_unavailable_errors():
+                raise
+            raise ValidationError(self.errors)
+
+    def _add_unavailable_errors(self):
+        """Add an error to each taken field and return the taken fields."""
+        taken = self._meta.model.objects.unavailable_fields(
+            username=self.cleaned_data.get("username"),
+            email=self.cleaned_data.get("email"),
+        )
+        for field in taken:
+            self.add_error(
+                field, self.instance.unique_error_message(self._meta.model, [field])
             )
-        else:
-            return email
+        return taken
 
 
 class UserChangeForm(forms.ModelForm):
@@ -178,6 +202,9 @@ class AuthenticationForm(forms.Form):
             "fields may be case-sensitive."
         ),
         "inactive": _("This account is inactive."),
+        "too_many_attempts": _(
+            "Too many failed login attempts. Please try again later."
+        ),
     }
 
     def __init__(self, request=None, *args, **kwargs):
@@ -202,9 +229,19 @@ class AuthenticationForm(forms.Form):
         password = self.cleaned_data.get("password")
 
         if username is not None and password:
+            # Reject throttled logins before any query or password hashing.
+            throttle = LoginThrottle(self.request, username)
+            if not throttle.allow():
+                raise self.get_too_many_attempts_error()
+            # On success, the password is rehashed if the preferred hasher or
+            # its work factor changed (see the 'calibrate_hashers' command).
+            started_at = time.perf_counter()
             self.user_cache = authenticate(
                 self.request, username=username, password=password
             )
+            throttle.record(
+                self.user_cache is not None, time.perf_counter() - started_at
+            )
             if self.user_cache is None:
                 raise self.get_invalid_login_error()
             else:
@@ -238,6 +275,48 @@ class AuthenticationForm(forms.Form):
             params={"username": self.username_field.verbose_name},
         )
 
+    def get_too_many_attempts_error(self):
+        return ValidationError(
+            self.error_messages["too_many_attempts"],
+            code="too_many_attempts",
+        )
+
+
+class AsyncAuthenticationForm(AuthenticationForm):
+    """
+    AuthenticationForm to be validated with `await form.ais_valid()`, which
+    checks the password without blocking the event loop.
+    """
+
+    def clean(self):
+        # Authentication happens in ais_valid().
+        return self.cleaned_data
+
+    async def ais_valid(self):
+        if not self.is_valid():
+            return False
+        throttle = LoginThrottle(self.request, self.cleaned_data["username"])
+        if not await sync_to_async(throttle.allow)():
+            self.add_error(None, self.get_too_many_attempts_error())
+            return False
+        started_at = time.perf_counter()
+        self.user_cache = await aauthenticate(
+            self.request,
+            username=self.cleaned_data["username"],
+            password=self.cleaned_data["password"],
+        )
+        await sync_to_async(throttle.record)(
+            self.user_cache is not None, time.perf_counter() - started_at
+        )
+        try:
+            if self.user_cache is None:
+                raise self.get_invalid_login_error()
+            self.confirm_login_allowed(self.user_cache)
+        except ValidationError as error:
+            self.add_error(None, error)
+            return False
+        return True
+
 
 class PasswordResetForm(forms.Form):
     email = forms.EmailField(
@@ -353,3 +432,36 @@ class PasswordChangeForm(SetPasswordForm):
                 code="password_incorrect",
             )
         return old_password
+
+
+class AsyncPasswordChangeForm(PasswordChangeForm):
+    """
+    PasswordChangeForm to be validated with `await form.ais_valid()`, which
+    checks the old password without blocking the event loop.
+    """
+
+    def clean_old_password(self):
+        # Checked by ais_valid().
+        return self.cleaned_data["old_password"]
+
+    async def ais_valid(self):
+        self.is_valid()
+        old_password = self.cleaned_data.get("old_password")
+
+        def setter(raw_password):
+            # Upgrade an outdated hash, as User.check_password() does.
+            self.user.set_password(raw_password)
+            self.user._password = None
+            self.user.save(update_fields=["password"])
+
+        if old_password is not None and not await acheck_password(
+            old_password, self.user.password, setter
+        ):
+            self.add_error(
+                "old_password",
+                ValidationError(
+                    self.error_messages["password_incorrect"],
+                    code="password_incorrect",
+                ),
+            )
+        return not self.errors
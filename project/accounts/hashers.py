@@ -0,0 +1,164 @@
+"""
+PBKDF2 password hashers that can run the key derivation in a process pool.
+
+With PASSWORD_HASHING_POOL enabled, hashing runs in a bounded pool of worker
+processes, so at most PASSWORD_HASHING_POOL_SIZE cores are busy hashing and
+request threads only wait on the result. The async API (`aencode`, `averify`
+and `acheck_password`) awaits the pool without blocking the event loop.
+
+The algorithm names are Django's, existing password hashes stay valid.
+"""
+
+import asyncio
+import base64
+import hashlib
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.utils.crypto import constant_time_compare
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _pbkdf2(password, salt, iterations, digest_name):
+    """Return the base64 encoded PBKDF2 hash, runs in the pool processes."""
+    hash = hashlib.pbkdf2_hmac(
+        digest_name, password.encode(), salt.encode(), iterations
+    )
+    return base64.b64encode(hash).decode("ascii").strip()
+
+
+def _reset_executor():
+    global _executor
+    _executor = None
+
+
+# A forked worker must start its own pool.
+os.register_at_fork(after_in_child=_reset_executor)
+
+
+def get_executor():
+    """Return the process-wide hashing pool, starting it if needed."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Don't fork the (possibly multi-threaded) server process itself.
+            method = (
+                "forkserver"
+                if "forkserver" in multiprocessing.get_all_start_methods()
+                else "spawn"
+            )
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.PASSWORD_HASHING_POOL_SIZE or os.cpu_count(),
+                mp_context=multiprocessing.get_context(method),
+            )
+        return _executor
+
+
+def shutdown_executor():
+    """Stop the hashing pool, it is started again on the next hash."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown()
+
+
+def pbkdf2(password, salt, iterations, digest_name):
+    """Compute a PBKDF2 hash in the pool, or in the calling thread."""
+    if not settings.PASSWORD_HASHING_POOL:
+        return _pbkdf2(password, salt, iterations, digest_name)
+    return (
+        get_executor().submit(_pbkdf2, password, salt, iterations, digest_name).result()
+    )
+
+
+async def apbkdf2(password, salt, iterations, digest_name):
+    """Async version of pbkdf2(), never blocks the event loop."""
+    if not settings.PASSWORD_HASHING_POOL:
+        return await sync_to_async(_pbkdf2, thread_sensitive=False)(
+            password, salt, iterations, digest_name
+        )
+    future = get_executor().submit(_pbkdf2, password, salt, iterations, digest_name)
+    return await asyncio.wrap_future(future)
+
+
+class PooledPBKDF2Mixin:
+    digest_name = None
+
+    def encode(self, password, salt, iterations=None):
+        self._check_encode_args(password, salt)
+        iterations = iterations or self.iterations
+        hash = pbkdf2(password, salt, iterations, self.digest_name)
+        return "%s$%d$%s$%s" % (self.algorithm, iterations, salt, hash)
+
+    async def aencode(self, password, salt, iterations=None):
+        self._check_encode_args(password, salt)
+        iterations = iterations or self.iterations
+        hash = await apbkdf2(password, salt, iterations, self.digest_name)
+        return "%s$%d$%s$%s" % (self.algorithm, iterations, salt, hash)
+
+    async def averify(self, password, encoded):
+        decoded = self.decode(encoded)
+        encoded_2 = await self.aencode(password, decoded["salt"], decoded["iterations"])
+        return constant_time_compare(encoded, encoded_2)
+
+
+class PBKDF2PasswordHasher(PooledPBKDF2Mixin, hashers.PBKDF2PasswordHasher):
+    digest_name = "sha256"
+
+
+class PBKDF2SHA1PasswordHasher(PooledPBKDF2Mixin, hashers.PBKDF2SHA1PasswordHasher):
+    digest_name = "sha1"
+
+
+async def acheck_password(password, encoded, setter=None, preferred="default"):
+    """
+    Async version of django.contrib.auth.hashers.check_password().
+
+    Hashers without an async API are run in a thread.
+    """
+    if password is None or not hashers.is_password_usable(encoded):
+        return False
+
+    preferred = hashers.get_hasher(preferred)
+    try:
+        hasher = hashers.identify_hasher(encoded)
+    except ValueError:
+        # encoded is gibberish or uses a hasher that's no longer installed.
+        return False
+
+    hasher_changed = hasher.algorithm != preferred.algorithm
+    must_update = hasher_changed or preferred.must_update(encoded)
+    if hasattr(hasher, "averify"):
+        is_correct = await hasher.averify(password, encoded)
+    else:
+        is_correct = await sync_to_async(hasher.verify)(password, encoded)
+
+    # If the hasher didn't change (we don't protect against enumeration if it
+    # does) and the password should get updated, try to close the timing gap
+    # between the work factor of the current encoded password and the default
+    # work factor.
+    if not is_correct and not hasher_changed and must_update:
+        await sync_to_async(hasher.harden_runtime)(password, encoded)
+
+    if setter and is_correct and must_update:
+        await sync_to_async(setter)(password)
+    return is_correct
+
+
+async def amake_password(password, salt=None, hasher="default"):
+    """Async version of django.contrib.auth.hashers.make_password()."""
+    if password is None:
+        return hashers.make_password(password)
+    hasher = hashers.get_hasher(hasher)
+    salt = salt or hasher.salt()
+    if hasattr(hasher, "aencode"):
+        return await hasher.aencode(password, salt)
+    return await sync_to_async(hasher.encode)(password, salt)
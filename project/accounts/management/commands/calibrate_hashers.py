@@ -0,0 +1,165 @@
+import math
+import platform
+import time
+
+from django.contrib.auth import hashers as django_hashers
+from django.contrib.auth.hashers import get_hashers
+from django.core.management.base import BaseCommand, CommandError
+
+MODULE_TEMPLATE = '''"""
+Password hashers calibrated by 'manage.py calibrate_hashers' on {host} to take
+about {target_ms} ms per hash. List them in PASSWORD_HASHERS in place of their
+base classes, stored hashes are upgraded on the next successful login.
+"""
+{imports}
+{classes}'''
+
+CLASS_TEMPLATE = """
+
+class Calibrated{name}({module}.{name}):
+    {attribute} = {value}
+"""
+
+
+def get_default(hasher, attribute):
+    """
+    Return the default work factor `attribute` of the Django hasher `hasher`
+    derives from, or None.
+    """
+    for cls in type(hasher).__mro__:
+        if cls.__module__ == django_hashers.__name__ and attribute in vars(cls):
+            return vars(cls)[attribute]
+    return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the hashers listed in PASSWORD_HASHERS on this host and write "
+        "hasher subclasses whose work factor takes about --target-ms per hash."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--target-ms",
+            type=float,
+            default=150,
+            help="Target duration of a single hash, in milliseconds.",
+        )
+        parser.add_argument(
+            "--samples",
+            type=int,
+            default=5,
+            help="Number of hashes measured per hasher, the fastest one is used.",
+        )
+        parser.add_argument(
+            "--output",
+            help="Write the hasher module to this file instead of stdout.",
+        )
+
+    def handle(self, *args, **options):
+        target = options["target_ms"] / 1000
+        if target <= 0:
+            raise CommandError("--target-ms must be positive.")
+
+        modules = set()
+        classes = []
+        for hasher in get_hashers():
+            try:
+                calibrated = self.calibrate(hasher, target, options["samples"])
+            except ValueError as e:
+                # e.g. the hasher's library isn't installed.
+                self.stderr.write(
+                    self.style.WARNING(f"Skipping {hasher.algorithm}: {e}")
+                )
+                continue
+            if calibrated is None:
+                self.stderr.write(
+                    self.style.WARNING(
+                        f"Skipping {hasher.algorithm}: no known work factor."
+                    )
+                )
+                continue
+            attribute, value, duration = calibrated
+            default = get_default(hasher, attribute)
+            if default is not None and value < default:
+                # Never weaker than Django's default, or logins would rehash
+                # passwords downward.
+                self.stderr.write(
+                    self.style.WARNING(
+                        f"{hasher.algorithm}: {attribute} = {value} is below "
+                        f"Django's default of {default}, using {default}."
+                    )
+                )
+                duration = self.scale(attribute, duration, value, default)
+                value = default
+            self.stderr.write(
+                f"{hasher.algorithm}: {attribute} = {value} "
+                f"(~{duration * 1000:.0f} ms, was {getattr(hasher, attribute)})"
+            )
+            module = type(hasher).__module__
+            modules.add(module)
+            classes.append(
+                CLASS_TEMPLATE.format(
+                    name=type(hasher).__name__,
+                    module=module,
+                    attribute=attribute,
+                    value=value,
+                )
+            )
+
+        imports = "".join(f"\nimport {module}" for module in sorted(modules))
+        source = MODULE_TEMPLATE.format(
+            host=platform.node() or "this host",
+            target_ms=options["target_ms"],
+            imports=imports,
+            classes="".join(classes),
+        )
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                file.write(source)
+            self.stderr.write(self.style.SUCCESS(f"Wrote {options['output']}."))
+        else:
+            self.stdout.write(source, ending="")
+
+    def measure(self, hasher, samples, **kwargs):
+        """Return the fastest of `samples` hashes, in seconds."""
+        durations = []
+        for _ in range(samples):
+            start = time.perf_counter()
+            hasher.encode("calibration password", hasher.salt(), **kwargs)
+            durations.append(time.perf_counter() - start)
+        return min(durations)
+
+    @staticmethod
+    def scale(attribute, duration, value, new_value):
+        """Return the duration of a hash once `attribute` is `new_value`."""
+        if attribute == "rounds":
+            return duration * 2 ** (new_value - value)
+        return duration * new_value / value
+
+    def calibrate(self, hasher, target, samples):
+        """
+        Return the work factor attribute of `hasher`, its value taking about
+        `target` seconds per hash and the estimated duration, or None if the
+        hasher has no known work factor.
+        """
+        if hasattr(hasher, "iterations"):
+            # PBKDF2: linear in the number of iterations, measure a fraction
+            # of the current work factor and extrapolate.
+            probe = max(hasher.iterations // 10, 1000)
+            per_iteration = self.measure(hasher, samples, iterations=probe) / probe
+            # Round to thousands.
+            iterations = max(round(target / per_iteration, -3), 1000)
+            return "iterations", int(iterations), iterations * per_iteration
+        if hasattr(hasher, "rounds"):
+            # bcrypt: the cost is 2 ** rounds.
+            duration = self.measure(hasher, samples)
+            rounds = hasher.rounds + round(math.log2(target / duration))
+            rounds = min(max(rounds, 4), 31)
+            return "rounds", rounds, duration * 2 ** (rounds - hasher.rounds)
+        if hasattr(hasher, "time_cost"):
+            # Argon2: linear in the number of passes.
+            duration = self.measure(hasher, samples)
+            time_cost = max(round(hasher.time_cost * target / duration), 1)
+            return "time_cost", time_cost, duration * time_cost / hasher.time_cost
+        return None
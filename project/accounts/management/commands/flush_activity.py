@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from project.accounts.activity import last_login_buffer, last_seen_buffer
+
+
+class Command(BaseCommand):
+    help = (
+        "Write the buffered user timestamps (last_login and last_seen) to the "
+        "database. Run it more often than LAST_LOGIN_MAX_STALENESS and "
+        "LAST_SEEN_MAX_STALENESS, past which they're written right away."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of users updated per query.",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep running and flush every --interval seconds.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=60,
+            help="Seconds to sleep between flushes when running with --loop.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            for buffer in (last_login_buffer, last_seen_buffer):
+                updated = buffer.flush(batch_size=options["batch_size"])
+                if updated:
+                    self.stdout.write(
+                        self.style.SUCCESS(
+                            f"Updated {buffer.field} of {updated} user(s)."
+                        )
+                    )
+            if not options["loop"]:
+                return None
+            time.sleep(options["interval"])
@@ -0,0 +1,83 @@
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from project.accounts.sessions import get_session_store_class
+
+# Former path of project.accounts.backends.ModelBackend, named by sessions.
+LEGACY_BACKENDS = {"django.contrib.auth.backends.ModelBackend"}
+BACKEND = "project.accounts.backends.ModelBackend"
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the unexpired sessions of the django.contrib.sessions table into "
+        "the table of the session engine, so that switching to it doesn't log "
+        "users out."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.SESSION_PURGE_BATCH_SIZE,
+            help="Number of sessions copied per statement.",
+        )
+        parser.add_argument(
+            "--delete",
+            action="store_true",
+            help="Delete the sessions from the django.contrib.sessions table.",
+        )
+
+    def handle(self, *args, **options):
+        store_class = get_session_store_class()
+        if not hasattr(store_class, "get_model_class"):
+            raise CommandError(
+                "The session engine doesn't store sessions in the database."
+            )
+        model = store_class.get_model_class()
+        if model is Session:
+            raise CommandError(
+                "The session engine already uses the django.contrib.sessions table."
+            )
+        sessions = Session.objects.filter(expire_date__gt=timezone.now()).order_by(
+            "session_key"
+        )
+        imported = skipped = 0
+        last_key = ""
+        while True:
+            batch = list(
+                sessions.filter(session_key__gt=last_key)[: options["batch_size"]]
+            )
+            if not batch:
+                break
+            last_key = batch[-1].session_key
+            objs = []
+            for session in batch:
+                store = store_class(session.session_key)
+                data = store.decode(session.session_data)
+                if not data:
+                    # Empty, or signed with another SECRET_KEY.
+                    skipped += 1
+                    continue
+                if data.get(BACKEND_SESSION_KEY) in LEGACY_BACKENDS:
+                    data[BACKEND_SESSION_KEY] = BACKEND
+                # Don't load the session from the new table.
+                store._session_cache = data
+                obj = store.create_model_instance(data)
+                obj.expire_date = session.expire_date
+                objs.append(obj)
+            # Sessions created meanwhile in the new table are kept.
+            model.objects.bulk_create(objs, ignore_conflicts=True)
+            imported += len(objs)
+            if options["delete"]:
+                Session.objects.filter(
+                    session_key__in=[session.session_key for session in batch]
+                ).delete()
+            if len(batch) < options["batch_size"]:
+                break
+        self.stdout.write(
+            self.style.SUCCESS(f"Imported {imported} session(s), skipped {skipped}.")
+        )
@@ -0,0 +1,65 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from project.accounts.sessions import get_session_store_class
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired sessions in small batches, sleeping between them, "
+        "instead of the single statement of clearsessions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.SESSION_PURGE_BATCH_SIZE,
+            help="Number of sessions deleted per statement.",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0.1,
+            help="Seconds to sleep between batches.",
+        )
+        parser.add_argument(
+            "--max-batches",
+            type=int,
+            default=0,
+            help="Stop after this many batches (0 for no limit).",
+        )
+
+    def handle(self, *args, **options):
+        store = get_session_store_class()
+        if not hasattr(store, "get_model_class"):
+            raise CommandError(
+                "The session engine doesn't store sessions in the database."
+            )
+        model = store.get_model_class()
+        # Sessions expiring while the command runs are left for the next run.
+        now = timezone.now()
+        deleted = batches = 0
+        while not options["max_batches"] or batches < options["max_batches"]:
+            # Select the keys first: DELETE ... LIMIT isn't portable. Both use
+            # the expire_date and primary key indexes.
+            session_keys = list(
+                model.objects.filter(expire_date__lt=now).values_list(
+                    "session_key", flat=True
+                )[: options["batch_size"]]
+            )
+            if not session_keys:
+                break
+            deleted += model.objects.filter(session_key__in=session_keys).delete()[0]
+            batches += 1
+            if len(session_keys) < options["batch_size"]:
+                break
+            time.sleep(options["sleep"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Deleted {deleted} expired session(s) in {batches} batch(es)."
+            )
+        )
@@ -0,0 +1,198 @@
+import json
+import os
+import time
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand, CommandError
+
+from project.accounts.managers import casefold
+from project.accounts.tokens import default_token_generator
+from project.accounts.utils import get_link_context, render_mail
+
+UserModel = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Send password reset links to every active user matching the given "
+        "filters or listed in the given file. With --checkpoint, an interrupted "
+        "run resumes after the last chunk it sent."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--filter",
+            action="append",
+            default=[],
+            metavar="LOOKUP=VALUE",
+            help="Queryset filter, e.g. --filter is_staff=True. Can be repeated.",
+        )
+        parser.add_argument(
+            "--input-file",
+            help="File with one email address per line, instead of --filter.",
+        )
+        parser.add_argument(
+            "--domain",
+            required=True,
+            help="Domain used in the password reset links.",
+        )
+        parser.add_argument(
+            "--use-https",
+            action="store_true",
+            help="Use https in the password reset links.",
+        )
+        parser.add_argument("--from-email", default=None)
+        parser.add_argument(
+            "--subject-template",
+            default="registration/password_reset_subject.txt",
+        )
+        parser.add_argument(
+            "--email-template",
+            default="registration/password_reset_email.html",
+        )
+        parser.add_argument("--html-email-template", default=None)
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Number of users fetched, rendered and sent at once.",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            help="JSON file recording the progress of the campaign.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Render the emails without sending them or saving the checkpoint.",
+        )
+
+    def handle(self, *args, **options):
+        if options["filter"] and options["input_file"]:
+            raise CommandError("Use either --filter or --input-file, not both.")
+        self.options = options
+
+        checkpoint = self.load_checkpoint()
+        if checkpoint.get("done"):
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Campaign already complete, remove {options['checkpoint']} "
+                    "to run it again."
+                )
+            )
+            return None
+
+        if options["input_file"]:
+            chunks = self.file_chunks(start_line=checkpoint.get("line", 0))
+        else:
+            chunks = self.queryset_chunks(last_pk=checkpoint.get("pk", 0))
+
+        dry_run = options["dry_run"]
+        verb = "Would send" if dry_run else "Sent"
+        connection = None if dry_run else get_connection()
+        total = checkpoint.get("sent", 0)
+        sent = 0
+        started_at = time.perf_counter()
+        try:
+            for users, position in chunks:
+                # Rendering is CPU-bound, threads would only contend for the
+                # GIL. Sending, which waits on the server, dominates anyway.
+                messages = [self.render(user) for user in users]
+                if connection is not None and messages:
+                    # The connection stays open between chunks.
+                    connection.open()
+                    connection.send_messages(messages)
+                sent += len(messages)
+                total += len(messages)
+                if not dry_run:
+                    self.save_checkpoint({**position, "sent": total})
+                elapsed = time.perf_counter() - started_at
+                self.stdout.write(
+                    f"{verb} {total} message(s), {sent / elapsed:.1f} messages/s."
+                )
+        finally:
+            if connection is not None:
+                connection.close()
+
+        if dry_run:
+            self.stdout.write(
+                self.style.SUCCESS(f"Dry run complete, would send {total} message(s).")
+            )
+            return None
+        self.save_checkpoint({"sent": total, "done": True})
+        self.stdout.write(
+            self.style.SUCCESS(f"Campaign complete, sent {total} message(s).")
+        )
+
+    def get_queryset(self):
+        """Active users with a usable password matching the --filter options."""
+        filters = {}
+        for item in self.options["filter"]:
+            lookup, sep, value = item.partition("=")
+            if not sep:
+                raise CommandError(f"Invalid filter {item!r}, use LOOKUP=VALUE.")
+            filters[lookup] = value
+        return (
+            UserModel._default_manager.filter(is_active=True, **filters)
+            .exclude(password__startswith=UNUSABLE_PASSWORD_PREFIX)
+            .order_by("pk")
+        )
+
+    def queryset_chunks(self, last_pk):
+        """Yield (users, checkpoint position) tuples of matching users."""
+        chunk_size = self.options["chunk_size"]
+        users = (
+            self.get_queryset().filter(pk__gt=last_pk).iterator(chunk_size=chunk_size)
+        )
+        while chunk := list(islice(users, chunk_size)):
+            yield chunk, {"pk": chunk[-1].pk}
+
+    def file_chunks(self, start_line):
+        """Yield (users, checkpoint position) tuples of users in the file."""
+        chunk_size = self.options["chunk_size"]
+        line = start_line
+        with open(self.options["input_file"]) as file:
+            lines = islice(file, start_line, None)
+            while chunk := list(islice(lines, chunk_size)):
+                line += len(chunk)
+                emails = {casefold(email.strip()) for email in chunk if email.strip()}
+                users = self.get_queryset().filter(email_ci__in=emails)
+                yield list(users), {"line": line}
+
+    def render(self, user):
+        options = self.options
+        context = get_link_context(
+            user,
+            domain=options["domain"],
+            site_name=options["domain"],
+            use_https=options["use_https"],
+            token_generator=default_token_generator,
+        )
+        return render_mail(
+            options["subject_template"],
+            options["email_template"],
+            context,
+            options["from_email"],
+            context["email"],
+            html_email_template_name=options["html_email_template"],
+        )
+
+    def load_checkpoint(self):
+        path = self.options["checkpoint"]
+        if path and os.path.exists(path):
+            with open(path) as file:
+                return json.load(file)
+        return {}
+
+    def save_checkpoint(self, checkpoint):
+        path = self.options["checkpoint"]
+        if not path:
+            return None
+        # Write to a temporary file first, a crash must not corrupt the
+        # checkpoint.
+        with open(f"{path}.tmp", "w") as file:
+            json.dump(checkpoint, file)
+        os.replace(f"{path}.tmp", path)
@@ -0,0 +1,41 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from project.accounts.throttling import (
+    get_login_metrics,
+    get_password_reset_metrics,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Show how many logins and password resets were throttled, and the "
+        "hashing time it saved."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Output the metrics as JSON.",
+        )
+
+    def handle(self, *args, **options):
+        login = get_login_metrics()
+        password_reset = get_password_reset_metrics()
+        if options["json"]:
+            self.stdout.write(
+                json.dumps({"login": login, "password_reset": password_reset})
+            )
+            return
+        self.stdout.write(
+            "Logins throttled: %(throttled)d\n"
+            "Logins authenticated: %(authenticated)d "
+            "(%(authenticate_seconds).1fs)\n"
+            "Authentication time saved: %(saved_seconds).1fs" % login
+        )
+        self.stdout.write(
+            "Password resets sent: %(sent)d, deduplicated: %(deduplicated)d, "
+            "throttled: %(throttled)d" % password_reset
+        )
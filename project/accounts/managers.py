@@ -1,7 +1,20 @@
+import datetime
+import unicodedata
+
 from django.apps import apps
 from django.contrib import auth
 from django.contrib.auth.hashers import make_password
-from django.contrib.auth.models import BaseUserManager
+from django.contrib.auth.models import BaseUserManager, Permission
+from django.db.models import Count, Q, QuerySet
+from django.utils import timezone
+
+
+def casefold(value):
+    """
+    Normalize `value` for case-insensitive comparison, using the recommended
+    algorithm from Unicode Technical Report 36, section 2.11.2(B)(2).
+    """
+    return unicodedata.normalize("NFKC", value).casefold()
 
 
 class UserManager(BaseUserManager):
@@ -55,6 +68,41 @@ class UserManager(BaseUserManager):
 
         return self._create_user(username, email, password, **extra_fields)
 
+    def filter_by_username(self, username):
+        """Return users whose username matches `username` case-insensitively."""
+        return self.filter(username_ci=casefold(username))
+
+    def filter_by_email(self, email):
+        """Return users whose email matches `email` case-insensitively."""
+        return self.filter(email_ci=casefold(email))
+
+    def unavailable_fields(self, username=None, email=None, exclude_pk=None):
+        """
+        Return the subset of {"username", "email"} already taken
+        case-insensitively by other users, using a single query. The user
+        whose primary key is `exclude_pk` doesn't count.
+        """
+        username_ci = casefold(username) if username else None
+        email_ci = casefold(email) if email else None
+        lookups = Q()
+        if username_ci:
+            lookups |= Q(username_ci=username_ci)
+        if email_ci:
+            lookups |= Q(email_ci=email_ci)
+        if not lookups:
+            return set()
+        queryset = self.filter(lookups)
+        if exclude_pk is not None:
+            queryset = queryset.exclude(pk=exclude_pk)
+        taken = set()
+        # At most two users match, one by username and one by email.
+        for row in queryset.values_list("username_ci", "email_ci")[:2]:
+            if username_ci and row[0] == username_ci:
+                taken.add("username")
+            if email_ci and row[1] == email_ci:
+                taken.add("email")
+        return taken
+
     def with_perm(
         self, perm, is_active=True, include_superusers=True, backend=None, obj=None
     ):
@@ -81,3 +129,161 @@ class UserManager(BaseUserManager):
                 obj=obj,
             )
         return self.none()
+
+    # Bulk permission lookups, with the semantics of ModelBackend: users have
+    # their own permissions and those of their groups, active superusers have
+    # every permission and inactive users none. Permissions are given as
+    # "app_label.codename" strings. ModelBackend grants no permission on an
+    # object, so only superusers have those, as with User.has_perm(perm, obj).
+
+    def _get_permission_ids(self, perms):
+        """Return a subquery of the ids of `perms`."""
+        lookups = Q()
+        for perm in perms:
+            try:
+                app_label, codename = perm.split(".", 1)
+            except ValueError:
+                raise ValueError(
+                    "Permission name should be in the form "
+                    "app_label.permission_codename."
+                )
+            lookups |= Q(content_type__app_label=app_label, codename=codename)
+        return Permission.objects.filter(lookups).values("pk")
+
+    def _get_users_with_perms(self, perms):
+        """Return a filter on the users granted any of `perms`."""
+        permission_ids = self._get_permission_ids(perms)
+        return Q(
+            pk__in=self.model.user_permissions.through.objects.filter(
+                permission__in=permission_ids
+            ).values("user_id")
+        ) | Q(
+            pk__in=self.model.groups.through.objects.filter(
+                group__permissions__in=permission_ids
+            ).values("user_id")
+        )
+
+    def with_perms(
+        self,
+        perms,
+        require_all=False,
+        is_active=True,
+        include_superusers=True,
+        obj=None,
+    ):
+        """
+        Return the users having any of `perms`, or all of them with
+        `require_all`, on `obj` if given, in a single query.
+        """
+        perms = list(perms)
+        if not perms:
+            return self.none()
+        if obj is not None:
+            lookups = Q(pk__in=[])
+        elif require_all:
+            lookups = Q()
+            for perm in perms:
+                lookups &= self._get_users_with_perms([perm])
+        else:
+            lookups = self._get_users_with_perms(perms)
+        if include_superusers:
+            lookups |= Q(is_superuser=True)
+        queryset = self.filter(lookups)
+        if is_active is not None:
+            queryset = queryset.filter(is_active=is_active)
+        return queryset
+
+    def get_perms_by_user(self, users, perms=None, obj=None):
+        """
+        Return a dict of the permissions each of `users` has among `perms`,
+        or among all permissions, on `obj` if given, by user id. `users` is a
+        queryset, or a list of users or user ids. Runs three queries, and a
+        fourth one when there are superusers. With `obj`, runs one query, and
+        a second one when there are superusers.
+        """
+        if isinstance(users, QuerySet):
+            user_ids = users.values("pk")
+        else:
+            user_ids = [getattr(user, "pk", user) for user in users]
+        permissions = Permission.objects.all()
+        if perms is not None:
+            perms = list(perms)
+            if not perms:
+                permissions = permissions.none()
+            else:
+                permissions = permissions.filter(pk__in=self._get_permission_ids(perms))
+        permission_ids = permissions.values("pk")
+
+        result = {}
+        superusers = []
+        for pk, is_active, is_superuser in self.filter(pk__in=user_ids).values_list(
+            "pk", "is_active", "is_superuser"
+        ):
+            result[pk] = set()
+            if is_active and is_superuser:
+                superusers.append(pk)
+        if obj is not None:
+            user_perms = group_perms = []
+        else:
+            user_perms = self.model.user_permissions.through.objects.filter(
+                user_id__in=user_ids,
+                user__is_active=True,
+                permission__in=permission_ids,
+            ).values_list(
+                "user_id", "permission__content_type__app_label", "permission__codename"
+            )
+            group_perms = self.model.groups.through.objects.filter(
+                user_id__in=user_ids,
+                user__is_active=True,
+                group__permissions__in=permission_ids,
+            ).values_list(
+                "user_id",
+                "group__permissions__content_type__app_label",
+                "group__permissions__codename",
+            )
+        for rows in (user_perms, group_perms):
+            for user_id, app_label, codename in rows:
+                result[user_id].add(f"{app_label}.{codename}")
+        if superusers:
+            all_perms = {
+                f"{app_label}.{codename}"
+                for app_label, codename in permissions.values_list(
+                    "content_type__app_label", "codename"
+                )
+            }
+            for pk in superusers:
+                result[pk] = set(all_perms)
+        return result
+
+    # Activity, from the last_seen field. It lags by up to LAST_SEEN_INTERVAL
+    # seconds, and by the flush interval when buffered.
+
+    def active_since(self, since):
+        """Return the users seen since the `since` datetime."""
+        return self.filter(last_seen__gte=since)
+
+    def count_active(self, *days):
+        """
+        Return the number of users seen in the last `days` days, for each
+        of `days`, in one query using the last_seen index.
+        """
+        if not days:
+            return {}
+        now = timezone.now()
+        counts = self.active_since(now - datetime.timedelta(days=max(days))).aggregate(
+            **{
+                f"days_{d}": Count(
+                    "pk", filter=Q(last_seen__gte=now - datetime.timedelta(days=d))
+                )
+                for d in days
+            }
+        )
+        return {d: counts[f"days_{d}"] for d in days}
+
+    def dormant(self, days):
+        """Return the users who joined, but weren't seen, in the last `days`."""
+        cutoff = timezone.now() - datetime.timedelta(days=days)
+        return self.filter(
+            Q(last_seen__lt=cutoff) | Q(last_seen__isnull=True),
+            date_joined__lt=cutoff,
+        )
@@ -0,0 +1,37 @@
+import time
+
+from django.conf import settings
+from django.utils.deprecation import MiddlewareMixin
+
+from .activity import record_last_seen
+
+# Users remembered per process, the cache throttles the others.
+MAX_RECENT_USERS = 10000
+
+
+class LastSeenMiddleware(MiddlewareMixin):
+    """
+    Record when authenticated users were last seen, at most once every
+    LAST_SEEN_INTERVAL seconds per user. Must come after
+    AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        # User id to when it was last recorded by this process, to skip the
+        # cache on most requests.
+        self.recent = {}
+
+    def process_response(self, request, response):
+        user = getattr(request, "user", None)
+        interval = settings.LAST_SEEN_INTERVAL
+        if not interval or user is None or not user.is_authenticated:
+            return response
+        now = time.monotonic()
+        if now - self.recent.get(user.pk, -interval) < interval:
+            return response
+        if len(self.recent) >= MAX_RECENT_USERS:
+            self.recent.clear()
+        self.recent[user.pk] = now
+        record_last_seen(user.pk)
+        return response
@@ -1,11 +1,13 @@
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.core.mail import send_mail
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
+from django.contrib.sessions.base_session import AbstractBaseSession
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from .validators import UsernameValidator, NameValidator
-from .managers import UserManager
+from .managers import UserManager, casefold
 
 
 class User(AbstractBaseUser, PermissionsMixin):
@@ -36,6 +38,27 @@ class User(AbstractBaseUser, PermissionsMixin):
             "unique": _("Email address is already registered."),
         },
     )
+    # Casefolded copies of username and email kept up to date by save(), so
+    # that case-insensitive lookups and uniqueness use a plain unique index.
+    # Casefolding can triple the length of a string.
+    username_ci = models.CharField(
+        verbose_name=_("casefolded username"),
+        max_length=90,
+        unique=True,
+        editable=False,
+        error_messages={
+            "unique": _("A user with that username already exists."),
+        },
+    )
+    email_ci = models.CharField(
+        verbose_name=_("casefolded email address"),
+        max_length=762,
+        unique=True,
+        editable=False,
+        error_messages={
+            "unique": _("Email address is already registered."),
+        },
+    )
     first_name = models.CharField(
         verbose_name=_("first name"),
         max_length=150,
@@ -70,6 +93,15 @@ class User(AbstractBaseUser, PermissionsMixin):
     date_joined = models.DateTimeField(
         verbose_name=_("date joined"), default=timezone.now
     )
+    # Updated at most every LAST_SEEN_INTERVAL seconds by LastSeenMiddleware,
+    # and indexed for the activity counts of UserManager.
+    last_seen = models.DateTimeField(
+        verbose_name=_("last seen"),
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=True,
+    )
 
     objects = UserManager()
 
@@ -86,6 +118,45 @@ class User(AbstractBaseUser, PermissionsMixin):
         super().clean()
         self.email = self.__class__.objects.normalize_email(self.email)
 
+    def validate_unique(self, exclude=None):
+        """
+        Also reject a username or email differing only in case from another
+        user's. username_ci and email_ci aren't editable, so model forms don't
+        validate their unique constraints.
+        """
+        errors = {}
+        try:
+            super().validate_unique(exclude=exclude)
+        except ValidationError as e:
+            errors = e.update_error_dict(errors)
+        fields = {"username", "email"} - set(exclude or ()) - set(errors)
+        taken = self.__class__._default_manager.unavailable_fields(
+            username=self.username if "username" in fields else None,
+            email=self.email if "email" in fields else None,
+            exclude_pk=self.pk,
+        )
+        for field in taken:
+            errors[field] = [self.unique_error_message(self.__class__, [field])]
+        if errors:
+            raise ValidationError(errors)
+
+    def save(self, *args, **kwargs):
+        """
+        Keep the casefolded username and email in sync. Note that bulk_create()
+        and update() bypass this method and must set them explicitly.
+        """
+        self.username_ci = casefold(self.username)
+        self.email_ci = casefold(self.email)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if "username" in update_fields:
+                update_fields.add("username_ci")
+            if "email" in update_fields:
+                update_fields.add("email_ci")
+            kwargs["update_fields"] = update_fields
+        super().save(*args, **kwargs)
+
     def get_full_name(self):
         """
         Return the first_name plus the last_name, with a space in between.
@@ -100,3 +171,32 @@ class User(AbstractBaseUser, PermissionsMixin):
     def email_user(self, subject, message, from_email=None, **kwargs):
         """Send an email to this user."""
         send_mail(subject, message, from_email, [self.email], **kwargs)
+
+
+class UserSession(AbstractBaseSession):
+    """
+    Database session recording its user and device, so that the sessions of
+    a user can be listed or deleted with an indexed query. Used by the
+    project.accounts.sessions.db session engine.
+    """
+
+    user = models.ForeignKey(
+        User,
+        verbose_name=_("user"),
+        null=True,
+        on_delete=models.CASCADE,
+        related_name="sessions",
+    )
+    user_agent = models.CharField(_("user agent"), max_length=255, blank=True)
+    ip_address = models.GenericIPAddressField(_("IP address"), null=True, blank=True)
+    created_at = models.DateTimeField(_("created at"), default=timezone.now)
+
+    class Meta(AbstractBaseSession.Meta):
+        verbose_name = _("user session")
+        verbose_name_plural = _("user sessions")
+
+    @classmethod
+    def get_session_store_class(cls):
+        from .sessions.db import SessionStore
+
+        return SessionStore
@@ -0,0 +1,8 @@
+from importlib import import_module
+
+from django.conf import settings
+
+
+def get_session_store_class():
+    """Return the SessionStore class of the SESSION_ENGINE."""
+    return import_module(settings.SESSION_ENGINE).SessionStore
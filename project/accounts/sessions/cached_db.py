@@ -0,0 +1,68 @@
+"""
+Cached version of the project.accounts.sessions.db session engine: sessions
+are read from the SESSION_CACHE_ALIAS cache, and from the database on a miss.
+
+    SESSION_ENGINE = "project.accounts.sessions.cached_db"
+
+Saving a session whose data didn't change since it was loaded is skipped,
+so views that set a key to the value it already holds don't write to the
+database. Expiry isn't extended by those saves, so with
+SESSION_SAVE_EVERY_REQUEST every save is written.
+"""
+
+from django.conf import settings
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+from django.core.cache import caches
+
+from . import db
+
+
+class SessionStore(CachedDBStore, db.SessionStore):
+    cache_key_prefix = "project.accounts.sessions.cached_db"
+
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        # The serialized data as loaded or last saved.
+        self._saved_data = None
+
+    def _serialize(self, data):
+        return self.serializer().dumps(data)
+
+    def load(self):
+        data = super().load()
+        if self.session_key is not None:
+            self._saved_data = self._serialize(data)
+        return data
+
+    def save(self, must_create=False):
+        data = self._get_session(no_load=must_create)
+        serialized = self._serialize(data)
+        if (
+            not must_create
+            and not settings.SESSION_SAVE_EVERY_REQUEST
+            and self.session_key is not None
+            and serialized == self._saved_data
+        ):
+            return
+        super().save(must_create)
+        self._saved_data = serialized
+
+    @classmethod
+    def delete_user_sessions(cls, user_ids, keep=None):
+        # The sessions created meanwhile aren't deleted, neither from the
+        # database nor from the cache.
+        sessions = cls.get_model_class().objects.filter(user_id__in=user_ids)
+        if keep is not None:
+            sessions = sessions.exclude(session_key=keep)
+        session_keys = list(sessions.values_list("session_key", flat=True))
+        if not session_keys:
+            return 0
+        count = (
+            cls.get_model_class()
+            .objects.filter(session_key__in=session_keys)
+            .delete()[0]
+        )
+        caches[settings.SESSION_CACHE_ALIAS].delete_many(
+            [cls.cache_key_prefix + session_key for session_key in session_keys]
+        )
+        return count
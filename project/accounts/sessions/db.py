@@ -0,0 +1,64 @@
+"""
+Database session engine recording the user and the device of each session,
+see accounts.UserSession.
+
+    SESSION_ENGINE = "project.accounts.sessions.db"
+"""
+
+from django.contrib.auth import SESSION_KEY, get_user_model
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_ipv46_address
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+# Session data key of the device metadata, set at login.
+DEVICE_SESSION_KEY = "_auth_device"
+
+
+class SessionStore(DBStore):
+    @classmethod
+    def get_model_class(cls):
+        from project.accounts.models import UserSession
+
+        return UserSession
+
+    def create_model_instance(self, data):
+        obj = super().create_model_instance(data)
+        user_id = data.get(SESSION_KEY)
+        if user_id is not None:
+            obj.user_id = get_user_model()._meta.pk.to_python(user_id)
+        device = data.get(DEVICE_SESSION_KEY) or {}
+        obj.user_agent = device.get("user_agent", "")[:255]
+        obj.ip_address = device.get("ip_address")
+        if obj.ip_address:
+            try:
+                validate_ipv46_address(obj.ip_address)
+            except ValidationError:
+                # A forged X-Forwarded-For header.
+                obj.ip_address = None
+        # Sessions are saved whole, keep the login time.
+        created_at = device.get("created_at")
+        if created_at:
+            obj.created_at = parse_datetime(created_at)
+        return obj
+
+    @classmethod
+    def get_user_sessions(cls, user_id):
+        """Return the unexpired sessions of a user, the latest first."""
+        return (
+            cls.get_model_class()
+            .objects.filter(user_id=user_id, expire_date__gt=timezone.now())
+            .order_by("-created_at")
+        )
+
+    @classmethod
+    def delete_user_sessions(cls, user_ids, keep=None):
+        """
+        Delete the sessions of users, given as a list of ids or a queryset of
+        ids, except the `keep` session key. Return how many were deleted.
+        """
+        sessions = cls.get_model_class().objects.filter(user_id__in=user_ids)
+        if keep is not None:
+            sessions = sessions.exclude(session_key=keep)
+        return sessions.delete()[0]
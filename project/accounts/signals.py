@@ -0,0 +1,84 @@
+"""
+Invalidate the users cached by backends.ModelBackend when they, their groups
+or their permissions change.
+
+Entries are dropped right away, for the rest of the transaction, and again
+once it commits, in case another process cached the previous rows meanwhile.
+
+Also buffer last_login updates, see project.accounts.activity, and record
+the device of new sessions, see project.accounts.sessions.db.
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission, update_last_login
+from django.contrib.auth.signals import user_logged_in
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .activity import last_login_buffer
+from .backends import invalidate_user, invalidate_users
+from .sessions.db import DEVICE_SESSION_KEY
+from .throttling import get_client_ip
+
+UserModel = get_user_model()
+
+
+def on_change(func, *args):
+    func(*args)
+    transaction.on_commit(lambda: func(*args))
+
+
+@receiver(post_save, sender=UserModel)
+@receiver(post_delete, sender=UserModel)
+def user_changed(sender, instance, **kwargs):
+    on_change(invalidate_user, instance.pk)
+
+
+@receiver(m2m_changed, sender=UserModel.groups.through)
+@receiver(m2m_changed, sender=UserModel.user_permissions.through)
+def user_relations_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith("post_"):
+        return
+    if not reverse:
+        on_change(invalidate_user, instance.pk)
+    elif pk_set is None:
+        # A group or permission was cleared of all its users.
+        on_change(invalidate_users)
+    else:
+        for pk in pk_set:
+            on_change(invalidate_user, pk)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+@receiver(m2m_changed, sender=Group.permissions.through)
+def permissions_changed(sender, **kwargs):
+    if kwargs.get("action", "post_").startswith("post_"):
+        on_change(invalidate_users)
+
+
+# Replaces django.contrib.auth's receiver, disconnected by AccountsConfig.
+@receiver(user_logged_in, dispatch_uid="record_last_login")
+def record_last_login(sender, user, **kwargs):
+    if settings.LAST_LOGIN_WRITE_BEHIND:
+        now = timezone.now()
+        if last_login_buffer.record(user.pk, now, settings.LAST_LOGIN_MAX_STALENESS):
+            user.last_login = now
+            return
+    update_last_login(sender, user, **kwargs)
+
+
+@receiver(user_logged_in, dispatch_uid="record_session_device")
+def record_session_device(sender, request, user, **kwargs):
+    if request is None or not hasattr(request, "session"):
+        return
+    request.session[DEVICE_SESSION_KEY] = {
+        "user_agent": request.META.get("HTTP_USER_AGENT", "")[:255],
+        "ip_address": get_client_ip(request),
+        "created_at": timezone.now().isoformat(),
+    }
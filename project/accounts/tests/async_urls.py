@@ -0,0 +1,44 @@
+"""URLconf serving the async account views, see ACCOUNTS_ASYNC_VIEWS."""
+
+from django.urls import include, path
+
+from config import urls as project_urls
+from project.accounts import async_views as views
+
+accounts_urlpatterns = [
+    path("signup/", views.signup_view, name="signup"),
+    path("login/", views.login_view, name="login"),
+    path("logout/", views.logout_view, name="logout"),
+    path("password/reset/", views.password_reset_view, name="password_reset"),
+    path(
+        "password/reset/done/",
+        views.password_reset_done_view,
+        name="password_reset_done",
+    ),
+    path(
+        "password/reset/confirm/<uidb64>/<token>/",
+        views.password_reset_confirm_view,
+        name="password_reset_confirm",
+    ),
+    path(
+        "password/reset/complete/",
+        views.password_reset_complete_view,
+        name="password_reset_complete",
+    ),
+    path("password/change/", views.password_change_view, name="password_change"),
+    path(
+        "password/change/done/",
+        views.password_change_done_view,
+        name="password_change_done",
+    ),
+]
+
+# The project URLs, with the accounts namespace served by the async views.
+urlpatterns = [
+    path("accounts/", include((accounts_urlpatterns, "accounts"))),
+    *(
+        pattern
+        for pattern in project_urls.urlpatterns
+        if getattr(pattern, "namespace", None) != "accounts"
+    ),
+]
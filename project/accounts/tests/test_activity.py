@@ -0,0 +1,230 @@
+import datetime
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from project.accounts.activity import last_login_buffer, last_seen_buffer
+from project.accounts.checks import check_activity_cache
+
+UserModel = get_user_model()
+
+
+class WriteBehindBufferTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            UserModel.objects.create_user(f"user{i}", f"user{i}@example.com", "pw")
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.now = timezone.now().replace(microsecond=0)
+        last_login_buffer.flush()
+
+    def record(self, user, minutes):
+        timestamp = self.now + datetime.timedelta(minutes=minutes)
+        self.assertTrue(last_login_buffer.record(user.pk, timestamp, 60))
+        return timestamp
+
+    def get_last_login(self, user):
+        return UserModel.objects.get(pk=user.pk).last_login
+
+    def test_flush_latest(self):
+        first, second, _ = self.users
+        self.record(first, 1)
+        latest = self.record(first, 2)
+        self.record(first, 0)
+        second_login = self.record(second, 5)
+        self.assertIsNone(self.get_last_login(first))
+        with self.assertNumQueries(1):
+            self.assertEqual(last_login_buffer.flush(), 2)
+        self.assertEqual(self.get_last_login(first), latest)
+        self.assertEqual(self.get_last_login(second), second_login)
+        self.assertIsNone(self.get_last_login(self.users[2]))
+        # Flushed entries are gone.
+        self.assertEqual(last_login_buffer.flush(), 0)
+
+    def test_never_moves_back(self):
+        user = self.users[0]
+        later = self.now + datetime.timedelta(hours=1)
+        UserModel.objects.filter(pk=user.pk).update(last_login=later)
+        self.record(user, 1)
+        last_login_buffer.flush()
+        self.assertEqual(self.get_last_login(user), later)
+
+    def test_stale(self):
+        state = cache.get("activity:last_login:state")
+        state["flushed_at"] -= 120
+        cache.set("activity:last_login:state", state, timeout=None)
+        self.assertFalse(last_login_buffer.record(self.users[0].pk, self.now, 60))
+        self.assertTrue(last_login_buffer.record(self.users[0].pk, self.now, 180))
+
+    def test_entry_being_written(self):
+        first, second, _ = self.users
+        self.record(first, 1)
+        # Counted, but not written yet.
+        cache.incr("activity:last_login:count")
+        self.record(second, 1)
+        self.assertEqual(last_login_buffer.flush(), 2)
+        cache.set(
+            "activity:last_login:2",
+            (first.pk, self.now + datetime.timedelta(minutes=2)),
+        )
+        self.assertEqual(last_login_buffer.flush(), 2)
+        self.assertEqual(
+            self.get_last_login(first), self.now + datetime.timedelta(minutes=2)
+        )
+        # Still missing after a flush, it's skipped.
+        cache.incr("activity:last_login:count")
+        last_login_buffer.flush()
+        last_login_buffer.flush()
+        self.assertEqual(last_login_buffer.get_state()["cursor"], 4)
+
+    def test_command(self):
+        login = self.record(self.users[0], 1)
+        out = StringIO()
+        call_command("flush_activity", stdout=out)
+        self.assertIn("Updated last_login of 1 user(s).", out.getvalue())
+        self.assertEqual(self.get_last_login(self.users[0]), login)
+
+
+class LastLoginTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserModel.objects.create_user("alice", "alice@example.com", "pw")
+
+    def setUp(self):
+        cache.clear()
+
+    def login(self):
+        self.assertTrue(self.client.login(email="alice@example.com", password="pw"))
+        return UserModel.objects.get(pk=self.user.pk).last_login
+
+    def test_immediate(self):
+        self.assertIsNotNone(self.login())
+
+    @override_settings(LAST_LOGIN_WRITE_BEHIND=True)
+    def test_write_behind(self):
+        last_login_buffer.flush()
+        self.assertIsNone(self.login())
+        last_login_buffer.flush()
+        self.assertIsNotNone(UserModel.objects.get(pk=self.user.pk).last_login)
+
+    @override_settings(LAST_LOGIN_WRITE_BEHIND=True)
+    def test_write_behind_not_flushed(self):
+        self.assertIsNotNone(self.login())
+
+
+class LastSeenTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserModel.objects.create_user("alice", "alice@example.com", "pw")
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def get_last_seen(self):
+        return UserModel.objects.get(pk=self.user.pk).last_seen
+
+    def test_recorded(self):
+        self.client.get(reverse("home"))
+        self.assertIsNotNone(self.get_last_seen())
+
+    def test_anonymous(self):
+        self.client.logout()
+        with self.assertNumQueries(0):
+            self.client.get(reverse("home"))
+
+    def test_once_per_interval(self):
+        self.client.get(reverse("home"))
+        last_seen = self.get_last_seen()
+        # Another process, the cache throttles it.
+        self.client.handler.load_middleware()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("home"))
+        self.assertFalse(any("UPDATE" in query["sql"] for query in queries))
+        self.assertEqual(self.get_last_seen(), last_seen)
+
+    def test_buffered(self):
+        last_seen_buffer.flush()
+        self.client.get(reverse("home"))
+        self.assertIsNone(self.get_last_seen())
+        last_seen_buffer.flush()
+        self.assertIsNotNone(self.get_last_seen())
+
+    @override_settings(LAST_SEEN_INTERVAL=0)
+    def test_disabled(self):
+        self.client.get(reverse("home"))
+        self.assertIsNone(self.get_last_seen())
+
+
+class ActivityQueryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        long_ago = now - datetime.timedelta(days=365)
+        for i, days in enumerate([0, 2, 5, 20, 100, None]):
+            UserModel.objects.create_user(
+                f"user{i}",
+                f"user{i}@example.com",
+                "pw",
+                date_joined=long_ago,
+                last_seen=None if days is None else now - datetime.timedelta(days=days),
+            )
+        UserModel.objects.create_user("new", "new@example.com", "pw")
+
+    def test_count_active(self):
+        with self.assertNumQueries(1):
+            counts = UserModel.objects.count_active(1, 7, 30)
+        self.assertEqual(counts, {1: 1, 7: 3, 30: 4})
+        self.assertEqual(UserModel.objects.count_active(), {})
+
+    def test_active_since_uses_index(self):
+        plan = UserModel.objects.active_since(timezone.now()).explain()
+        self.assertIn("INDEX", plan.upper())
+        self.assertIn("last_seen", plan)
+
+    def test_dormant(self):
+        self.assertEqual(
+            set(UserModel.objects.dormant(30).values_list("username", flat=True)),
+            {"user4", "user5"},
+        )
+
+
+class ActivityCacheCheckTests(SimpleTestCase):
+    def file_cache(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location)
+        return {
+            "default": {
+                "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                "LOCATION": location,
+            }
+        }
+
+    def test_atomic_cache(self):
+        self.assertEqual(check_activity_cache(None), [])
+
+    def test_file_cache(self):
+        with self.settings(CACHES=self.file_cache()):
+            errors = check_activity_cache(None)
+        self.assertEqual([error.id for error in errors], ["accounts.E001"])
+
+    def test_disabled(self):
+        with self.settings(
+            CACHES=self.file_cache(),
+            LAST_LOGIN_WRITE_BEHIND=False,
+            LAST_SEEN_INTERVAL=0,
+        ):
+            self.assertEqual(check_activity_cache(None), [])
@@ -0,0 +1,163 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from project.accounts import async_views
+from project.accounts.forms import AsyncPasswordChangeForm
+from project.core.mail.outbox import deliver_outbox
+
+UserModel = get_user_model()
+
+
+@override_settings(ROOT_URLCONF="project.accounts.tests.async_urls")
+class AsyncViewsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserModel.objects.create_user(
+            "alice", "alice@example.com", "old-password"
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_views_are_async(self):
+        for name in (
+            "signup_view",
+            "login_view",
+            "logout_view",
+            "password_reset_view",
+            "password_reset_done_view",
+            "password_reset_confirm_view",
+            "password_reset_complete_view",
+            "password_change_view",
+            "password_change_done_view",
+        ):
+            with self.subTest(name=name):
+                view = getattr(async_views, name)
+                self.assertTrue(view.view_class.view_is_async)
+                # Django can't run async views in ATOMIC_REQUESTS.
+                self.assertIn("default", view._non_atomic_requests)
+
+    async def test_login(self):
+        response = await self.async_client.get(reverse("accounts:login"))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("no-cache", response["Cache-Control"])
+
+        response = await self.async_client.post(
+            reverse("accounts:login"),
+            {"username": "alice@example.com", "password": "wrong"},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context["form"].errors)
+
+        response = await self.async_client.post(
+            reverse("accounts:login"),
+            {"username": "alice@example.com", "password": "old-password"},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.url, settings.LOGIN_REDIRECT_URL)
+
+        # Authenticated users are redirected away from the login page.
+        response = await self.async_client.get(reverse("accounts:login"))
+        self.assertEqual(response.status_code, 302)
+
+        response = await self.async_client.post(reverse("accounts:logout"))
+        self.assertEqual(response.status_code, 200)
+
+    async def test_signup(self):
+        response = await self.async_client.post(
+            reverse("accounts:signup"),
+            {
+                "username": "bob",
+                "email": "bob@example.com",
+                "password1": "a-strong-password",
+                "password2": "a-strong-password",
+            },
+        )
+
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(await UserModel.objects.filter_by_username("bob").aexists())
+
+    async def test_password_change(self):
+        response = await self.async_client.get(reverse("accounts:password_change"))
+        self.assertEqual(response.status_code, 302)
+
+        await sync_to_async(self.async_client.force_login)(self.user)
+        data = {
+            "old_password": "wrong",
+            "new_password1": "a-new-password",
+            "new_password2": "a-new-password",
+        }
+        response = await self.async_client.post(
+            reverse("accounts:password_change"), data
+        )
+        self.assertEqual(list(response.context["form"].errors), ["old_password"])
+
+        data["old_password"] = "old-password"
+        response = await self.async_client.post(
+            reverse("accounts:password_change"), data
+        )
+        self.assertRedirects(
+            response,
+            reverse("accounts:password_change_done"),
+            fetch_redirect_response=False,
+        )
+        await self.user.arefresh_from_db()
+        self.assertTrue(self.user.check_password("a-new-password"))
+
+    async def test_password_change_upgrades_hash(self):
+        with self.settings(
+            PASSWORD_HASHERS=[
+                "project.accounts.tests.test_hashers.CheapPBKDF2PasswordHasher",
+                "django.contrib.auth.hashers.MD5PasswordHasher",
+            ]
+        ):
+            form = AsyncPasswordChangeForm(
+                self.user,
+                {
+                    "old_password": "old-password",
+                    "new_password1": "a-new-password",
+                    "new_password2": "another-password",
+                },
+            )
+            self.assertFalse(await form.ais_valid())
+        self.assertNotIn("old_password", form.errors)
+        await self.user.arefresh_from_db()
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$"))
+
+    async def test_password_reset(self):
+        with override_settings(EMAIL_DELIVERY="outbox"):
+            response = await self.async_client.post(
+                reverse("accounts:password_reset"), {"email": "alice@example.com"}
+            )
+        self.assertEqual(response.status_code, 302)
+        await sync_to_async(deliver_outbox)()
+        self.assertEqual(len(mail.outbox), 1)
+
+        confirm_url = next(
+            line.strip()
+            for line in mail.outbox[0].body.splitlines()
+            if "/password/reset/confirm/" in line
+        ).removeprefix("http://testserver")
+        response = await self.async_client.get(confirm_url)
+        self.assertEqual(response.status_code, 302)
+
+        set_password_url = response.url
+        response = await self.async_client.get(set_password_url)
+        self.assertTrue(response.context["validlink"])
+
+        response = await self.async_client.post(
+            set_password_url,
+            {"new_password1": "a-new-password", "new_password2": "a-new-password"},
+        )
+        self.assertRedirects(
+            response,
+            reverse("accounts:password_reset_complete"),
+            fetch_redirect_response=False,
+        )
+        await self.user.arefresh_from_db()
+        self.assertTrue(self.user.check_password("a-new-password"))
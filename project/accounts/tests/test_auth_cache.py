@@ -0,0 +1,96 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from project.accounts.backends import ModelBackend
+
+UserModel = get_user_model()
+
+
+@override_settings(AUTH_CACHE_TIMEOUT=300)
+class ModelBackendCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserModel.objects.create_user("alice", "alice@example.com", "pw")
+        cls.group = Group.objects.create(name="editors")
+        cls.perm = Permission.objects.get(codename="change_user")
+        cls.group.permissions.add(cls.perm)
+        cls.user.groups.add(cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.backend = ModelBackend()
+
+    def get_user(self):
+        return self.backend.get_user(self.user.pk)
+
+    def test_cached(self):
+        self.get_user()
+        with self.assertNumQueries(0):
+            user = self.get_user()
+            self.assertEqual(user, self.user)
+            self.assertTrue(user.has_perm("accounts.change_user"))
+            self.assertFalse(user.has_perm("accounts.delete_user"))
+
+    def test_request_queries(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse("accounts:password_change"))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("accounts:password_change"))
+        self.assertEqual(response.status_code, 200)
+        tables = " ".join(query["sql"] for query in queries)
+        self.assertNotIn('"accounts_user"', tables)
+        self.assertNotIn('"auth_', tables)
+
+    def test_user_saved(self):
+        self.get_user()
+        UserModel.objects.filter(pk=self.user.pk).update(first_name="Stale")
+        self.assertEqual(self.get_user().first_name, "")
+        self.user.first_name = "Alice"
+        self.user.save()
+        self.assertEqual(self.get_user().first_name, "Alice")
+
+    def test_user_deleted(self):
+        self.get_user()
+        self.user.delete()
+        self.assertIsNone(self.get_user())
+
+    def test_inactive_user(self):
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(self.get_user())
+
+    def test_user_groups_changed(self):
+        self.get_user()
+        self.user.groups.remove(self.group)
+        self.assertFalse(self.get_user().has_perm("accounts.change_user"))
+
+    def test_group_users_changed(self):
+        self.get_user()
+        self.group.user_set.clear()
+        self.assertFalse(self.get_user().has_perm("accounts.change_user"))
+
+    def test_user_permissions_changed(self):
+        self.get_user()
+        self.user.user_permissions.add(Permission.objects.get(codename="delete_user"))
+        self.assertTrue(self.get_user().has_perm("accounts.delete_user"))
+
+    def test_group_permissions_changed(self):
+        self.get_user()
+        self.group.permissions.remove(self.perm)
+        self.assertFalse(self.get_user().has_perm("accounts.change_user"))
+
+    def test_group_deleted(self):
+        self.get_user()
+        self.group.delete()
+        self.assertFalse(self.get_user().has_perm("accounts.change_user"))
+
+    @override_settings(AUTH_CACHE_TIMEOUT=0)
+    def test_disabled(self):
+        self.get_user()
+        with self.assertNumQueries(1):
+            self.get_user()
@@ -0,0 +1,99 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase
+
+from project.accounts.tokens import default_token_generator
+
+UserModel = get_user_model()
+
+
+class PasswordResetCampaignTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            UserModel.objects.create_user(f"user{i}", f"user{i}@example.com", "pw")
+            for i in range(5)
+        ]
+        UserModel.objects.create_user(
+            "inactive", "inactive@example.com", "pw", is_active=False
+        )
+        UserModel.objects.create_user("unusable", "unusable@example.com", None)
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.checkpoint = os.path.join(self.directory.name, "checkpoint.json")
+
+    def run_campaign(self, *args):
+        out = StringIO()
+        call_command(
+            "send_password_reset_campaign",
+            "--domain=example.com",
+            "--chunk-size=2",
+            *args,
+            stdout=out,
+        )
+        return out.getvalue()
+
+    def test_sends_to_active_users_with_usable_password(self):
+        self.run_campaign()
+
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            sorted(user.email for user in self.users),
+        )
+        message = mail.outbox[0]
+        user = UserModel.objects.get(email=message.to[0])
+        token = message.body.split("/")[-2]
+        self.assertTrue(default_token_generator.check_token(user, token))
+
+    def test_filter(self):
+        self.run_campaign("--filter=username=user1", "--filter=is_staff=False")
+
+        self.assertEqual([m.to for m in mail.outbox], [["user1@example.com"]])
+
+    def test_input_file(self):
+        path = os.path.join(self.directory.name, "emails.txt")
+        with open(path, "w") as file:
+            file.write("user1@example.com\n\nuser3@example.com\ninactive@example.com\n")
+
+        self.run_campaign(f"--input-file={path}")
+
+        self.assertEqual(
+            sorted(m.to[0] for m in mail.outbox),
+            ["user1@example.com", "user3@example.com"],
+        )
+
+    def test_resumes_from_checkpoint(self):
+        with open(self.checkpoint, "w") as file:
+            json.dump({"pk": self.users[2].pk, "sent": 3}, file)
+
+        self.run_campaign(f"--checkpoint={self.checkpoint}")
+
+        self.assertEqual(
+            [m.to[0] for m in mail.outbox],
+            [self.users[3].email, self.users[4].email],
+        )
+        with open(self.checkpoint) as file:
+            self.assertEqual(json.load(file), {"sent": 5, "done": True})
+
+        # A completed campaign isn't sent again.
+        self.run_campaign(f"--checkpoint={self.checkpoint}")
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_dry_run(self):
+        out = self.run_campaign("--dry-run", f"--checkpoint={self.checkpoint}")
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertIn("Would send 5 message(s)", out)
+        self.assertNotIn("Sent", out)
+        # The campaign can still be sent.
+        self.assertFalse(os.path.exists(self.checkpoint))
+        self.run_campaign(f"--checkpoint={self.checkpoint}")
+        self.assertEqual(len(mail.outbox), 5)
@@ -0,0 +1,123 @@
+import asyncio
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth import hashers as django_hashers
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from project.accounts import hashers
+from project.accounts.forms import AuthenticationForm
+
+ITERATIONS = 1000
+
+UserModel = get_user_model()
+
+
+class CheapPBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    iterations = ITERATIONS
+
+
+class CalibratedPBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    iterations = 2 * ITERATIONS
+
+
+class PooledPBKDF2PasswordHasherTests(SimpleTestCase):
+    def tearDown(self):
+        hashers.shutdown_executor()
+
+    def assert_compatible(self, hasher, django_hasher):
+        encoded = hasher.encode("password", "salt", ITERATIONS)
+
+        self.assertEqual(encoded, django_hasher.encode("password", "salt", ITERATIONS))
+        self.assertTrue(hasher.verify("password", encoded))
+        self.assertFalse(hasher.verify("wrong", encoded))
+        self.assertTrue(asyncio.run(hasher.averify("password", encoded)))
+        self.assertFalse(asyncio.run(hasher.averify("wrong", encoded)))
+
+    def test_in_thread(self):
+        self.assert_compatible(
+            hashers.PBKDF2PasswordHasher(), django_hashers.PBKDF2PasswordHasher()
+        )
+        self.assert_compatible(
+            hashers.PBKDF2SHA1PasswordHasher(),
+            django_hashers.PBKDF2SHA1PasswordHasher(),
+        )
+
+    @override_settings(PASSWORD_HASHING_POOL=True, PASSWORD_HASHING_POOL_SIZE=1)
+    def test_in_pool(self):
+        self.assert_compatible(
+            hashers.PBKDF2PasswordHasher(), django_hashers.PBKDF2PasswordHasher()
+        )
+        self.assertIsNotNone(hashers._executor)
+
+    @override_settings(
+        PASSWORD_HASHERS=[
+            "project.accounts.hashers.PBKDF2PasswordHasher",
+            "django.contrib.auth.hashers.MD5PasswordHasher",
+        ]
+    )
+    def test_acheck_password(self):
+        encoded = django_hashers.make_password("password", hasher="md5")
+        updated = []
+
+        self.assertFalse(asyncio.run(hashers.acheck_password("wrong", encoded)))
+        self.assertTrue(
+            asyncio.run(
+                hashers.acheck_password("password", encoded, setter=updated.append)
+            )
+        )
+        # The preferred hasher changed, the password is rehashed.
+        self.assertEqual(updated, ["password"])
+
+
+class CalibrationTests(TestCase):
+    @override_settings(
+        PASSWORD_HASHERS=[
+            "project.accounts.tests.test_hashers.CheapPBKDF2PasswordHasher",
+            "django.contrib.auth.hashers.MD5PasswordHasher",
+        ]
+    )
+    def test_calibrate_hashers(self):
+        stdout, stderr = StringIO(), StringIO()
+
+        call_command(
+            "calibrate_hashers",
+            "--target-ms=5",
+            "--samples=1",
+            stdout=stdout,
+            stderr=stderr,
+        )
+
+        namespace = {}
+        exec(stdout.getvalue(), namespace)
+        hasher = namespace["CalibratedCheapPBKDF2PasswordHasher"]
+        self.assertTrue(issubclass(hasher, CheapPBKDF2PasswordHasher))
+        # 5 ms is far below Django's default work factor.
+        self.assertEqual(
+            hasher.iterations, django_hashers.PBKDF2PasswordHasher.iterations
+        )
+        self.assertIn("below Django's default", stderr.getvalue())
+        self.assertIn("Skipping md5", stderr.getvalue())
+
+    def test_login_upgrades_password_hash(self):
+        with self.settings(
+            PASSWORD_HASHERS=[
+                "project.accounts.tests.test_hashers.CheapPBKDF2PasswordHasher"
+            ]
+        ):
+            user = UserModel.objects.create_user("alice", "alice@example.com", "pw")
+        self.assertEqual(user.password.split("$")[1], str(ITERATIONS))
+
+        with self.settings(
+            PASSWORD_HASHERS=[
+                "project.accounts.tests.test_hashers.CalibratedPBKDF2PasswordHasher"
+            ]
+        ):
+            form = AuthenticationForm(
+                data={"username": "alice@example.com", "password": "pw"}
+            )
+            self.assertTrue(form.is_valid())
+
+        user.refresh_from_db()
+        self.assertEqual(user.password.split("$")[1], str(2 * ITERATIONS))
@@ -0,0 +1,244 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from project.core.paginator import CURSOR_VAR, EstimatedCountPaginator
+
+UserModel = get_user_model()
+
+USERS = 250
+ORDERING = ("username", "email")
+
+
+def create_users():
+    UserModel.objects.bulk_create(
+        [
+            UserModel(
+                username=f"user{n:04}",
+                username_ci=f"user{n:04}",
+                email=f"user{n:04}@example.com",
+                email_ci=f"user{n:04}@example.com",
+                password="!",
+                is_staff=n % 2 == 0,
+            )
+            for n in range(USERS)
+        ]
+    )
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_users()
+
+    def get_paginator(self, queryset=None, **kwargs):
+        if queryset is None:
+            queryset = UserModel.objects.order_by(*ORDERING)
+        kwargs.setdefault("estimate_threshold", 100)
+        kwargs.setdefault("keyset_offset", 50)
+        return EstimatedCountPaginator(queryset, 20, keyset=ORDERING, **kwargs)
+
+    def analyze(self):
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def usernames(self, page):
+        return [user.username for user in page]
+
+    def test_exact_count_without_statistics(self):
+        paginator = self.get_paginator()
+        self.assertEqual(paginator.count, USERS)
+        self.assertFalse(paginator.estimated)
+
+    def test_estimated_count(self):
+        self.analyze()
+        UserModel.objects.filter(username__gte="user0200").delete()
+        paginator = self.get_paginator()
+        with self.assertNumQueries(2):
+            self.assertEqual(paginator.count, USERS)
+        self.assertTrue(paginator.estimated)
+        # Pages past the estimate aren't an error.
+        self.assertEqual(self.usernames(paginator.page(14)), [])
+        self.assertEqual(len(paginator.page(10)), 20)
+        # The estimated last page holds the last rows.
+        self.assertEqual(
+            self.usernames(paginator.page(13)), [f"user{n:04}" for n in range(190, 200)]
+        )
+
+    def test_estimate_below_threshold(self):
+        self.analyze()
+        paginator = self.get_paginator(estimate_threshold=USERS + 1)
+        self.assertEqual(paginator.count, USERS)
+        self.assertFalse(paginator.estimated)
+
+    def test_filtered_count(self):
+        # SQLite only estimates whole tables.
+        self.analyze()
+        paginator = self.get_paginator(
+            UserModel.objects.filter(is_staff=True).order_by(*ORDERING)
+        )
+        self.assertEqual(paginator.count, USERS // 2)
+        self.assertFalse(paginator.estimated)
+
+    def test_keyset_pages(self):
+        queryset = UserModel.objects.filter(is_staff=True).order_by(*ORDERING)
+        paginator = self.get_paginator(queryset)
+        expected = list(queryset.values_list("username", flat=True))
+        for number in paginator.page_range:
+            page = paginator.page(number)
+            self.assertEqual(
+                self.usernames(page), expected[(number - 1) * 20 : number * 20]
+            )
+        self.assertIn(">=", str(paginator.page(4).object_list.query))
+        self.assertNotIn(">=", str(paginator.page(2).object_list.query))
+
+    def test_cursor(self):
+        paginator = self.get_paginator()
+        page = paginator.page(3)
+        cursor = paginator.get_cursor(3, page.object_list)
+        self.assertIsNone(paginator.get_cursor(2, paginator.page(2).object_list))
+
+        paginator = self.get_paginator(cursor=cursor)
+        paginator.count
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                self.usernames(paginator.page(4)),
+                [f"user{n:04}" for n in range(60, 80)],
+            )
+        # The cursor is only used for the page after the one it was made for.
+        self.assertEqual(
+            self.usernames(paginator.page(5)), [f"user{n:04}" for n in range(80, 100)]
+        )
+        paginator = self.get_paginator(cursor="invalid")
+        self.assertEqual(
+            self.usernames(paginator.page(4)), [f"user{n:04}" for n in range(60, 80)]
+        )
+
+    def test_other_ordering(self):
+        paginator = self.get_paginator(UserModel.objects.order_by("-email"))
+        self.assertFalse(paginator.uses_keyset)
+        self.assertEqual(
+            self.usernames(paginator.page(4)),
+            [f"user{n:04}" for n in range(189, 169, -1)],
+        )
+
+    def test_previous_cursor(self):
+        paginator = self.get_paginator()
+        page = paginator.page(5)
+        self.assertIsNone(paginator.get_previous_cursor(4, paginator.page(4)))
+        cursor = paginator.get_previous_cursor(5, page.object_list)
+        paginator = self.get_paginator(cursor=cursor)
+        paginator.count
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(
+                self.usernames(paginator.page(4)),
+                [f"user{n:04}" for n in range(60, 80)],
+            )
+        # Read backward from the first row of page 5.
+        self.assertEqual(len(queries), 2)
+        self.assertIn("DESC LIMIT 1 OFFSET 20", queries[0]["sql"])
+
+    def test_last_page(self):
+        paginator = self.get_paginator()
+        paginator.count
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(
+                self.usernames(paginator.page(13)),
+                [f"user{n:04}" for n in range(240, 250)],
+            )
+        self.assertIn("DESC", queries[0]["sql"])
+        self.assertIn("LIMIT 1 OFFSET 10", queries[0]["sql"])
+
+    def test_unique_keyset(self):
+        # Ordering past the unique username is a no-op.
+        paginator = self.get_paginator()
+        self.assertEqual(paginator.keyset, ("username",))
+        self.assertTrue(paginator.uses_keyset)
+        paginator = self.get_paginator(UserModel.objects.order_by("username"))
+        self.assertTrue(paginator.uses_keyset)
+        paginator = EstimatedCountPaginator(
+            UserModel.objects.order_by("is_staff", "pk"),
+            20,
+            keyset=("is_staff", "pk", "username"),
+        )
+        self.assertEqual(paginator.keyset, ("is_staff", "pk"))
+
+    def test_seek_uses_index(self):
+        paginator = self.get_paginator()
+        paginator.count
+        with CaptureQueriesContext(connection) as queries:
+            paginator.get_key(6)
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + queries[0]["sql"])
+            plan = " ".join(row[-1] for row in cursor.fetchall())
+        self.assertIn("COVERING INDEX", plan)
+
+
+@override_settings(ESTIMATED_COUNT_THRESHOLD=100, KEYSET_PAGINATION_OFFSET=100)
+class UserChangeListTests(TestCase):
+    """The changelist shows 100 users per page."""
+
+    @classmethod
+    def setUpTestData(cls):
+        create_users()
+        cls.admin = UserModel.objects.create_superuser(
+            "zadmin", "zadmin@example.com", "pw"
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+        self.url = reverse("admin:accounts_user_changelist")
+
+    def get_changelist(self, query_string):
+        response = self.client.get(self.url + query_string)
+        self.assertEqual(response.status_code, 200)
+        return response.context["cl"]
+
+    def test_count(self):
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        changelist = self.get_changelist("")
+        self.assertEqual(changelist.result_count, USERS + 1)
+        self.assertTrue(changelist.paginator.estimated)
+        changelist = self.get_changelist("?is_staff__exact=1")
+        self.assertEqual(changelist.result_count, USERS // 2 + 1)
+        self.assertIsNone(changelist.full_result_count)
+
+    def test_cursor_links(self):
+        changelist = self.get_changelist("")
+        self.assertEqual(changelist.get_query_string({"p": 3}), "?p=3")
+        query_string = changelist.get_query_string({"p": 2})
+        self.assertIn(CURSOR_VAR, query_string)
+        # The cursor saves reading the key of the previous page.
+        with self.assertNumQueries(1):
+            changelist.paginator.cursor = changelist.next_page_cursor
+            changelist.paginator.page(2).object_list[0]
+        changelist = self.get_changelist(query_string)
+        self.assertEqual(changelist.result_list[0].username, "user0100")
+        # Other links drop the cursor.
+        self.assertEqual(changelist.get_query_string({"p": 1}), "?p=1")
+        self.assertNotIn(
+            CURSOR_VAR, changelist.get_query_string({"is_staff__exact": 1})
+        )
+
+        changelist = self.get_changelist(changelist.get_query_string({"p": 3}))
+        self.assertEqual(
+            [user.username for user in changelist.result_list],
+            [f"user{n:04}" for n in range(200, USERS)] + ["zadmin"],
+        )
+        # Back to the previous page.
+        query_string = changelist.get_query_string({"p": 2})
+        self.assertIn(CURSOR_VAR, query_string)
+        changelist = self.get_changelist(query_string)
+        self.assertEqual(changelist.result_list[0].username, "user0100")
+
+    def test_deep_page_without_cursor(self):
+        changelist = self.get_changelist("?p=2&is_staff__exact=1")
+        self.assertEqual(changelist.result_count, USERS // 2 + 1)
+        self.assertIn(">=", str(changelist.result_list.query))
+        self.assertEqual(
+            [user.username for user in changelist.result_list],
+            [f"user{n:04}" for n in range(200, USERS, 2)] + ["zadmin"],
+        )
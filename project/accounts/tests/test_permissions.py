@@ -0,0 +1,212 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.test import TestCase
+from django.urls import reverse
+
+UserModel = get_user_model()
+
+USERS = 10000
+GROUPS = 100
+PERMS = [
+    "accounts.add_user",
+    "accounts.change_user",
+    "accounts.delete_user",
+    "accounts.view_user",
+    "auth.view_group",
+]
+
+
+def get_permission(perm):
+    app_label, codename = perm.split(".")
+    return Permission.objects.get(content_type__app_label=app_label, codename=codename)
+
+
+class BulkPermissionTests(TestCase):
+    """
+    Users are in group n % GROUPS, except every third one. Group g has
+    PERMS[g % 4], every seventh user has PERMS[4] directly, and some are
+    superusers or inactive.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        permissions = [get_permission(perm) for perm in PERMS]
+        groups = Group.objects.bulk_create(
+            [Group(name=f"group{g}") for g in range(GROUPS)]
+        )
+        Group.permissions.through.objects.bulk_create(
+            [
+                Group.permissions.through(group=group, permission=permissions[g % 4])
+                for g, group in enumerate(groups)
+            ]
+        )
+        users = UserModel.objects.bulk_create(
+            [
+                UserModel(
+                    username=f"user{n}",
+                    username_ci=f"user{n}",
+                    email=f"user{n}@example.com",
+                    email_ci=f"user{n}@example.com",
+                    password="!",
+                    is_superuser=n % 1000 == 1,
+                    is_active=n % 500 != 2,
+                )
+                for n in range(USERS)
+            ]
+        )
+        UserModel.groups.through.objects.bulk_create(
+            [
+                UserModel.groups.through(user=user, group=groups[n % GROUPS])
+                for n, user in enumerate(users)
+                if n % 3
+            ]
+        )
+        UserModel.user_permissions.through.objects.bulk_create(
+            [
+                UserModel.user_permissions.through(user=user, permission=permissions[4])
+                for n, user in enumerate(users)
+                if n % 7 == 0
+            ]
+        )
+        cls.expected = {}
+        for n, user in enumerate(users):
+            perms = set()
+            if user.is_active and user.is_superuser:
+                perms = set(PERMS)
+            elif user.is_active:
+                if n % 3:
+                    perms.add(PERMS[n % GROUPS % 4])
+                if n % 7 == 0:
+                    perms.add(PERMS[4])
+            cls.expected[user.pk] = perms
+        cls.users = users
+
+    def expected_with(self, *perms, require_all=False):
+        match = all if require_all else any
+        return {
+            pk
+            for pk, granted in self.expected.items()
+            if match(perm in granted for perm in perms)
+        }
+
+    def test_with_perms(self):
+        with self.assertNumQueries(1):
+            users = set(
+                UserModel.objects.with_perms(
+                    ["accounts.add_user", "auth.view_group"]
+                ).values_list("pk", flat=True)
+            )
+        self.assertEqual(
+            users, self.expected_with("accounts.add_user", "auth.view_group")
+        )
+
+    def test_with_perms_require_all(self):
+        with self.assertNumQueries(1):
+            users = set(
+                UserModel.objects.with_perms(
+                    ["accounts.change_user", "auth.view_group"], require_all=True
+                ).values_list("pk", flat=True)
+            )
+        self.assertEqual(
+            users,
+            self.expected_with(
+                "accounts.change_user", "auth.view_group", require_all=True
+            ),
+        )
+
+    def test_with_perms_without_superusers(self):
+        users = UserModel.objects.with_perms(
+            ["accounts.delete_user"], include_superusers=False
+        )
+        superusers = {user.pk for user in self.users if user.is_superuser}
+        self.assertEqual(
+            set(users.values_list("pk", flat=True)),
+            self.expected_with("accounts.delete_user") - superusers,
+        )
+
+    def test_with_perms_inactive(self):
+        users = UserModel.objects.with_perms(["auth.view_group"], is_active=False)
+        self.assertTrue(users.exists())
+        self.assertFalse(users.filter(is_active=True).exists())
+
+    def test_with_perm(self):
+        # The configured backend is used without naming it.
+        users = UserModel.objects.with_perm("auth.view_group")
+        self.assertEqual(
+            set(users.values_list("pk", flat=True)),
+            self.expected_with("auth.view_group"),
+        )
+
+    def test_with_perms_obj(self):
+        group = Group.objects.first()
+        superusers = {
+            user.pk for user in self.users if user.is_active and user.is_superuser
+        }
+        with self.assertNumQueries(1):
+            users = set(
+                UserModel.objects.with_perms(
+                    ["auth.view_group"], obj=group
+                ).values_list("pk", flat=True)
+            )
+        self.assertEqual(users, superusers)
+        for user in UserModel.objects.filter(pk__in=[1, 2, 8]):
+            self.assertEqual(
+                user.pk in users, user.has_perm("auth.view_group", obj=group)
+            )
+        self.assertFalse(
+            UserModel.objects.with_perms(
+                ["auth.view_group"], obj=group, include_superusers=False
+            ).exists()
+        )
+
+    def test_with_perms_invalid(self):
+        self.assertFalse(UserModel.objects.with_perms([]).exists())
+        with self.assertRaises(ValueError):
+            UserModel.objects.with_perms(["add_user"])
+
+    def test_perms_by_user(self):
+        with self.assertNumQueries(4):
+            perms = UserModel.objects.get_perms_by_user(
+                UserModel.objects.all(), perms=PERMS
+            )
+        self.assertEqual(perms, self.expected)
+
+    def test_perms_by_user_list(self):
+        users = self.users[:30]
+        perms = UserModel.objects.get_perms_by_user(users)
+        for user in users:
+            user = UserModel.objects.get(pk=user.pk)
+            self.assertEqual(perms[user.pk], user.get_all_permissions())
+
+    def test_perms_by_user_subset(self):
+        users = [user for user in self.users[:100] if not user.is_superuser]
+        with self.assertNumQueries(3):
+            perms = UserModel.objects.get_perms_by_user(
+                users, perms=["accounts.add_user"]
+            )
+        self.assertEqual(
+            {pk for pk, granted in perms.items() if granted},
+            self.expected_with("accounts.add_user") & {user.pk for user in users},
+        )
+
+    def test_perms_by_user_obj(self):
+        users = self.users[:1002]
+        group = Group.objects.first()
+        with self.assertNumQueries(2):
+            perms = UserModel.objects.get_perms_by_user(users, perms=PERMS, obj=group)
+        self.assertEqual(
+            {pk for pk, granted in perms.items() if granted},
+            {user.pk for user in users if user.is_active and user.is_superuser},
+        )
+        self.assertEqual(perms[users[1].pk], set(PERMS))
+
+    def test_admin_filter(self):
+        admin = UserModel.objects.create_superuser("admin", "admin@example.com", "pw")
+        self.client.force_login(admin)
+        response = self.client.get(
+            reverse("admin:accounts_user_changelist"), {"perm": "accounts.add_user"}
+        )
+        self.assertEqual(
+            response.context["cl"].result_count,
+            len(self.expected_with("accounts.add_user")) + 1,
+        )
@@ -0,0 +1,313 @@
+import datetime
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.admin import site
+from django.contrib.auth import (
+    BACKEND_SESSION_KEY,
+    HASH_SESSION_KEY,
+    SESSION_KEY,
+    get_user_model,
+)
+from django.contrib.sessions.backends.db import SessionStore as DjangoSessionStore
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from project.accounts.admin import UserSessionInline
+from project.accounts.models import UserSession
+from project.accounts.sessions import get_session_store_class
+from project.accounts.sessions.cached_db import SessionStore as CachedSessionStore
+from project.accounts.sessions.db import SessionStore
+
+UserModel = get_user_model()
+
+
+class UserSessionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserModel.objects.create_user("alice", "alice@example.com", "pw")
+        cls.other = UserModel.objects.create_user("bob", "bob@example.com", "pw")
+
+    def setUp(self):
+        cache.clear()
+
+    def login(self, user, user_agent="Firefox", ip_address="192.0.2.1"):
+        client = Client(HTTP_USER_AGENT=user_agent, REMOTE_ADDR=ip_address)
+        response = client.post(
+            reverse("accounts:login"),
+            {"username": user.email, "password": "pw"},
+        )
+        self.assertEqual(response.status_code, 302)
+        return client
+
+    def test_device_recorded(self):
+        client = self.login(self.user)
+        session = UserSession.objects.get(session_key=client.session.session_key)
+        self.assertEqual(session.user, self.user)
+        self.assertEqual(session.user_agent, "Firefox")
+        self.assertEqual(session.ip_address, "192.0.2.1")
+        created_at = session.created_at
+        # Saving the session again keeps the login time.
+        session_store = client.session
+        session_store["key"] = "value"
+        session_store.save()
+        session.refresh_from_db()
+        self.assertEqual(session.created_at, created_at)
+
+    def test_invalid_ip_address(self):
+        client = self.login(self.user, ip_address="unknown")
+        session = UserSession.objects.get(session_key=client.session.session_key)
+        self.assertIsNone(session.ip_address)
+
+    def test_anonymous_session(self):
+        session = SessionStore()
+        session["key"] = "value"
+        session.create()
+        self.assertIsNone(UserSession.objects.get(pk=session.session_key).user)
+
+    def test_list_sessions(self):
+        self.login(self.user, user_agent="Firefox")
+        self.login(self.user, user_agent="Safari")
+        self.login(self.other)
+        with self.assertNumQueries(1):
+            sessions = list(SessionStore.get_user_sessions(self.user.pk))
+        self.assertEqual(
+            [session.user_agent for session in sessions], ["Safari", "Firefox"]
+        )
+
+    def test_log_out_everywhere(self):
+        first, second = self.login(self.user), self.login(self.user)
+        other = self.login(self.other)
+        # The cached engine selects the keys to remove from the cache first.
+        with self.assertNumQueries(2):
+            count = get_session_store_class().delete_user_sessions(
+                [self.user.pk], keep=second.session.session_key
+            )
+        self.assertEqual(count, 1)
+        profile = reverse("accounts:password_change")
+        self.assertEqual(first.get(profile).status_code, 302)
+        self.assertEqual(second.get(profile).status_code, 200)
+        self.assertEqual(other.get(profile).status_code, 200)
+
+    def test_lookups_use_index(self):
+        plan = SessionStore.get_user_sessions(self.user.pk).explain()
+        self.assertIn("INDEX", plan.upper())
+
+    def test_admin_action(self):
+        self.login(self.user)
+        admin = UserModel.objects.create_superuser("admin", "admin@example.com", "pw")
+        client = self.login(admin)
+        response = client.post(
+            reverse("admin:accounts_user_changelist"),
+            {
+                "action": "log_out_everywhere",
+                "_selected_action": [self.user.pk, admin.pk],
+            },
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(UserSession.objects.filter(user=self.user).exists())
+        # The admin's own session is kept.
+        self.assertEqual(UserSession.objects.filter(user=admin).count(), 1)
+
+    def test_password_change(self):
+        self.login(self.user)
+        second = self.login(self.user)
+        response = second.post(
+            reverse("accounts:password_change"),
+            {
+                "old_password": "pw",
+                "new_password1": "a new password 123",
+                "new_password2": "a new password 123",
+            },
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            list(UserSession.objects.filter(user=self.user)),
+            [UserSession.objects.get(session_key=second.session.session_key)],
+        )
+
+    def test_admin_inline_delete(self):
+        client = self.login(self.user)
+        session_key = client.session.session_key
+        admin = UserModel.objects.create_superuser("admin", "admin@example.com", "pw")
+        request = RequestFactory().post("/")
+        request.user = admin
+        inline = UserSessionInline(UserModel, site)
+        formset = inline.get_formset(request, self.user)(
+            {
+                "sessions-TOTAL_FORMS": "1",
+                "sessions-INITIAL_FORMS": "1",
+                "sessions-0-session_key": session_key,
+                "sessions-0-user": self.user.pk,
+                "sessions-0-DELETE": "on",
+            },
+            instance=self.user,
+            prefix="sessions",
+        )
+        self.assertTrue(formset.is_valid(), formset.errors)
+        formset.save()
+        self.assertFalse(UserSession.objects.filter(session_key=session_key).exists())
+        # Not loaded from the cache either.
+        self.assertNotIn(SESSION_KEY, get_session_store_class()(session_key).load())
+        response = client.get(reverse("accounts:password_change"))
+        self.assertEqual(response.status_code, 302)
+
+    def test_admin_change_page(self):
+        self.login(self.user, user_agent="Safari")
+        admin = UserModel.objects.create_superuser("admin", "admin@example.com", "pw")
+        response = self.login(admin).get(
+            reverse("admin:accounts_user_change", args=[self.user.pk])
+        )
+        self.assertContains(response, "Safari")
+
+
+class CachedSessionStoreTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        session = CachedSessionStore()
+        session["key"] = "value"
+        session.save()
+        self.session_key = session.session_key
+
+    def test_load_from_cache(self):
+        session = CachedSessionStore(self.session_key)
+        with self.assertNumQueries(0):
+            self.assertEqual(session["key"], "value")
+
+    def test_load_from_database(self):
+        cache.clear()
+        session = CachedSessionStore(self.session_key)
+        with self.assertNumQueries(1):
+            self.assertEqual(session["key"], "value")
+        with self.assertNumQueries(0):
+            self.assertEqual(CachedSessionStore(self.session_key)["key"], "value")
+
+    def test_unchanged_save_skipped(self):
+        session = CachedSessionStore(self.session_key)
+        session["key"] = "value"
+        self.assertTrue(session.modified)
+        with self.assertNumQueries(0):
+            session.save()
+
+    def test_changed_save(self):
+        session = CachedSessionStore(self.session_key)
+        session["key"] = "other"
+        with CaptureQueriesContext(connection) as queries:
+            session.save()
+        self.assertTrue(any("UPDATE" in query["sql"] for query in queries))
+        cache.clear()
+        self.assertEqual(CachedSessionStore(self.session_key)["key"], "other")
+
+    @override_settings(SESSION_SAVE_EVERY_REQUEST=True)
+    def test_save_every_request(self):
+        session = CachedSessionStore(self.session_key)
+        session["key"] = "value"
+        with CaptureQueriesContext(connection) as queries:
+            session.save()
+        self.assertTrue(any("UPDATE" in query["sql"] for query in queries))
+
+    def test_cycle_key(self):
+        session = CachedSessionStore(self.session_key)
+        session.cycle_key()
+        self.assertNotEqual(session.session_key, self.session_key)
+        cache.clear()
+        self.assertEqual(CachedSessionStore(session.session_key)["key"], "value")
+
+
+class PurgeSessionsTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        UserSession.objects.bulk_create(
+            [
+                UserSession(
+                    session_key=f"expired{i}",
+                    session_data="",
+                    expire_date=now - datetime.timedelta(days=1),
+                )
+                for i in range(25)
+            ]
+            + [
+                UserSession(
+                    session_key="valid",
+                    session_data="",
+                    expire_date=now + datetime.timedelta(days=1),
+                )
+            ]
+        )
+
+    def purge(self, *args):
+        out = StringIO()
+        with mock.patch("time.sleep") as sleep:
+            call_command("purge_sessions", "--batch-size=10", *args, stdout=out)
+        return out.getvalue(), sleep
+
+    def test_purge(self):
+        output, sleep = self.purge()
+        self.assertIn("Deleted 25 expired session(s) in 3 batch(es).", output)
+        self.assertEqual(sleep.call_count, 2)
+        self.assertEqual(
+            list(UserSession.objects.values_list("session_key", flat=True)), ["valid"]
+        )
+
+    def test_max_batches(self):
+        output, _ = self.purge("--max-batches=1")
+        self.assertIn("Deleted 10 expired session(s) in 1 batch(es).", output)
+        self.assertEqual(UserSession.objects.count(), 16)
+
+
+class ImportSessionsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserModel.objects.create_user("alice", "alice@example.com", "pw")
+
+    def create_session(self, backend, **kwargs):
+        session = DjangoSessionStore()
+        session.update(
+            {
+                SESSION_KEY: str(self.user.pk),
+                BACKEND_SESSION_KEY: backend,
+                HASH_SESSION_KEY: self.user.get_session_auth_hash(),
+            }
+        )
+        session.set_expiry(kwargs.get("expiry"))
+        session.create()
+        return session.session_key
+
+    def test_import(self):
+        keys = [
+            self.create_session("django.contrib.auth.backends.ModelBackend"),
+            self.create_session("project.accounts.backends.ModelBackend"),
+        ]
+        expired = self.create_session(
+            "project.accounts.backends.ModelBackend", expiry=-1
+        )
+        Session.objects.create(
+            session_key="forged",
+            session_data="invalid",
+            expire_date=timezone.now() + datetime.timedelta(days=1),
+        )
+        out = StringIO()
+        call_command("import_sessions", "--batch-size=2", "--delete", stdout=out)
+        self.assertIn("Imported 2 session(s), skipped 1.", out.getvalue())
+        # Expired sessions are left to clearsessions.
+        self.assertEqual(
+            list(Session.objects.values_list("session_key", flat=True)), [expired]
+        )
+        for key in keys:
+            session = UserSession.objects.get(session_key=key)
+            self.assertEqual(session.user, self.user)
+            client = Client()
+            client.cookies[settings.SESSION_COOKIE_NAME] = key
+            response = client.get(reverse("accounts:password_change"))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                client.session[BACKEND_SESSION_KEY],
+                "project.accounts.backends.ModelBackend",
+            )
@@ -0,0 +1,273 @@
+import json
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import (
+    RequestFactory,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.urls import reverse
+
+from project.accounts.forms import AsyncAuthenticationForm, AuthenticationForm
+from project.accounts.throttling import (
+    LoginThrottle,
+    SlidingWindowLimiter,
+    get_client_ip,
+    get_login_metrics,
+    get_password_reset_metrics,
+)
+
+UserModel = get_user_model()
+
+
+class SlidingWindowLimiterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.limiter = SlidingWindowLimiter("test", limit=3, window=60)
+
+    def test_limit(self):
+        for _ in range(2):
+            self.limiter.hit("a", now=600)
+        self.assertFalse(self.limiter.is_limited("a", now=600))
+        self.limiter.hit("a", now=600)
+        self.assertTrue(self.limiter.is_limited("a", now=600))
+        self.assertFalse(self.limiter.is_limited("b", now=600))
+
+    def test_previous_window_is_weighted(self):
+        for _ in range(3):
+            self.limiter.hit("a", now=650)
+        # A quarter of the next window elapsed, 3/4 of the hits still count.
+        self.assertEqual(self.limiter.count("a", now=675), 2.25)
+        self.assertFalse(self.limiter.is_limited("a", now=675))
+        self.assertEqual(self.limiter.count("a", now=720), 0)
+        self.assertEqual(self.limiter.hit("a", now=675), 3.25)
+        self.limiter.undo("a", now=675)
+        self.assertEqual(self.limiter.count("a", now=675), 2.25)
+
+    def test_reset(self):
+        for _ in range(3):
+            self.limiter.hit("a", now=600)
+        self.limiter.reset("a", now=600)
+        self.assertEqual(self.limiter.count("a", now=600), 0)
+
+    def test_zero_limit_disables(self):
+        limiter = SlidingWindowLimiter("test", limit=0, window=60)
+        limiter.hit("a")
+        self.assertFalse(limiter.is_limited("a"))
+
+
+class ClientIPTests(TestCase):
+    def get_client_ip(self, **meta):
+        return get_client_ip(RequestFactory().get("/", **meta))
+
+    def test_remote_addr(self):
+        self.assertEqual(self.get_client_ip(REMOTE_ADDR="10.0.0.1"), "10.0.0.1")
+
+    @override_settings(THROTTLE_IP_META_KEY="HTTP_X_FORWARDED_FOR")
+    def test_forwarded_for(self):
+        # The client sent "1.1.1.1, 2.2.2.2", the proxies appended the others.
+        meta = {"HTTP_X_FORWARDED_FOR": "1.1.1.1, 2.2.2.2, 3.3.3.3, 10.0.0.1"}
+        self.assertEqual(self.get_client_ip(**meta), "10.0.0.1")
+        with self.settings(THROTTLE_TRUSTED_PROXY_COUNT=2):
+            self.assertEqual(self.get_client_ip(**meta), "3.3.3.3")
+        with self.settings(THROTTLE_TRUSTED_PROXY_COUNT=10):
+            self.assertEqual(self.get_client_ip(**meta), "1.1.1.1")
+        self.assertIsNone(self.get_client_ip())
+
+
+@override_settings(
+    LOGIN_THROTTLE_USERNAME_LIMIT=3,
+    LOGIN_THROTTLE_IP_LIMIT=5,
+    LOGIN_THROTTLE_WINDOW=60,
+)
+class LoginThrottleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserModel.objects.create_user(
+            "alice", "alice@example.com", "password"
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def login(self, username="alice@example.com", password="wrong", ip="10.0.0.1"):
+        request = RequestFactory().post("/", REMOTE_ADDR=ip)
+        form = AuthenticationForm(
+            request, data={"username": username, "password": password}
+        )
+        form.is_valid()
+        return form
+
+    def test_throttled_per_username(self):
+        for _ in range(3):
+            form = self.login()
+            self.assertTrue(form.has_error("__all__", "invalid_login"))
+
+        with mock.patch("project.accounts.forms.authenticate") as authenticate:
+            with self.assertNumQueries(0):
+                # Usernames are compared case-insensitively.
+                form = self.login("ALICE@example.com", "password", ip="10.0.0.2")
+        authenticate.assert_not_called()
+        self.assertTrue(form.has_error("__all__", "too_many_attempts"))
+
+    def test_throttled_per_ip(self):
+        for i in range(5):
+            self.login(f"user{i}@example.com")
+        form = self.login("alice@example.com", "password")
+        self.assertTrue(form.has_error("__all__", "too_many_attempts"))
+        form = self.login("alice@example.com", "password", ip="10.0.0.2")
+        self.assertTrue(form.is_valid())
+
+    def test_success_resets_username_limit(self):
+        for _ in range(2):
+            self.login()
+        self.assertTrue(self.login(password="password").is_valid())
+        for _ in range(2):
+            self.login()
+        self.assertTrue(self.login(password="password").is_valid())
+
+    def test_concurrent_attempts(self):
+        request = RequestFactory().post("/", REMOTE_ADDR="10.0.0.1")
+        # Attempts are counted before authenticating, not when it's done.
+        throttles = [LoginThrottle(request, "alice@example.com") for _ in range(5)]
+        self.assertEqual(
+            [throttle.allow() for throttle in throttles],
+            [True, True, True, False, False],
+        )
+
+    def test_successful_logins_not_counted(self):
+        for _ in range(6):
+            self.assertTrue(self.login(password="password").is_valid())
+
+    def test_metrics(self):
+        for _ in range(5):
+            self.login()
+        metrics = get_login_metrics()
+        self.assertEqual(metrics["throttled"], 2)
+        self.assertEqual(metrics["authenticated"], 3)
+        self.assertGreater(metrics["saved_seconds"], 0)
+
+        stdout = StringIO()
+        call_command("throttle_stats", "--json", stdout=stdout)
+        self.assertEqual(json.loads(stdout.getvalue())["login"], metrics)
+
+    async def test_async_form(self):
+        request = RequestFactory().post("/", REMOTE_ADDR="10.0.0.1")
+        data = {"username": "alice@example.com", "password": "wrong"}
+        for _ in range(3):
+            self.assertFalse(await AsyncAuthenticationForm(request, data).ais_valid())
+        data["password"] = "password"
+        form = AsyncAuthenticationForm(request, data)
+        with mock.patch("project.accounts.forms.aauthenticate") as aauthenticate:
+            self.assertFalse(await form.ais_valid())
+        aauthenticate.assert_not_called()
+        self.assertTrue(form.has_error("__all__", "too_many_attempts"))
+
+    def test_login_view(self):
+        data = {"username": "alice@example.com", "password": "wrong"}
+        for _ in range(3):
+            self.client.post(reverse("accounts:login"), data)
+        data["password"] = "password"
+        response = self.client.post(reverse("accounts:login"), data)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(
+            response.context["form"].has_error("__all__", "too_many_attempts")
+        )
+
+
+@override_settings(
+    EMAIL_DELIVERY="sync",
+    PASSWORD_RESET_THROTTLE_EMAIL_LIMIT=2,
+    PASSWORD_RESET_THROTTLE_IP_LIMIT=3,
+    PASSWORD_RESET_DEDUPE_WINDOW=60,
+)
+class PasswordResetThrottleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for name in ("alice", "bob"):
+            UserModel.objects.create_user(name, f"{name}@example.com", "password")
+
+    def setUp(self):
+        cache.clear()
+
+    def reset(self, email, ip="10.0.0.1"):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("accounts:password_reset"), {"email": email}, REMOTE_ADDR=ip
+            )
+        self.assertRedirects(
+            response,
+            reverse("accounts:password_reset_done"),
+            fetch_redirect_response=False,
+        )
+
+    def test_repeated_requests_are_deduplicated(self):
+        self.reset("alice@example.com")
+        with self.assertNumQueries(0):
+            self.reset("ALICE@example.com", ip="10.0.0.2")
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(
+            get_password_reset_metrics(),
+            {"sent": 1, "deduplicated": 1, "throttled": 0},
+        )
+
+    def test_throttled_per_email(self):
+        with override_settings(PASSWORD_RESET_DEDUPE_WINDOW=0):
+            for _ in range(3):
+                self.reset("alice@example.com")
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(get_password_reset_metrics()["throttled"], 1)
+
+    def test_throttled_per_ip(self):
+        for email in ("alice@example.com", "bob@example.com", "eve@example.com"):
+            self.reset(email)
+        self.reset("carol@example.com")
+        self.reset("bob@example.com", ip="10.0.0.2")
+        self.assertEqual(get_password_reset_metrics()["throttled"], 1)
+        self.assertEqual(len(mail.outbox), 2)
+
+
+@override_settings(EMAIL_DELIVERY="sync", PASSWORD_RESET_DEDUPE_WINDOW=60)
+class PasswordResetCommitTests(TransactionTestCase):
+    """
+    "sync" emails are sent when the request transaction commits, which only
+    happens outside of TestCase.
+    """
+
+    def setUp(self):
+        cache.clear()
+        UserModel.objects.create_user("alice", "alice@example.com", "password")
+        # As in production, the view runs in a transaction.
+        atomic_requests = connection.settings_dict["ATOMIC_REQUESTS"]
+        connection.settings_dict["ATOMIC_REQUESTS"] = True
+        self.addCleanup(
+            connection.settings_dict.__setitem__, "ATOMIC_REQUESTS", atomic_requests
+        )
+
+    def test_failed_request_can_be_retried(self):
+        url = reverse("accounts:password_reset")
+        with mock.patch(
+            "django.core.mail.EmailMessage.send", side_effect=ConnectionError
+        ):
+            with self.assertRaises(ConnectionError):
+                self.client.post(url, {"email": "alice@example.com"})
+        self.client.post(url, {"email": "alice@example.com"})
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_rolled_back_request_sends_nothing(self):
+        with mock.patch(
+            "project.accounts.views.PasswordResetView.get_success_url",
+            side_effect=RuntimeError,
+        ):
+            with self.assertRaises(RuntimeError):
+                self.client.post(
+                    reverse("accounts:password_reset"), {"email": "alice@example.com"}
+                )
+        self.assertEqual(len(mail.outbox), 0)
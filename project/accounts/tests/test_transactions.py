@@ -0,0 +1,63 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+UserModel = get_user_model()
+
+
+class AtomicRequestsTests(TestCase):
+    """
+    Count the transactions opened by each page with ATOMIC_REQUESTS enabled,
+    as in production. Inside a test case they are savepoints.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserModel.objects.create_user(
+            "alice", "alice@example.com", "password"
+        )
+
+    def setUp(self):
+        atomic_requests = connection.settings_dict["ATOMIC_REQUESTS"]
+        connection.settings_dict["ATOMIC_REQUESTS"] = True
+        self.addCleanup(
+            connection.settings_dict.__setitem__, "ATOMIC_REQUESTS", atomic_requests
+        )
+
+    def assertTransactions(self, expected, method, url, **kwargs):
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(url, **kwargs)
+        self.assertLess(response.status_code, 400)
+        savepoints = [q for q in queries if q["sql"].startswith("SAVEPOINT")]
+        self.assertEqual(len(savepoints), expected, url)
+
+    def test_anonymous_pages(self):
+        for name, expected in [
+            ("home", 0),
+            ("accounts:signup", 1),
+            ("accounts:login", 1),
+            ("accounts:password_reset", 1),
+            ("accounts:password_reset_done", 0),
+            ("accounts:password_reset_complete", 0),
+        ]:
+            with self.subTest(name=name):
+                self.assertTransactions(expected, "get", reverse(name))
+
+        url = reverse(
+            "accounts:password_reset_confirm",
+            kwargs={"uidb64": "MQ", "token": "invalid-token"},
+        )
+        self.assertTransactions(1, "get", url)
+
+    def test_authenticated_pages(self):
+        self.client.force_login(self.user)
+        for name, expected in [
+            ("home", 0),
+            ("accounts:password_change", 1),
+            ("accounts:password_change_done", 0),
+        ]:
+            with self.subTest(name=name):
+                self.assertTransactions(expected, "get", reverse(name))
+        self.assertTransactions(1, "post", reverse("accounts:logout"))
@@ -0,0 +1,130 @@
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError
+from django.test import TestCase
+from django.urls import reverse
+
+from project.accounts.forms import UserChangeForm, UserCreationForm
+from project.accounts.utils import get_users
+
+UserModel = get_user_model()
+
+
+class CaseInsensitiveLookupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserModel.objects.create_user("Alice", "Alice@Example.com", "pw")
+
+    def test_save_stores_casefolded_values(self):
+        self.assertEqual(self.user.username_ci, "alice")
+        self.assertEqual(self.user.email_ci, "alice@example.com")
+
+        self.user.username = "ALICE2"
+        self.user.save(update_fields=["username"])
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.username_ci, "alice2")
+
+    def test_case_insensitive_uniqueness(self):
+        with self.assertRaises(IntegrityError):
+            UserModel(username="ALICE", email="other@example.com").save()
+
+    def test_manager_lookups(self):
+        self.assertEqual(UserModel.objects.filter_by_username("aLiCe").get(), self.user)
+        # NFKC normalization, U+212A KELVIN SIGN is the letter K.
+        user = UserModel.objects.create_user("kelvin", "Kelvin@example.com", "pw")
+        self.assertEqual(
+            UserModel.objects.filter_by_email("\u212aELVIN@example.com").get(), user
+        )
+
+    def test_get_users(self):
+        self.assertEqual(list(get_users("ALICE@example.COM")), [self.user])
+
+    def test_creation_form_rejects_case_variants(self):
+        form = UserCreationForm(
+            data={
+                "username": "ALICE",
+                "email": "ALICE@EXAMPLE.COM",
+                "password1": "a-strong-password",
+                "password2": "a-strong-password",
+            }
+        )
+
+        self.assertFalse(form.is_valid())
+        self.assertIn("username", form.errors)
+        self.assertIn("email", form.errors)
+
+
+class ChangeUniquenessTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        UserModel.objects.create_user("alice", "alice@example.com", "pw")
+        cls.user = UserModel.objects.create_user("bob", "bob@example.com", "pw")
+
+    def get_form(self, **data):
+        initial = UserChangeForm(instance=self.user).initial
+        return UserChangeForm(instance=self.user, data={**initial, **data})
+
+    def test_change_form_rejects_case_variants(self):
+        form = self.get_form(username="Alice", email="ALICE@example.com")
+
+        self.assertFalse(form.is_valid())
+        self.assertEqual(
+            form.errors["username"], ["A user with that username already exists."]
+        )
+        self.assertEqual(form.errors["email"], ["Email address is already registered."])
+
+    def test_change_form_accepts_own_case_variant(self):
+        form = self.get_form(username="BOB", email="Bob@example.com")
+
+        self.assertTrue(form.is_valid(), form.errors)
+        form.save()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.username_ci, "bob")
+
+
+class SignUpUniquenessTests(TestCase):
+    data = {
+        "username": "bob",
+        "email": "bob@example.com",
+        "password1": "a-strong-password",
+        "password2": "a-strong-password",
+    }
+
+    def test_availability_is_checked_in_one_query(self):
+        form = UserCreationForm(data=self.data)
+
+        with self.assertNumQueries(1):
+            self.assertTrue(form.is_valid())
+
+    def test_unavailable_fields(self):
+        UserModel.objects.create_user("Bob", "other@example.com", "pw")
+        UserModel.objects.create_user("other", "BOB@example.com", "pw")
+
+        self.assertEqual(
+            UserModel.objects.unavailable_fields("BOB", "bob@EXAMPLE.com"),
+            {"username", "email"},
+        )
+        self.assertEqual(
+            UserModel.objects.unavailable_fields("carol", "carol@example.com"), set()
+        )
+
+    def test_concurrent_signup_maps_to_form_errors(self):
+        form = UserCreationForm(data=self.data)
+        self.assertTrue(form.is_valid())
+        # Another request takes the email between validation and save.
+        UserModel.objects.create_user("someone", "BOB@example.com", "pw")
+
+        with self.assertRaises(ValidationError):
+            form.save()
+
+        self.assertEqual(list(form.errors), ["email"])
+        self.assertEqual(UserModel.objects.filter_by_username("bob").count(), 0)
+
+    def test_signup_view(self):
+        response = self.client.post(reverse("accounts:signup"), self.data)
+
+        self.assertRedirects(
+            response, reverse("accounts:login"), fetch_redirect_response=False
+        )
+        self.assertTrue(UserModel.objects.filter_by_username("bob").exists())
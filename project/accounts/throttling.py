@@ -0,0 +1,277 @@
+"""
+Cache-backed rate limiting of the account views.
+
+Limits are sliding windows: the hits of the previous fixed window are
+weighted by how much of it still overlaps the sliding window, and added to
+the hits of the current one. That needs two counters per key, and works with
+any cache backend supporting add() and incr().
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .managers import casefold
+
+
+def get_cache():
+    return caches[settings.THROTTLE_CACHE]
+
+
+def get_client_ip(request):
+    """
+    Return the client IP address read from THROTTLE_IP_META_KEY. When it's a
+    list, as in X-Forwarded-For, that's the entry appended by the outermost
+    of the THROTTLE_TRUSTED_PROXY_COUNT trusted proxies: the client can forge
+    the ones before it.
+    """
+    value = request.META.get(settings.THROTTLE_IP_META_KEY, "")
+    entries = [entry.strip() for entry in value.split(",") if entry.strip()]
+    if not entries:
+        return None
+    hops = min(max(settings.THROTTLE_TRUSTED_PROXY_COUNT, 1), len(entries))
+    return entries[-hops]
+
+
+def get_digest(ident):
+    """Hash an identifier into a short key, safe for every cache backend."""
+    return hashlib.sha256(str(ident).encode()).hexdigest()[:32]
+
+
+class SlidingWindowLimiter:
+    """
+    Allow `limit` hits per identifier over the last `window` seconds. A limit
+    of 0 disables the limiter.
+    """
+
+    def __init__(self, scope, limit, window):
+        self.scope = scope
+        self.limit = limit
+        self.window = window
+
+    def _keys(self, ident, now):
+        digest = get_digest(ident)
+        index = int(now // self.window)
+        return (
+            f"throttle:{self.scope}:{digest}:{index}",
+            f"throttle:{self.scope}:{digest}:{index - 1}",
+        )
+
+    def count(self, ident, now=None):
+        """Return the (weighted) number of hits in the sliding window."""
+        now = time.time() if now is None else now
+        current_key, previous_key = self._keys(ident, now)
+        counts = get_cache().get_many([current_key, previous_key])
+        elapsed = (now % self.window) / self.window
+        return counts.get(current_key, 0) + counts.get(previous_key, 0) * (1 - elapsed)
+
+    def is_limited(self, ident, now=None):
+        return bool(self.limit) and self.count(ident, now) >= self.limit
+
+    def hit(self, ident, now=None):
+        """
+        Count a hit, and return the (weighted) number of hits in the sliding
+        window, this one included. The hit is counted atomically, concurrent
+        hits all get a different count.
+        """
+        now = time.time() if now is None else now
+        current_key, previous_key = self._keys(ident, now)
+        cache = get_cache()
+        # The counter must outlive the window following its own.
+        cache.add(current_key, 0, timeout=2 * self.window)
+        try:
+            current = cache.incr(current_key)
+        except ValueError:
+            # Expired between add() and incr().
+            cache.set(current_key, 1, timeout=2 * self.window)
+            current = 1
+        elapsed = (now % self.window) / self.window
+        return current + cache.get(previous_key, 0) * (1 - elapsed)
+
+    def undo(self, ident, now):
+        """Uncount the hit made at `now`."""
+        current_key, _ = self._keys(ident, now)
+        try:
+            get_cache().decr(current_key)
+        except ValueError:
+            # Expired.
+            pass
+
+    def reset(self, ident, now=None):
+        now = time.time() if now is None else now
+        get_cache().delete_many(self._keys(ident, now))
+
+
+def hit_limits(limits, now):
+    """
+    Count a hit on each (limiter, identifier) pair of `limits`, and return
+    whether one of them went over its limit, in which case no hit is counted.
+    """
+    limited = False
+    for limiter, ident in limits:
+        count = limiter.hit(ident, now)
+        limited |= bool(limiter.limit) and count > limiter.limit
+    if limited:
+        for limiter, ident in limits:
+            limiter.undo(ident, now)
+    return limited
+
+
+def incr_metric(name, delta=1):
+    """Increment a throttling metric, kept in the cache without expiry."""
+    cache = get_cache()
+    key = f"throttle:metrics:{name}"
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        cache.set(key, delta, timeout=None)
+
+
+def get_metrics(*names):
+    cache = get_cache()
+    values = cache.get_many([f"throttle:metrics:{name}" for name in names])
+    return {name: values.get(f"throttle:metrics:{name}", 0) for name in names}
+
+
+class LoginThrottle:
+    """
+    Limit failed logins per username and per client IP address.
+
+    allow() must be called before authenticating, so a throttled login
+    doesn't cost a password hash or a query, and record() after. Attempts
+    are counted by allow(), so that concurrent ones can't all pass it, and
+    uncounted by record() when they succeed.
+    """
+
+    def __init__(self, request, username):
+        window = settings.LOGIN_THROTTLE_WINDOW
+        self.limits = [
+            (
+                SlidingWindowLimiter(
+                    "login:username", settings.LOGIN_THROTTLE_USERNAME_LIMIT, window
+                ),
+                casefold(username),
+            ),
+        ]
+        ip = get_client_ip(request) if request is not None else None
+        if ip:
+            self.limits.append(
+                (
+                    SlidingWindowLimiter(
+                        "login:ip", settings.LOGIN_THROTTLE_IP_LIMIT, window
+                    ),
+                    ip,
+                )
+            )
+
+    def allow(self):
+        """Count an attempt, and return whether it may authenticate."""
+        self.now = time.time()
+        if hit_limits(self.limits, self.now):
+            incr_metric("login:throttled")
+            return False
+        return True
+
+    def record(self, success, duration):
+        """
+        Record an authentication attempt and how long it took, in seconds.
+        """
+        incr_metric("login:authenticated")
+        incr_metric("login:authenticate_us", int(duration * 1_000_000))
+        if success:
+            # Only failed attempts count. The user knows their password,
+            # forget their failed attempts.
+            limiter, ident = self.limits[0]
+            limiter.reset(ident)
+            for limiter, ident in self.limits[1:]:
+                limiter.undo(ident, self.now)
+
+
+def get_login_metrics():
+    """
+    Return the login throttling counters, and an estimate of the time spent
+    authenticating (mostly hashing) that throttled logins saved.
+    """
+    metrics = get_metrics(
+        "login:throttled", "login:authenticated", "login:authenticate_us"
+    )
+    authenticated = metrics["login:authenticated"]
+    average = metrics["login:authenticate_us"] / authenticated if authenticated else 0
+    return {
+        "throttled": metrics["login:throttled"],
+        "authenticated": authenticated,
+        "authenticate_seconds": metrics["login:authenticate_us"] / 1_000_000,
+        "saved_seconds": metrics["login:throttled"] * average / 1_000_000,
+    }
+
+
+class PasswordResetThrottle:
+    """
+    Limit password reset requests per email address and per client IP
+    address, and skip the requests repeating one made less than
+    PASSWORD_RESET_DEDUPE_WINDOW seconds ago.
+
+    Skipped requests must get the same response as the others, not to
+    disclose which addresses have an account.
+    """
+
+    def __init__(self, request, email):
+        window = settings.PASSWORD_RESET_THROTTLE_WINDOW
+        self.dedupe_key = (
+            f"throttle:password_reset:dedupe:{get_digest(casefold(email))}"
+        )
+        self.limits = [
+            (
+                SlidingWindowLimiter(
+                    "password_reset:email",
+                    settings.PASSWORD_RESET_THROTTLE_EMAIL_LIMIT,
+                    window,
+                ),
+                casefold(email),
+            ),
+        ]
+        ip = get_client_ip(request) if request is not None else None
+        if ip:
+            self.limits.append(
+                (
+                    SlidingWindowLimiter(
+                        "password_reset:ip",
+                        settings.PASSWORD_RESET_THROTTLE_IP_LIMIT,
+                        window,
+                    ),
+                    ip,
+                )
+            )
+
+    def allow(self):
+        """Return whether the reset email should be sent, and count it."""
+        now = time.time()
+        if hit_limits(self.limits, now):
+            incr_metric("password_reset:throttled")
+            return False
+        dedupe_window = settings.PASSWORD_RESET_DEDUPE_WINDOW
+        if dedupe_window and not get_cache().add(
+            self.dedupe_key, 1, timeout=dedupe_window
+        ):
+            for limiter, ident in self.limits:
+                limiter.undo(ident, now)
+            incr_metric("password_reset:deduplicated")
+            return False
+        incr_metric("password_reset:sent")
+        return True
+
+    def release(self):
+        """Let the request be retried right away, when sending it failed."""
+        get_cache().delete(self.dedupe_key)
+
+
+def get_password_reset_metrics():
+    metrics = get_metrics(
+        "password_reset:sent",
+        "password_reset:deduplicated",
+        "password_reset:throttled",
+    )
+    return {name.split(":")[1]: value for name, value in metrics.items()}
@@ -1,43 +1,45 @@
+from django.conf import settings
 from django.urls import path
 
-from .views import (
-    signup_view,
-    login_view,
-    logout_view,
-    password_reset_view,
-    password_reset_done_view,
-    password_reset_confirm_view,
-    password_reset_complete_view,
-    password_change_view,
-    password_change_done_view,
-)
+from . import async_views, views
 
 app_name = "accounts"
 
+if settings.ACCOUNTS_ASYNC_VIEWS:
+    views = async_views
+
 urlpatterns = [
-    path(route="signup/", view=signup_view, name="signup"),
-    path(route="login/", view=login_view, name="login"),
-    path(route="logout/", view=logout_view, name="logout"),
-    path(route="password/reset/", view=password_reset_view, name="password_reset"),
+    path(route="signup/", view=views.signup_view, name="signup"),
+    path(route="login/", view=views.login_view, name="login"),
+    path(route="logout/", view=views.logout_view, name="logout"),
+    path(
+        route="password/reset/",
+        view=views.password_reset_view,
+        name="password_reset",
+    ),
     path(
         route="password/reset/done/",
-        view=password_reset_done_view,
+        view=views.password_reset_done_view,
         name="password_reset_done",
     ),
     path(
         route="password/reset/confirm/<uidb64>/<token>/",
-        view=password_reset_confirm_view,
+        view=views.password_reset_confirm_view,
         name="password_reset_confirm",
     ),
     path(
         route="password/reset/complete/",
-        view=password_reset_complete_view,
+        view=views.password_reset_complete_view,
         name="password_reset_complete",
     ),
-    path(route="password/change/", view=password_change_view, name="password_change"),
+    path(
+        route="password/change/",
+        view=views.password_change_view,
+        name="password_change",
+    ),
     path(
         route="password/change/done/",
-        view=password_change_done_view,
+        view=views.password_change_done_view,
         name="password_change_done",
     ),
 ]
@@ -1,30 +1,20 @@
-import unicodedata
-
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
+from django.db import transaction
 from django.template import loader
 from django.core.mail import EmailMultiAlternatives
 from django.contrib.sites.shortcuts import get_current_site
 from django.utils.encoding import force_bytes
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 
+from project.core.mail import background
+from project.core.mail.outbox import enqueue
 
 UserModel = get_user_model()
 
 
-def _unicode_ci_compare(s1, s2):
-    """
-    Perform case-insensitive comparison of two identifiers, using the
-    recommended algorithm from Unicode Technical Report 36, section
-    2.11.2(B)(2).
-    """
-    return (
-        unicodedata.normalize("NFKC", s1).casefold()
-        == unicodedata.normalize("NFKC", s2).casefold()
-    )
-
-
-def send_mail(
+def render_mail(
     subject_template_name,
     email_template_name,
     context,
@@ -33,8 +23,7 @@ def send_mail(
     html_email_template_name=None,
 ):
     """
-    Email message which can be sent to multiple users.
-    Send a django.core.mail.EmailMultiAlternatives to `to_email`.
+    Render a django.core.mail.EmailMultiAlternatives to `to_email`.
     """
     subject = loader.render_to_string(subject_template_name, context)
     # Email subject *must not* contain newlines
@@ -45,8 +34,43 @@ def send_mail(
     if html_email_template_name is not None:
         html_email = loader.render_to_string(html_email_template_name, context)
         email_message.attach_alternative(html_email, "text/html")
+    return email_message
+
+
+def send_mail(
+    subject_template_name,
+    email_template_name,
+    context,
+    from_email,
+    to_email,
+    html_email_template_name=None,
+):
+    """
+    Render a django.core.mail.EmailMultiAlternatives to `to_email` and, depending
+    on the EMAIL_DELIVERY setting, store it in the outbox or send it once the
+    current transaction is committed, from the calling thread ("sync", errors
+    are raised by the commit) or a mail thread ("background", errors are only
+    logged and the email is lost if the process dies before sending it).
+    """
+    args = (
+        subject_template_name,
+        email_template_name,
+        context,
+        from_email,
+        to_email,
+        html_email_template_name,
+    )
+    if settings.EMAIL_DELIVERY == "outbox":
+        # Stored in the same transaction as the data it's about.
+        enqueue(render_mail(*args))
+    elif settings.EMAIL_DELIVERY == "background":
+        transaction.on_commit(lambda: background.submit(_render_and_send, *args))
+    else:
+        transaction.on_commit(lambda: _render_and_send(*args))
+
 
-    email_message.send(fail_silently=False)
+def _render_and_send(*args):
+    render_mail(*args).send(fail_silently=False)
 
 
 def get_users(email):
@@ -56,19 +80,28 @@ def get_users(email):
     that prevent inactive users and users with unusable passwords from
     resetting their password.
     """
-    email_field_name = UserModel.get_email_field_name()
-    active_users = UserModel._default_manager.filter(
-        **{
-            "%s__iexact" % email_field_name: email,
-            "is_active": True,
-        }
-    )
-    return (
-        user
-        for user in active_users
-        if user.has_usable_password()
-        and _unicode_ci_compare(email, getattr(user, email_field_name))
+    active_users = UserModel._default_manager.filter_by_email(email).filter(
+        is_active=True
     )
+    return (user for user in active_users if user.has_usable_password())
+
+
+def get_link_context(
+    user, domain, site_name, use_https, token_generator, extra_email_context=None
+):
+    """
+    Return the email template context holding a one-use only link for `user`.
+    """
+    return {
+        "email": getattr(user, UserModel.get_email_field_name()),
+        "domain": domain,
+        "site_name": site_name,
+        "uid": urlsafe_base64_encode(force_bytes(user.pk)),
+        "user": user,
+        "token": token_generator.make_token(user=user),
+        "protocol": "https" if use_https else "http",
+        **(extra_email_context or {}),
+    }
 
 
 def generate_and_mail_link(
@@ -93,25 +126,16 @@ def generate_and_mail_link(
         domain = current_site.domain
     else:
         site_name = domain = domain_override
-    email_field_name = UserModel.get_email_field_name()
     for user in get_users(email):
-        user_email = getattr(user, email_field_name)
-        context = {
-            "email": user_email,
-            "domain": domain,
-            "site_name": site_name,
-            "uid": urlsafe_base64_encode(force_bytes(user.pk)),
-            "user": user,
-            "token": token_generator.make_token(user=user),
-            "protocol": "https" if use_https else "http",
-            **(extra_email_context or {}),
-        }
+        context = get_link_context(
+            user, domain, site_name, use_https, token_generator, extra_email_context
+        )
         send_mail(
             subject_template_name,
             email_template_name,
             context,
             from_email,
-            user_email,
+            context["email"],
             html_email_template_name=html_email_template_name,
         )
 
@@ -131,3 +155,20 @@ def get_user_via_uidb64(uidb64):
     ):
         user = None
     return user
+
+
+async def aget_user_via_uidb64(uidb64):
+    """Async version of get_user_via_uidb64()."""
+    try:
+        # urlsafe_base64_decode() decodes to bytestring
+        uid = urlsafe_base64_decode(uidb64).decode()
+        user = await UserModel._default_manager.aget(pk=uid)
+    except (
+        TypeError,
+        ValueError,
+        OverflowError,
+        UserModel.DoesNotExist,
+        ValidationError,
+    ):
+        user = None
+    return user
@@ -2,7 +2,8 @@ from urllib.parse import urlparse
 
 from django.http import HttpResponseRedirect, QueryDict
 from django.conf import settings
-from django.core.exceptions import ImproperlyConfigured
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.db import transaction
 from django.contrib.sites.shortcuts import get_current_site
 from django.contrib.auth import login as auth_login
 from django.contrib.auth import REDIRECT_FIELD_NAME, logout as auth_logout
@@ -19,6 +20,8 @@ from django.views.generic import TemplateView
 from django.views.generic.edit import FormView
 from django.contrib import messages
 
+from project.core.mixins import ReadOnlyMixin, UsePrimaryMixin
+
 from .tokens import default_token_generator
 from .mixins import RedirectURLMixin, PasswordContextMixin
 from .forms import (
@@ -28,6 +31,7 @@ from .forms import (
     AuthenticationForm,
     PasswordResetForm,
 )
+from .throttling import PasswordResetThrottle
 from .utils import get_user_via_uidb64
 
 LOGIN_URL = settings.LOGIN_URL
@@ -72,7 +76,11 @@ class SignUpView(RedirectURLMixin, FormView):
 
     def form_valid(self, form):
         """Create a new user, send success message and redirect to URL."""
-        user = form.save()
+        try:
+            form.save()
+        except ValidationError:
+            # A concurrent signup took the username or email.
+            return self.form_invalid(form)
         messages.success(
             request=self.request,
             message=_("Your account had been created successfully."),
@@ -265,14 +273,34 @@ class PasswordResetView(PasswordContextMixin, FormView):
             "html_email_template_name": self.html_email_template_name,
             "extra_email_context": self.extra_email_context,
         }
-        form.save(**opts)
+        # Throttled and repeated requests get the same response, without the
+        # queries and the email.
+        throttle = PasswordResetThrottle(self.request, form.cleaned_data["email"])
+        if throttle.allow():
+            if settings.EMAIL_DELIVERY == "sync":
+                # The emails are sent once the request transaction commits,
+                # after this view returned. Save the form then, so that a
+                # failed send still releases the dedupe key.
+                transaction.on_commit(
+                    lambda: self.send_reset_email(form, opts, throttle)
+                )
+            else:
+                self.send_reset_email(form, opts, throttle)
         return super().form_valid(form)
 
+    def send_reset_email(self, form, opts, throttle):
+        try:
+            form.save(**opts)
+        except Exception:
+            # Let the request be retried right away.
+            throttle.release()
+            raise
+
 
 password_reset_view = PasswordResetView.as_view()
 
 
-class PasswordResetDoneView(PasswordContextMixin, TemplateView):
+class PasswordResetDoneView(ReadOnlyMixin, PasswordContextMixin, TemplateView):
     template_name = "registration/password_reset_done.html"
     title = _("Password reset sent")
 
@@ -282,8 +310,13 @@ password_reset_done_view = PasswordResetDoneView.as_view()
 INTERNAL_RESET_SESSION_TOKEN = "_password_reset_token"
 
 
-class PasswordResetConfirmView(PasswordContextMixin, FormView):
-    """Validates reset link and reset password."""
+class PasswordResetConfirmView(UsePrimaryMixin, PasswordContextMixin, FormView):
+    """
+    Validates reset link and reset password.
+
+    The token is checked against the primary database, a replica could still
+    accept a token used a moment ago.
+    """
 
     form_class = SetPasswordForm
     post_reset_login = False
@@ -359,7 +392,7 @@ class PasswordResetConfirmView(PasswordContextMixin, FormView):
 password_reset_confirm_view = PasswordResetConfirmView.as_view()
 
 
-class PasswordResetCompleteView(PasswordContextMixin, TemplateView):
+class PasswordResetCompleteView(ReadOnlyMixin, PasswordContextMixin, TemplateView):
     template_name = "registration/password_reset_complete.html"
     title = _("Password reset complete")
 
@@ -394,13 +427,17 @@ class PasswordChangeView(PasswordContextMixin, FormView):
         # Updating the password logs out all other sessions for the user
         # except the current one.
         update_session_auth_hash(self.request, form.user)
+        session = self.request.session
+        if hasattr(session, "delete_user_sessions"):
+            # Delete them too, when the session engine indexes them by user.
+            session.delete_user_sessions([form.user.pk], keep=session.session_key)
         return super().form_valid(form)
 
 
 password_change_view = PasswordChangeView.as_view()
 
 
-class PasswordChangeDoneView(PasswordContextMixin, TemplateView):
+class PasswordChangeDoneView(ReadOnlyMixin, PasswordContextMixin, TemplateView):
     template_name = "registration/password_change_done.html"
     title = _("Password change successful")
 
@@ -1,6 +1,8 @@
 from django.contrib import admin
 from django.utils.translation import gettext_lazy
 
+from .models import OutboxMessage
+
 # overriding default AdminSite instance 'admin_site' properties
 
 # Text to put at the end of each page's <title>.
@@ -11,3 +13,16 @@ admin.site.site_header = gettext_lazy("Project Name Admin")
 
 # Text to put at the top of the admin index page.
 admin.site.index_title = gettext_lazy("Administration")
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    """
+    Admin class for outbox messages
+    """
+
+    list_display = ("subject", "to", "status", "attempts", "next_attempt_at")
+    list_filter = ("status",)
+    search_fields = ("subject",)
+    readonly_fields = ("created_at", "sent_at")
+    ordering = ("-created_at",)
@@ -0,0 +1,15 @@
+from django.core.cache.backends.base import BaseCache
+
+
+def has_atomic_incr(cache):
+    """
+    Return whether incr() of `cache` is atomic. BaseCache.incr() is a get()
+    and a set(), which loses the increments made in between by other
+    processes, as with the file and database caches.
+    """
+    from .backends.tiered import TieredCache
+
+    if isinstance(cache, TieredCache):
+        # Counters are only kept in L2.
+        cache = cache.l2
+    return type(cache).incr is not BaseCache.incr
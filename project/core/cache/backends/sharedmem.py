@@ -0,0 +1,343 @@
+"""
+Cache backend sharing a memory-mapped file between the processes of a host,
+for single host deployments without a cache server.
+
+    CACHES = {
+        "default": {
+            "BACKEND": "project.core.cache.backends.sharedmem.SharedMemoryCache",
+            "LOCATION": "/dev/shm/django_cache",
+            "OPTIONS": {
+                "MAX_ENTRIES": 10000,
+                "SLOT_SIZE": 4096,  # bytes, for the key and the pickled value
+                "WAYS": 8,
+            },
+        },
+    }
+
+The file is a hash table of MAX_ENTRIES fixed size slots, grouped in sets of
+WAYS slots. A key can only be stored in the slots of its set, and setting it
+when they are all used evicts the least recently read one. Values that don't
+fit in a slot aren't cached.
+
+Reads don't lock: each slot has a sequence number, odd while it's written,
+and a read is retried when the number changed while copying the slot.
+Writes lock the set, with a thread lock and a file lock. Put the file on a
+tmpfs such as /dev/shm, and use a new LOCATION when changing the options.
+"""
+
+import fcntl
+import hashlib
+import mmap
+import os
+import pickle
+import struct
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.exceptions import ImproperlyConfigured
+
+MAGIC = b"DJSHMC01"
+# Magic, number of slots, slot size, ways.
+FILE_HEADER = struct.Struct("8sIII")
+FILE_HEADER_SIZE = 64
+# Sequence number, key hash, expiry time (0 for none), last read time, key
+# length, value length.
+SLOT_HEADER = struct.Struct("QQddII")
+ACCESSED_OFFSET = 24
+# Reads of a slot being written retry this many times before missing.
+READ_RETRIES = 10
+
+_tables = {}
+_tables_lock = threading.Lock()
+
+
+class Table:
+    """The memory-mapped hash table of a cache file."""
+
+    def __init__(self, path, num_slots, slot_size, ways):
+        self.path = path
+        self.ways = ways
+        self.num_slots = -(-num_slots // ways) * ways
+        self.num_sets = self.num_slots // ways
+        self.slot_size = slot_size
+        self.capacity = slot_size - SLOT_HEADER.size
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        size = FILE_HEADER_SIZE + self.num_slots * slot_size
+        fcntl.lockf(self.fd, fcntl.LOCK_EX)
+        try:
+            header = FILE_HEADER.pack(MAGIC, self.num_slots, slot_size, ways)
+            if os.fstat(self.fd).st_size == 0:
+                os.ftruncate(self.fd, size)
+                os.pwrite(self.fd, header, 0)
+            elif os.pread(self.fd, FILE_HEADER.size, 0) != header:
+                raise ImproperlyConfigured(
+                    f"The cache file {path} was created with other options."
+                )
+        finally:
+            fcntl.lockf(self.fd, fcntl.LOCK_UN)
+        self.mm = mmap.mmap(self.fd, size)
+
+    def close(self):
+        self.mm.close()
+        os.close(self.fd)
+
+    @staticmethod
+    def hash(key):
+        # 0 marks empty slots.
+        return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "big") or 1
+
+    def slots(self, key_hash):
+        """Return the offsets of the slots of the set of `key_hash`."""
+        start = FILE_HEADER_SIZE + (key_hash % self.num_sets) * self.ways * (
+            self.slot_size
+        )
+        return range(start, start + self.ways * self.slot_size, self.slot_size)
+
+    def read(self, offset, key_hash, key):
+        """
+        Return the (expiry time, pickled value) of `key` in the slot at
+        `offset`, or None, without locking.
+        """
+        mm = self.mm
+        for _ in range(READ_RETRIES):
+            seq, slot_hash, expires, _, key_len, value_len = SLOT_HEADER.unpack_from(
+                mm, offset
+            )
+            if seq & 1:
+                continue
+            if slot_hash != key_hash:
+                return None
+            if key_len + value_len > self.capacity:
+                continue
+            start = offset + SLOT_HEADER.size
+            data = mm[start : start + key_len + value_len]
+            if struct.unpack_from("Q", mm, offset)[0] != seq:
+                continue
+            if data[:key_len] != key:
+                return None
+            return expires, data[key_len:]
+        return None
+
+    def write(self, offset, key_hash, key, pickled, expires):
+        """Write the slot at `offset`, with the set locked."""
+        mm = self.mm
+        seq = struct.unpack_from("Q", mm, offset)[0]
+        SLOT_HEADER.pack_into(
+            mm, offset, seq + 1, key_hash, expires, time.time(), len(key), len(pickled)
+        )
+        start = offset + SLOT_HEADER.size
+        mm[start : start + len(key) + len(pickled)] = key + pickled
+        struct.pack_into("Q", mm, offset, seq + 2)
+
+    def empty(self, offset):
+        """Empty the slot at `offset`, with the set locked."""
+        mm = self.mm
+        seq = struct.unpack_from("Q", mm, offset)[0]
+        SLOT_HEADER.pack_into(mm, offset, seq + 1, 0, 0, 0, 0, 0)
+        struct.pack_into("Q", mm, offset, seq + 2)
+
+    def lock_set(self, key_hash):
+        """Return a context manager locking the set of `key_hash`."""
+        slots = self.slots(key_hash)
+        return _SetLock(self, slots.start, self.ways * self.slot_size)
+
+
+class _SetLock:
+    def __init__(self, table, start, length):
+        self.table = table
+        self.start = start
+        self.length = length
+
+    def __enter__(self):
+        # File locks don't exclude the threads of a process.
+        self.table.lock.acquire()
+        try:
+            fcntl.lockf(self.table.fd, fcntl.LOCK_EX, self.length, self.start)
+        except BaseException:
+            self.table.lock.release()
+            raise
+
+    def __exit__(self, *exc_info):
+        try:
+            fcntl.lockf(self.table.fd, fcntl.LOCK_UN, self.length, self.start)
+        finally:
+            self.table.lock.release()
+
+
+def get_table(path, num_slots, slot_size, ways):
+    """Return the process-wide table of the `path` cache file."""
+    with _tables_lock:
+        table = _tables.get(path)
+        if table is None:
+            table = _tables[path] = Table(path, num_slots, slot_size, ways)
+    return table
+
+
+class SharedMemoryCache(BaseCache):
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self._path = location
+        self._slot_size = options.get("SLOT_SIZE", 4096)
+        self._ways = options.get("WAYS", 8)
+
+    @property
+    def _table(self):
+        return get_table(self._path, self._max_entries, self._slot_size, self._ways)
+
+    def get_stats(self):
+        """Return the hit, miss and eviction counters of this process."""
+        table = self._table
+        now = time.time()
+        entries = 0
+        for offset in range(FILE_HEADER_SIZE, len(table.mm), table.slot_size):
+            _, key_hash, expires, *_ = SLOT_HEADER.unpack_from(table.mm, offset)
+            entries += key_hash != 0 and (not expires or expires > now)
+        with table.lock:
+            return {**table.stats, "entries": entries}
+
+    def _key(self, key, version):
+        return self.make_and_validate_key(key, version=version).encode()
+
+    def _expiry(self, timeout):
+        expires = self.get_backend_timeout(timeout)
+        return 0 if expires is None else expires
+
+    def _find(self, table, key_hash, key):
+        """Return the offset and the pickled value of a live `key`, with the
+        set locked."""
+        now = time.time()
+        for offset in table.slots(key_hash):
+            entry = table.read(offset, key_hash, key)
+            if entry is not None:
+                expires, pickled = entry
+                if expires and expires <= now:
+                    return offset, None
+                return offset, pickled
+        return None, None
+
+    def _store(self, table, key_hash, key, value, expires):
+        """Store `value` in the set of `key`, with the set locked."""
+        pickled = pickle.dumps(value, self.pickle_protocol)
+        offset, _ = self._find(table, key_hash, key)
+        if len(key) + len(pickled) > table.capacity:
+            # Too large to cache, don't leave the previous value.
+            if offset is not None:
+                table.empty(offset)
+            return False
+        if offset is None:
+            offset = self._free_slot(table, key_hash)
+        table.write(offset, key_hash, key, pickled, expires)
+        return True
+
+    def _free_slot(self, table, key_hash):
+        """Return an empty, expired or the least recently read slot."""
+        now = time.time()
+        oldest = None
+        for offset in table.slots(key_hash):
+            _, slot_hash, expires, accessed, *_ = SLOT_HEADER.unpack_from(
+                table.mm, offset
+            )
+            if slot_hash == 0 or (expires and expires <= now):
+                return offset
+            if oldest is None or accessed < oldest[1]:
+                oldest = (offset, accessed)
+        table.stats["evictions"] += 1
+        return oldest[0]
+
+    def get(self, key, default=None, version=None):
+        key = self._key(key, version)
+        table = self._table
+        key_hash = table.hash(key)
+        now = time.time()
+        for offset in table.slots(key_hash):
+            entry = table.read(offset, key_hash, key)
+            if entry is None:
+                continue
+            expires, pickled = entry
+            if expires and expires <= now:
+                break
+            # Racing with writers only makes the LRU order approximate.
+            struct.pack_into("d", table.mm, offset + ACCESSED_OFFSET, now)
+            table.stats["hits"] += 1
+            return pickle.loads(pickled)
+        table.stats["misses"] += 1
+        return default
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        table = self._table
+        key_hash = table.hash(key)
+        with table.lock_set(key_hash):
+            self._store(table, key_hash, key, value, self._expiry(timeout))
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        table = self._table
+        key_hash = table.hash(key)
+        with table.lock_set(key_hash):
+            if self._find(table, key_hash, key)[1] is not None:
+                return False
+            return self._store(table, key_hash, key, value, self._expiry(timeout))
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        table = self._table
+        key_hash = table.hash(key)
+        with table.lock_set(key_hash):
+            offset, pickled = self._find(table, key_hash, key)
+            if pickled is None:
+                return False
+            table.write(offset, key_hash, key, pickled, self._expiry(timeout))
+            return True
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        table = self._table
+        key_hash = table.hash(key)
+        with table.lock_set(key_hash):
+            offset, pickled = self._find(table, key_hash, key)
+            if pickled is None:
+                raise ValueError("Key '%s' not found" % key.decode())
+            value = pickle.loads(pickled) + delta
+            expires = SLOT_HEADER.unpack_from(table.mm, offset)[2]
+            table.write(
+                offset,
+                key_hash,
+                key,
+                pickle.dumps(value, self.pickle_protocol),
+                expires,
+            )
+            return value
+
+    def has_key(self, key, version=None):
+        sentinel = object()
+        return self.get(key, sentinel, version=version) is not sentinel
+
+    def delete(self, key, version=None):
+        key = self._key(key, version)
+        table = self._table
+        key_hash = table.hash(key)
+        with table.lock_set(key_hash):
+            offset, pickled = self._find(table, key_hash, key)
+            if offset is None:
+                return False
+            table.empty(offset)
+            return pickled is not None
+
+    def clear(self):
+        table = self._table
+        for start in range(
+            FILE_HEADER_SIZE, len(table.mm), table.ways * table.slot_size
+        ):
+            with _SetLock(table, start, table.ways * table.slot_size):
+                for offset in range(
+                    start, start + table.ways * table.slot_size, table.slot_size
+                ):
+                    if SLOT_HEADER.unpack_from(table.mm, offset)[1]:
+                        table.empty(offset)
@@ -0,0 +1,315 @@
+"""
+Two-tier cache backend: a small in-process LRU cache (L1) in front of a
+cache shared by every process (L2), such as Redis or Memcached.
+
+Reads are served from L1 when possible. Entries stay in L1 for at most
+L1_TIMEOUT seconds. Writes go to L2, and are recorded in an invalidation
+log kept in L2: a counter and one entry per write naming the written key.
+Every SYNC_INTERVAL seconds, each process reads the new log entries and
+drops those keys from its L1. When it fell too far behind, or entries
+expired, it clears its L1 instead. Processes may read a stale value for
+up to SYNC_INTERVAL seconds after another process wrote it. Each write costs
+two more round trips to L2, to count and record it.
+
+The log relies on an atomic incr() of L2. Without one, such as with the file
+or database caches, the L1 tier is disabled and reads and writes go to L2.
+
+    CACHES = {
+        "default": {
+            "BACKEND": "project.core.cache.backends.tiered.TieredCache",
+            "LOCATION": "default",
+            "OPTIONS": {
+                "L2": "shared",  # alias of the shared cache
+                "MAX_ENTRIES": 1000,  # in L1
+                "L1_TIMEOUT": 5,
+                "SYNC_INTERVAL": 1,
+            },
+        },
+        "shared": {...},
+    }
+"""
+
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.utils.functional import cached_property
+
+from project.core.cache import has_atomic_incr
+
+# Log entries read at most at each sync, L1 is cleared past that.
+MAX_LOG_READ = 100
+
+_tiers = {}
+_tiers_lock = threading.Lock()
+
+
+class LocalTier:
+    """The L1 tier of a process: an LRU of pickled values with expiry."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.generation = None
+        self.synced_at = 0
+        self.stats = {
+            "l1_hits": 0,
+            "l2_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "invalidations": 0,
+            "clears": 0,
+        }
+
+    def get(self, key):
+        """Return the pickled value of `key`, or None."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            pickled, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return pickled
+
+    def set(self, key, pickled, timeout):
+        with self.lock:
+            self.entries[key] = (pickled, time.monotonic() + timeout)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def delete(self, *keys):
+        with self.lock:
+            for key in keys:
+                if self.entries.pop(key, None) is not None:
+                    self.stats["invalidations"] += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.stats["clears"] += 1
+
+    def count(self, stat, delta=1):
+        with self.lock:
+            self.stats[stat] += delta
+
+
+class TieredCache(BaseCache):
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, name, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self._l2_alias = options["L2"]
+        self._l1_timeout = options.get("L1_TIMEOUT", 5)
+        self._sync_interval = options.get("SYNC_INTERVAL", 1)
+        self._log_prefix = f"tiered:{name}"
+        with _tiers_lock:
+            self._l1 = _tiers.setdefault(name, LocalTier(self._max_entries))
+
+    @property
+    def l2(self):
+        return caches[self._l2_alias]
+
+    @cached_property
+    def enabled(self):
+        """Whether L1 is used, which the invalidation log requires."""
+        return has_atomic_incr(self.l2)
+
+    def get_stats(self):
+        """Return the hit, miss, eviction and invalidation counters of L1."""
+        with self._l1.lock:
+            return {**self._l1.stats, "entries": len(self._l1.entries)}
+
+    # Invalidation log.
+
+    def _log(self, *keys):
+        """Record writes to `keys` for the other processes."""
+        if not self.enabled:
+            return
+        counter_key = f"{self._log_prefix}:generation"
+        try:
+            generation = self.l2.incr(counter_key, len(keys))
+        except ValueError:
+            # Start from the time, so that a counter recreated after being
+            # evicted or cleared jumps ahead and the other processes clear
+            # their L1.
+            start = time.time_ns()
+            if (
+                self.l2.add(counter_key, start, timeout=None)
+                and self._l1.generation is None
+            ):
+                self._l1.generation = start
+            try:
+                generation = self.l2.incr(counter_key, len(keys))
+            except ValueError:
+                # Evicted again, the other processes clear their L1.
+                return
+        if self._l1.generation == generation - len(keys):
+            # Nothing was written in between, don't invalidate our own writes.
+            self._l1.generation = generation
+        timeout = max(60, 10 * self._sync_interval)
+        self.l2.set_many(
+            {
+                f"{self._log_prefix}:log:{generation - index}": key
+                for index, key in enumerate(reversed(keys))
+            },
+            timeout=timeout,
+        )
+
+    def _sync(self):
+        """Drop the keys written by other processes since the last sync."""
+        l1 = self._l1
+        now = time.monotonic()
+        if not self.enabled or now - l1.synced_at < self._sync_interval:
+            return
+        l1.synced_at = now
+        generation = self.l2.get(f"{self._log_prefix}:generation")
+        previous, l1.generation = l1.generation, generation
+        if previous is None or generation is None:
+            if previous != generation:
+                l1.clear()
+            return
+        if generation == previous:
+            return
+        if generation < previous or generation - previous > MAX_LOG_READ:
+            l1.clear()
+            return
+        log_keys = [
+            f"{self._log_prefix}:log:{n}" for n in range(previous + 1, generation + 1)
+        ]
+        written = self.l2.get_many(log_keys)
+        if len(written) < len(log_keys):
+            l1.clear()
+            return
+        l1.delete(*written.values())
+
+    # Cache API.
+
+    def _l1_key(self, key, version):
+        return self.make_and_validate_key(key, version=version)
+
+    def _l1_set(self, l1_key, value, timeout):
+        if self.enabled:
+            self._l1.set(l1_key, pickle.dumps(value, self.pickle_protocol), timeout)
+
+    def _l1_timeout_for(self, timeout):
+        timeout = self.get_backend_timeout(timeout)
+        if timeout is None:
+            return self._l1_timeout
+        return min(self._l1_timeout, max(0, timeout - time.time()))
+
+    def get(self, key, default=None, version=None):
+        self._sync()
+        l1_key = self._l1_key(key, version)
+        pickled = self._l1.get(l1_key)
+        if pickled is not None:
+            self._l1.count("l1_hits")
+            return pickle.loads(pickled)
+        sentinel = object()
+        value = self.l2.get(key, sentinel, version=version)
+        if value is sentinel:
+            self._l1.count("misses")
+            return default
+        self._l1.count("l2_hits")
+        self._l1_set(l1_key, value, self._l1_timeout)
+        return value
+
+    def get_many(self, keys, version=None):
+        self._sync()
+        found = {}
+        missing = []
+        for key in keys:
+            pickled = self._l1.get(self._l1_key(key, version))
+            if pickled is None:
+                missing.append(key)
+            else:
+                found[key] = pickle.loads(pickled)
+        self._l1.count("l1_hits", len(found))
+        if missing:
+            from_l2 = self.l2.get_many(missing, version=version)
+            self._l1.count("l2_hits", len(from_l2))
+            self._l1.count("misses", len(missing) - len(from_l2))
+            for key, value in from_l2.items():
+                self._l1_set(self._l1_key(key, version), value, self._l1_timeout)
+            found.update(from_l2)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._sync()
+        l1_key = self._l1_key(key, version)
+        self.l2.set(key, value, timeout=timeout, version=version)
+        self._l1_set(l1_key, value, self._l1_timeout_for(timeout))
+        self._log(l1_key)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        self._sync()
+        failed = self.l2.set_many(data, timeout=timeout, version=version)
+        l1_keys = [self._l1_key(key, version) for key in data]
+        for key, l1_key in zip(data, l1_keys):
+            if key not in failed:
+                self._l1_set(l1_key, data[key], self._l1_timeout_for(timeout))
+        if l1_keys:
+            self._log(*l1_keys)
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._sync()
+        # Only L2 knows whether the key exists.
+        added = self.l2.add(key, value, timeout=timeout, version=version)
+        if added:
+            l1_key = self._l1_key(key, version)
+            self._l1.delete(l1_key)
+            self._log(l1_key)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.l2.touch(key, timeout=timeout, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self._sync()
+        # Counters are only consistent in L2.
+        value = self.l2.incr(key, delta, version=version)
+        l1_key = self._l1_key(key, version)
+        self._l1.delete(l1_key)
+        self._log(l1_key)
+        return value
+
+    def has_key(self, key, version=None):
+        self._sync()
+        if self._l1.get(self._l1_key(key, version)) is not None:
+            return True
+        return self.l2.has_key(key, version=version)
+
+    def delete(self, key, version=None):
+        self._sync()
+        l1_key = self._l1_key(key, version)
+        self._l1.delete(l1_key)
+        deleted = self.l2.delete(key, version=version)
+        self._log(l1_key)
+        return deleted
+
+    def delete_many(self, keys, version=None):
+        self._sync()
+        l1_keys = [self._l1_key(key, version) for key in keys]
+        self._l1.delete(*l1_keys)
+        self.l2.delete_many(keys, version=version)
+        if l1_keys:
+            self._log(*l1_keys)
+
+    def clear(self):
+        self.l2.clear()
+        self._l1.clear()
+        # The invalidation log was cleared too, other processes clear their L1
+        # at their next sync.
+
+    def close(self, **kwargs):
+        self.l2.close(**kwargs)
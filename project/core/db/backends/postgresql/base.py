@@ -0,0 +1,9 @@
+"""PostgreSQL backend with pooled connections, see project.core.db.pool."""
+
+from django.db.backends.postgresql import base
+
+from ...pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    pass
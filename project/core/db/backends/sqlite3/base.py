@@ -0,0 +1,12 @@
+"""
+SQLite backend with pooled connections, see project.core.db.pool. Mostly
+useful to try pooling locally.
+"""
+
+from django.db.backends.sqlite3 import base
+
+from ...pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    pass
@@ -0,0 +1,268 @@
+"""
+Database connection pooling.
+
+Each process holds one pool of DB-API connections per database alias. With
+a pooled backend (see project.core.db.backends) and CONN_MAX_AGE = 0,
+Django's connection handling is unchanged except that closing a connection,
+at the end of each request, returns it to the pool. The number of server
+connections a process opens is then bounded by the pool size instead of its
+number of threads.
+"""
+
+import os
+import threading
+import time
+
+from django.db.utils import OperationalError
+
+
+class PoolTimeout(OperationalError):
+    pass
+
+
+class ConnectionPool:
+    """
+    A bounded LIFO pool of connections made by `connect()`.
+
+    The pool holds at most `max_size` connections, idle or checked out, and
+    keeps at least `min_size` of them open. Checking out waits up to
+    `timeout` seconds for a connection to be released when all of them are in
+    use. Connections idle for longer than `max_idle` seconds are closed, and
+    those idle for longer than `check_interval` seconds are checked with
+    `check(connection)`, which must raise if the connection is unusable.
+    """
+
+    def __init__(
+        self,
+        connect,
+        min_size=0,
+        max_size=10,
+        timeout=30,
+        max_idle=600,
+        check=None,
+        check_interval=30,
+    ):
+        self.connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.check = check
+        self.check_interval = check_interval
+        self.stats = {
+            "created": 0,
+            "reused": 0,
+            "discarded": 0,
+            "waits": 0,
+            "timeouts": 0,
+        }
+        # (connection, released at) pairs.
+        self._idle = []
+        self._size = 0
+        self._condition = threading.Condition()
+
+    def get_stats(self):
+        with self._condition:
+            return {
+                **self.stats,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+            }
+
+    def acquire(self):
+        """Check out a connection, raise PoolTimeout if none is released."""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            with self._condition:
+                connection, idle_for = self._pop_idle()
+                if connection is None:
+                    if self._size < self.max_size:
+                        # Reserve a slot, and connect outside of the lock.
+                        self._size += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.stats["timeouts"] += 1
+                        raise PoolTimeout(
+                            "No database connection released in %ss, all %d "
+                            "are in use." % (self.timeout, self.max_size)
+                        )
+                    self.stats["waits"] += 1
+                    self._condition.wait(remaining)
+                    continue
+            if self._is_usable(connection, idle_for):
+                with self._condition:
+                    self.stats["reused"] += 1
+                return connection
+            self.release(connection, discard=True)
+        try:
+            connection = self.connect()
+        except BaseException:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self.stats["created"] += 1
+        return connection
+
+    def _pop_idle(self):
+        """
+        Pop the most recently released connection and for how long it was
+        idle, closing the expired ones. Called with the lock held.
+        """
+        now = time.monotonic()
+        # Connections are released in order, so the expired ones are at the
+        # bottom of the stack, which is otherwise never reached while the
+        # pool is busy.
+        while (
+            self._idle
+            and self._size > self.min_size
+            and now - self._idle[0][1] > self.max_idle
+        ):
+            connection, _ = self._idle.pop(0)
+            self._discard(connection)
+        if not self._idle:
+            return None, None
+        connection, released_at = self._idle.pop()
+        return connection, now - released_at
+
+    def _is_usable(self, connection, idle_for):
+        if self.check is None or idle_for <= self.check_interval:
+            return True
+        try:
+            self.check(connection)
+        except Exception:
+            return False
+        return True
+
+    def release(self, connection, discard=False):
+        """
+        Return a checked out connection to the pool, or close it if
+        `discard`. Its transaction must have been rolled back.
+        """
+        with self._condition:
+            if discard:
+                self._discard(connection)
+            else:
+                self._idle.append((connection, time.monotonic()))
+            self._condition.notify()
+
+    def _discard(self, connection):
+        self._size -= 1
+        self.stats["discarded"] += 1
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def fill(self):
+        """Open connections until `min_size` of them are open."""
+        while True:
+            with self._condition:
+                if self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                connection = self.connect()
+            except BaseException:
+                with self._condition:
+                    self._size -= 1
+                raise
+            with self._condition:
+                self.stats["created"] += 1
+                self._idle.append((connection, time.monotonic()))
+                self._condition.notify()
+
+    def clear(self):
+        """Close the idle connections."""
+        with self._condition:
+            idle, self._idle = self._idle, []
+            for connection, _ in idle:
+                self._discard(connection)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _clear_pools():
+    # Connections can't be shared with a forked process.
+    _pools.clear()
+
+
+os.register_at_fork(after_in_child=_clear_pools)
+
+
+def get_pool(alias, factory):
+    """Return the process-wide pool of `alias`, created by `factory()`."""
+    with _pools_lock:
+        pool = _pools.get(alias)
+        if pool is None:
+            pool = _pools[alias] = factory()
+    return pool
+
+
+def get_pools():
+    """Return the pools of this process, by database alias."""
+    with _pools_lock:
+        return dict(_pools)
+
+
+class PooledDatabaseWrapperMixin:
+    """
+    Check connections out of a ConnectionPool instead of connecting, and
+    return them to the pool instead of closing them.
+
+    The pool is configured by the POOL dict of the database settings, with
+    the MIN_SIZE, MAX_SIZE, TIMEOUT, MAX_IDLE and CHECK_INTERVAL keys.
+    """
+
+    def get_pool(self, conn_params=None):
+        def factory():
+            options = self.settings_dict.get("POOL", {})
+            params = (
+                self.get_connection_params() if conn_params is None else conn_params
+            )
+            return ConnectionPool(
+                connect=lambda: super(
+                    PooledDatabaseWrapperMixin, self
+                ).get_new_connection(params),
+                min_size=options.get("MIN_SIZE", 0),
+                max_size=options.get("MAX_SIZE", 10),
+                timeout=options.get("TIMEOUT", 30),
+                max_idle=options.get("MAX_IDLE", 600),
+                check=self.check_pooled_connection,
+                check_interval=options.get("CHECK_INTERVAL", 30),
+            )
+
+        return get_pool(self.alias, factory)
+
+    def get_new_connection(self, conn_params):
+        pool = self.get_pool(conn_params)
+        pool.fill()
+        return pool.acquire()
+
+    def check_pooled_connection(self, connection):
+        cursor = connection.cursor()
+        try:
+            cursor.execute("SELECT 1")
+        finally:
+            cursor.close()
+
+    def _close(self):
+        if self.connection is None:
+            return
+        with self.wrap_database_errors:
+            discard = False
+            try:
+                # Don't hand over an open transaction.
+                self.connection.rollback()
+            except Exception:
+                discard = True
+            self.get_pool().release(
+                self.connection, discard=discard or self.errors_occurred
+            )
@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.db import transaction
+
+
+def non_atomic(view):
+    """
+    Exclude `view` from ATOMIC_REQUESTS on every database, for views whose
+    writes don't need to be atomic (or that handle transactions themselves).
+    """
+    for using in settings.DATABASES:
+        view = transaction.non_atomic_requests(using=using)(view)
+    return view
+
+
+def read_only(view):
+    """
+    Mark `view` as only reading from the database: it runs outside of
+    ATOMIC_REQUESTS, and database routers can check its `read_only`
+    attribute.
+    """
+    view = non_atomic(view)
+    view.read_only = True
+    return view
+
+
+def use_primary(view):
+    """
+    Make `view` read from the primary database, for views that mustn't see
+    stale data (see routers.ReplicaRouter).
+    """
+    view.use_primary = True
+    return view
@@ -0,0 +1,221 @@
+"""
+Health checks, used by the `check_postgres` management command and the
+readiness endpoint.
+
+The checks take a DB-API connection and return a dict describing the
+result, with an "ok" key, so they can be reported as JSON.
+"""
+
+import logging
+import statistics
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+
+from project.core.db.pool import get_pools
+
+logger = logging.getLogger(__name__)
+
+
+def wait_for(connect, deadline, initial_delay=0.1, max_delay=5):
+    """
+    Call `connect()` until it succeeds or `deadline` (a time.monotonic()
+    value) passes, sleeping with exponential backoff between attempts. Return
+    the connection and the number of attempts, or raise the last error.
+    """
+    delay = initial_delay
+    attempts = 0
+    while True:
+        attempts += 1
+        try:
+            return connect(), attempts
+        except Exception:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, max_delay)
+
+
+def ping(connection):
+    """Run a round-trip query."""
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+    finally:
+        cursor.close()
+
+
+def measure_latency(connection, count):
+    """Time `count` round-trip queries and return their percentiles in ms."""
+    durations = []
+    for _ in range(count):
+        start = time.perf_counter()
+        ping(connection)
+        durations.append((time.perf_counter() - start) * 1000)
+    if count > 1:
+        quantiles = statistics.quantiles(durations, n=100)
+    else:
+        quantiles = durations * 99
+    return {
+        "ok": True,
+        "count": count,
+        "p50_ms": round(quantiles[49], 3),
+        "p95_ms": round(quantiles[94], 3),
+        "p99_ms": round(quantiles[98], 3),
+    }
+
+
+def fetchall(connection, sql, params=()):
+    cursor = connection.cursor()
+    try:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def check_connections(connection, min_headroom):
+    """
+    Check that at least `min_headroom` percent of max_connections (minus the
+    superuser reserved ones) are free.
+    """
+    [(max_connections, reserved, used)] = fetchall(
+        connection,
+        "SELECT current_setting('max_connections')::int, "
+        "current_setting('superuser_reserved_connections')::int, "
+        "(SELECT count(*) FROM pg_stat_activity)",
+    )
+    by_state = fetchall(
+        connection,
+        "SELECT coalesce(state, 'background'), count(*) FROM pg_stat_activity "
+        "GROUP BY 1 ORDER BY 1",
+    )
+    available = max_connections - reserved
+    headroom = 100 * (available - used) / available
+    return {
+        "ok": headroom >= min_headroom,
+        "max_connections": max_connections,
+        "reserved": reserved,
+        "used": used,
+        "by_state": dict(by_state),
+        "headroom_percent": round(headroom, 1),
+    }
+
+
+def check_replication(connection, max_lag):
+    """
+    On a standby, check that it replays the primary's changes with less than
+    `max_lag` seconds of lag. On a primary, report the lag of its standbys.
+    """
+    [(in_recovery,)] = fetchall(connection, "SELECT pg_is_in_recovery()")
+    if in_recovery:
+        # NULL until a transaction was replayed. An idle primary also shows
+        # as lag here, as nothing new is replayed.
+        [(lag,)] = fetchall(
+            connection,
+            "SELECT extract(epoch FROM now() - pg_last_xact_replay_timestamp())",
+        )
+        lags = [] if lag is None else [float(lag)]
+    else:
+        lags = [
+            float(lag)
+            for (lag,) in fetchall(
+                connection,
+                "SELECT coalesce(extract(epoch FROM replay_lag), 0) "
+                "FROM pg_stat_replication",
+            )
+        ]
+    lag = max(lags, default=0)
+    return {
+        "ok": lag <= max_lag,
+        "in_recovery": in_recovery,
+        "standbys": None if in_recovery else len(lags),
+        "lag_seconds": round(lag, 3),
+    }
+
+
+def check_long_transactions(connection, max_duration):
+    """Check that no transaction has been open for `max_duration` seconds."""
+    rows = fetchall(
+        connection,
+        "SELECT pid, extract(epoch FROM now() - xact_start), state, "
+        "left(query, 200) FROM pg_stat_activity "
+        "WHERE xact_start < now() - make_interval(secs => %s) "
+        "AND pid <> pg_backend_pid() ORDER BY xact_start",
+        [max_duration],
+    )
+    return {
+        "ok": not rows,
+        "max_seconds": max_duration,
+        "transactions": [
+            {
+                "pid": pid,
+                "seconds": round(float(seconds), 1),
+                "state": state,
+                "query": query,
+            }
+            for pid, seconds, state, query in rows
+        ],
+    }
+
+
+def check_database(alias):
+    """
+    Check that the `alias` database answers a round-trip query, and report
+    the connection pool of this process, if it has one.
+    """
+    start = time.perf_counter()
+    try:
+        ping(connections[alias])
+    except Exception:
+        # Errors may hold hosts and credentials, they're only logged.
+        logger.exception("Readiness check of the %r database failed.", alias)
+        return {"ok": False}
+    result = {"ok": True, "ms": round((time.perf_counter() - start) * 1000, 3)}
+    pool = get_pools().get(alias)
+    if pool is not None:
+        result["pool"] = pool.get_stats()
+    return result
+
+
+def check_cache(alias):
+    """Check that the `alias` cache stores and returns a value."""
+    start = time.perf_counter()
+    key = "health:check"
+    try:
+        cache = caches[alias]
+        cache.set(key, start, timeout=60)
+        ok = cache.get(key) == start
+    except Exception:
+        logger.exception("Readiness check of the %r cache failed.", alias)
+        return {"ok": False}
+    result = {"ok": ok, "ms": round((time.perf_counter() - start) * 1000, 3)}
+    if hasattr(cache, "get_stats"):
+        result["stats"] = cache.get_stats()
+    return result
+
+
+_readiness = (0, None)
+
+
+def check_readiness():
+    """
+    Check every database and cache, reusing the result for
+    HEALTH_CHECK_CACHE_TTL seconds.
+    """
+    global _readiness
+    expires_at, result = _readiness
+    now = time.monotonic()
+    if result is not None and now < expires_at:
+        return result
+    checks = {
+        **{f"database:{alias}": check_database(alias) for alias in settings.DATABASES},
+        **{f"cache:{alias}": check_cache(alias) for alias in settings.CACHES},
+    }
+    result = {"ok": all(check["ok"] for check in checks.values()), "checks": checks}
+    _readiness = (now + settings.HEALTH_CHECK_CACHE_TTL, result)
+    return result
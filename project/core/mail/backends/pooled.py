@@ -0,0 +1,189 @@
+"""
+SMTP email backend that keeps authenticated sessions alive between messages.
+
+Each process holds one pool of idle sessions per mail server and account.
+Closing the backend returns its session to the pool instead of quitting it,
+so consecutive messages (and requests) skip the TCP, TLS and AUTH handshakes.
+"""
+
+import os
+import smtplib
+import threading
+import time
+
+from django.conf import settings
+from django.core.mail.backends.smtp import EmailBackend as SMTPEmailBackend
+
+
+class SMTPConnectionPool:
+    """
+    A bounded LIFO stack of idle SMTP sessions.
+
+    At most `max_size` sessions are kept, sessions idle for longer than
+    `max_idle` seconds are closed, and sessions idle for longer than
+    `health_check_interval` seconds are checked with a NOOP before reuse.
+    """
+
+    def __init__(self, max_size, max_idle, health_check_interval):
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.health_check_interval = health_check_interval
+        self.stats = {"created": 0, "reused": 0, "discarded": 0}
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._idle)
+
+    def acquire(self):
+        """Return a healthy idle session, or None if there is none."""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                connection, released_at = self._idle.pop()
+            idle_for = time.monotonic() - released_at
+            if idle_for > self.max_idle or (
+                idle_for > self.health_check_interval
+                and not self.is_healthy(connection)
+            ):
+                self.discard(connection)
+                continue
+            self.count("reused")
+            return connection
+
+    def release(self, connection):
+        """Keep `connection` for reuse, or close it if the pool is full."""
+        with self._lock:
+            if len(self._idle) < self.max_size:
+                self._idle.append((connection, time.monotonic()))
+                return
+        self.discard(connection)
+
+    def discard(self, connection):
+        """Close `connection` without returning it to the pool."""
+        self.count("discarded")
+        try:
+            connection.quit()
+        except (smtplib.SMTPException, OSError):
+            connection.close()
+
+    def clear(self):
+        """Close all idle sessions."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection, _ in idle:
+            self.discard(connection)
+
+    def count(self, stat):
+        with self._lock:
+            self.stats[stat] += 1
+
+    @staticmethod
+    def is_healthy(connection):
+        try:
+            return connection.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+# Sessions are sockets, a forked worker must not share its parent's.
+os.register_at_fork(after_in_child=_pools.clear)
+
+
+def get_pool(key, max_size, max_idle, health_check_interval):
+    """
+    Return the process-wide pool for `key` and these options, creating it if
+    needed. Backends configured differently don't share sessions.
+    """
+    key = (key, max_size, max_idle, health_check_interval)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = SMTPConnectionPool(
+                max_size, max_idle, health_check_interval
+            )
+        return _pools[key]
+
+
+class EmailBackend(SMTPEmailBackend):
+    """
+    A django.core.mail.backends.smtp.EmailBackend that takes its connection
+    from a process-wide pool of authenticated SMTP sessions.
+    """
+
+    def __init__(
+        self,
+        pool_size=None,
+        pool_max_idle=None,
+        pool_health_check_interval=None,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.pool = get_pool(
+            (
+                self.host,
+                self.port,
+                self.username,
+                self.password,
+                self.use_tls,
+                self.use_ssl,
+                self.ssl_keyfile,
+                self.ssl_certfile,
+                self.timeout,
+            ),
+            max_size=settings.EMAIL_POOL_SIZE if pool_size is None else pool_size,
+            max_idle=(
+                settings.EMAIL_POOL_MAX_IDLE
+                if pool_max_idle is None
+                else pool_max_idle
+            ),
+            health_check_interval=(
+                settings.EMAIL_POOL_HEALTH_CHECK_INTERVAL
+                if pool_health_check_interval is None
+                else pool_health_check_interval
+            ),
+        )
+        self._discard = False
+
+    def open(self):
+        if self.connection:
+            return False
+        connection = self.pool.acquire()
+        if connection is not None:
+            self.connection = connection
+            return True
+        # Nothing to reuse, open and authenticate a new session.
+        new_conn_created = super().open()
+        if new_conn_created:
+            self.pool.count("created")
+        return new_conn_created
+
+    def close(self):
+        """Return the connection to the pool."""
+        if self.connection is None:
+            return
+        connection, self.connection = self.connection, None
+        if self._discard:
+            self._discard = False
+            self.pool.discard(connection)
+        else:
+            self.pool.release(connection)
+
+    def send_messages(self, email_messages):
+        try:
+            return super().send_messages(email_messages)
+        except BaseException:
+            # The session state is unknown after an error, don't reuse it.
+            self._discard = True
+            self.close()
+            raise
+
+    def _send(self, email_message):
+        sent = super()._send(email_message)
+        if not sent and email_message.recipients():
+            # Failed silently, don't reuse the session.
+            self._discard = True
+        return sent
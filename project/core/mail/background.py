@@ -0,0 +1,67 @@
+"""
+Send emails from a small pool of background threads.
+
+Used by the "background" EMAIL_DELIVERY mode: the request only schedules the
+email, and returns without waiting on the template rendering and the SMTP
+exchange. Emails still queued when the process exits are sent before it
+does, but those being sent when it crashes are lost; use the outbox when
+that matters.
+"""
+
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _reset_executor():
+    global _executor
+    _executor = None
+
+
+# A forked worker must start its own threads.
+os.register_at_fork(after_in_child=_reset_executor)
+
+
+def get_executor():
+    """Return the process-wide mail thread pool, starting it if needed."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.EMAIL_BACKGROUND_WORKERS,
+                thread_name_prefix="mail",
+            )
+        return _executor
+
+
+def shutdown_executor(wait=True):
+    """Stop the mail threads, sending the queued emails first if `wait`."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait)
+
+
+def _run(func, args, kwargs):
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception("Sending an email in the background failed.")
+    finally:
+        # Don't leave a connection open in the thread if the email used one.
+        close_old_connections()
+
+
+def submit(func, *args, **kwargs):
+    """Call `func` in a mail thread, logging its exceptions."""
+    return get_executor().submit(_run, func, args, kwargs)
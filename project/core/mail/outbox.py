@@ -0,0 +1,135 @@
+"""
+Email outbox.
+
+Request handlers only store emails in the outbox with `enqueue`, the
+`send_outbox` management command then drains it in batches over a single
+reused connection, retrying failed deliveries with exponential backoff.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from ..models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue(email_message):
+    """Store `email_message` in the outbox instead of sending it."""
+    return OutboxMessage.objects.enqueue(email_message)
+
+
+def to_email_message(message, connection=None):
+    """Build a django.core.mail.EmailMultiAlternatives from an outbox row."""
+    email_message = EmailMultiAlternatives(
+        message.subject,
+        message.body,
+        message.from_email,
+        message.to,
+        connection=connection,
+    )
+    if message.html_body:
+        email_message.attach_alternative(message.html_body, "text/html")
+    return email_message
+
+
+def claim_batch(batch_size, lease):
+    """
+    Claim up to `batch_size` due messages.
+
+    Claimed messages have their attempt counter increased and their next
+    attempt pushed `lease` seconds into the future, so concurrent workers skip
+    them and a crashed worker's batch becomes due again once the lease expires.
+    """
+    with transaction.atomic():
+        batch = list(
+            OutboxMessage.objects.due().select_for_update(skip_locked=True)[
+                :batch_size
+            ]
+        )
+        if batch:
+            OutboxMessage.objects.filter(pk__in=[m.pk for m in batch]).update(
+                attempts=F("attempts") + 1,
+                next_attempt_at=timezone.now() + timedelta(seconds=lease),
+            )
+            for message in batch:
+                message.attempts += 1
+    return batch
+
+
+def mark_failed(message, error, max_attempts, retry_delay):
+    """
+    Schedule a retry of `message` with exponential backoff, or give up once
+    `max_attempts` deliveries failed.
+    """
+    message.last_error = str(error)
+    if message.attempts >= max_attempts:
+        message.status = OutboxMessage.Status.FAILED
+    else:
+        backoff = retry_delay * 2 ** (message.attempts - 1)
+        message.next_attempt_at = timezone.now() + timedelta(seconds=backoff)
+    message.save(update_fields=["status", "last_error", "next_attempt_at"])
+
+
+def deliver_outbox(
+    batch_size=None,
+    max_attempts=None,
+    retry_delay=None,
+    lease=None,
+    connection=None,
+):
+    """
+    Send one batch of due outbox messages over a single connection.
+
+    Return a (sent, failed) tuple, (0, 0) means the outbox has nothing due.
+    """
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    max_attempts = max_attempts or settings.EMAIL_OUTBOX_MAX_ATTEMPTS
+    retry_delay = retry_delay or settings.EMAIL_OUTBOX_RETRY_DELAY
+    lease = lease or settings.EMAIL_OUTBOX_LEASE
+
+    batch = claim_batch(batch_size, lease=lease)
+    if not batch:
+        return 0, 0
+
+    connection = connection or get_connection(fail_silently=False)
+    sent = []
+    failed = 0
+    try:
+        for index, message in enumerate(batch):
+            try:
+                # Does nothing while the connection is open.
+                connection.open()
+            except Exception as e:
+                logger.warning("Failed to connect to the mail server: %s", e)
+                # The claim counted as an attempt for the rest of the batch.
+                for message in batch[index:]:
+                    mark_failed(message, e, max_attempts, retry_delay)
+                failed += len(batch) - index
+                break
+            try:
+                connection.send_messages([to_email_message(message)])
+            except Exception as e:
+                logger.warning("Failed to deliver outbox message %s: %s", message.pk, e)
+                mark_failed(message, e, max_attempts, retry_delay)
+                failed += 1
+                # The connection may be unusable after an error, start over.
+                connection.close()
+            else:
+                sent.append(message.pk)
+    finally:
+        connection.close()
+        # Messages neither sent nor marked failed keep their lease and are
+        # retried once it expires.
+        OutboxMessage.objects.filter(pk__in=sent).update(
+            status=OutboxMessage.Status.SENT,
+            sent_at=timezone.now(),
+            last_error="",
+        )
+    return len(sent), failed
@@ -1,47 +1,173 @@
-from django.core.management.base import BaseCommand
-from django.conf import settings
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connections
 
 import psycopg2
 
+from project.core import health
+from project.core.db.pool import PooledDatabaseWrapperMixin
+
+# Exit codes.
+HEALTHY = 0
+UNHEALTHY = 1
+UNREACHABLE = 2
+MISCONFIGURED = 3
+
 
 class Command(BaseCommand):
-    help = "Check if Postgres server is up and running."
+    help = (
+        "Check if Postgres server is up and running, and healthy. Exits with 0 "
+        "when healthy, 1 when a check failed, 2 when the server is unreachable "
+        "and 3 when the database isn't configured for Postgres."
+    )
 
-    def handle(self, *args, **kwargs):
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            default="default",
+            help="Database alias to check.",
+        )
+        parser.add_argument(
+            "--wait",
+            action="store_true",
+            help="Retry connecting, with exponential backoff, until --timeout.",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=30,
+            help="Seconds to wait for the server to accept connections.",
+        )
+        parser.add_argument(
+            "--latency",
+            type=int,
+            default=0,
+            metavar="N",
+            help="Run N round-trip queries and report latency percentiles.",
+        )
+        parser.add_argument(
+            "--min-headroom",
+            type=float,
+            default=10,
+            help="Minimum percentage of max_connections that must be free.",
+        )
+        parser.add_argument(
+            "--max-replication-lag",
+            type=float,
+            default=30,
+            help="Maximum replication lag, in seconds.",
+        )
+        parser.add_argument(
+            "--max-transaction-age",
+            type=float,
+            default=300,
+            help="Maximum age of open transactions, in seconds.",
+        )
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Output the results as JSON.",
+        )
+
+    def handle(self, *args, **options):
+        alias = options["database"]
+        result = {"database": alias, "status": "healthy", "checks": {}}
         try:
-            database = settings.DATABASES["default"]
-            database_engine = database["ENGINE"]
-
-            if database_engine == "django.db.backends.postgresql":
-                postgres_dbname = database["NAME"]
-                postgres_user = database["USER"]
-                postgres_password = database["PASSWORD"]
-                postgres_host = database["HOST"]
-                postgres_port = database["PORT"]
-            else:
-                self.stdout.write(
-                    self.style.ERROR("Your default database is NOT PostgreSQL.")
-                )
-                # Stop executing further
-                return None
+            wrapper = connections[alias]
         except Exception as e:
-            self.stdout.write(
-                self.style.ERROR(
-                    "Please make sure DATABASES settings are setup correctly in Django settings."
-                )
+            return self.finish(result, MISCONFIGURED, f"Invalid database: {e}", options)
+        if wrapper.vendor != "postgresql":
+            return self.finish(
+                result,
+                MISCONFIGURED,
+                f"The {alias} database is NOT PostgreSQL.",
+                options,
             )
-            self.stdout.write(self.style.WARNING(f"EXCEPTION: {e}"))
-            # Stop executing further
-            return None
 
+        params = {
+            **wrapper.get_connection_params(),
+            "connect_timeout": max(1, int(options["timeout"])),
+        }
+        started_at = time.monotonic()
+        deadline = started_at + (options["timeout"] if options["wait"] else 0)
         try:
-            psycopg2.connect(
-                dbname=postgres_dbname,
-                user=postgres_user,
-                password=postgres_password,
-                host=postgres_host,
-                port=postgres_port,
+            connection, attempts = health.wait_for(
+                lambda: psycopg2.connect(**params), deadline
+            )
+        except psycopg2.OperationalError as e:
+            result["checks"]["connect"] = {"ok": False, "error": str(e).strip()}
+            return self.finish(
+                result, UNREACHABLE, "Failed to connect to Postgres server.", options
             )
-            self.stdout.write(self.style.SUCCESS("Postgres server is up and running."))
-        except psycopg2.OperationalError:
-            self.stdout.write(self.style.ERROR("Failed to connect to Postgres server."))
+        result["checks"]["connect"] = {
+            "ok": True,
+            "attempts": attempts,
+            "seconds": round(time.monotonic() - started_at, 3),
+        }
+
+        try:
+            connection.autocommit = True
+            checks = result["checks"]
+            if options["latency"]:
+                checks["latency"] = health.measure_latency(
+                    connection, options["latency"]
+                )
+            checks["connections"] = health.check_connections(
+                connection, options["min_headroom"]
+            )
+            checks["replication"] = health.check_replication(
+                connection, options["max_replication_lag"]
+            )
+            checks["long_transactions"] = health.check_long_transactions(
+                connection, options["max_transaction_age"]
+            )
+        except psycopg2.Error as e:
+            result["checks"]["error"] = {"ok": False, "error": str(e).strip()}
+        finally:
+            connection.close()
+        if isinstance(wrapper, PooledDatabaseWrapperMixin):
+            result["checks"]["pool"] = self.check_pool(wrapper)
+
+        if all(check["ok"] for check in result["checks"].values()):
+            return self.finish(
+                result, HEALTHY, "Postgres server is up and running.", options
+            )
+        return self.finish(result, UNHEALTHY, "Postgres server is unhealthy.", options)
+
+    def check_pool(self, wrapper):
+        """
+        Check a connection out of the pool of this process and return the pool
+        statistics. The pool is new, so they show its configured sizes and
+        whether it can fill itself, not the activity of the application.
+        """
+        try:
+            wrapper.ensure_connection()
+            return {"ok": True, **wrapper.get_pool().get_stats()}
+        except DatabaseError as e:
+            return {"ok": False, "error": str(e).strip()}
+        finally:
+            wrapper.close()
+
+    def finish(self, result, code, message, options):
+        result["status"] = {
+            HEALTHY: "healthy",
+            UNHEALTHY: "unhealthy",
+            UNREACHABLE: "unreachable",
+            MISCONFIGURED: "misconfigured",
+        }[code]
+        result["message"] = message
+        if options["json"]:
+            self.stdout.write(json.dumps(result))
+        else:
+            for name, check in result["checks"].items():
+                details = ", ".join(
+                    f"{key} {value}" for key, value in check.items() if key != "ok"
+                )
+                style = self.style.SUCCESS if check["ok"] else self.style.ERROR
+                self.stdout.write(style(f"{name}: {details}"))
+        if code != HEALTHY:
+            raise CommandError(message, returncode=code)
+        if not options["json"]:
+            self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,78 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from project.core.mail.outbox import deliver_outbox
+
+
+class Command(BaseCommand):
+    help = "Deliver emails waiting in the outbox."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.EMAIL_OUTBOX_BATCH_SIZE,
+            help="Number of messages sent over a single connection.",
+        )
+        parser.add_argument(
+            "--max-attempts",
+            type=int,
+            default=settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+            help="Give up on a message after this many failed deliveries.",
+        )
+        parser.add_argument(
+            "--retry-delay",
+            type=int,
+            default=settings.EMAIL_OUTBOX_RETRY_DELAY,
+            help="Seconds before the first retry, doubled on every retry.",
+        )
+        parser.add_argument(
+            "--lease",
+            type=int,
+            default=settings.EMAIL_OUTBOX_LEASE,
+            help="Seconds to send a batch before other workers may claim it.",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep running and poll the outbox instead of exiting once drained.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5,
+            help="Seconds to sleep between polls when running with --loop.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            total_sent = total_failed = 0
+            while True:
+                try:
+                    sent, failed = deliver_outbox(
+                        batch_size=options["batch_size"],
+                        max_attempts=options["max_attempts"],
+                        retry_delay=options["retry_delay"],
+                        lease=options["lease"],
+                    )
+                except Exception as e:
+                    # The batch claimed before the error is retried once its
+                    # lease expires.
+                    self.stderr.write(self.style.ERROR(f"EXCEPTION: {e}"))
+                    break
+                if not sent and not failed:
+                    break
+                total_sent += sent
+                total_failed += failed
+
+            if total_sent or total_failed:
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"Sent {total_sent} message(s), {total_failed} failed."
+                    )
+                )
+            if not options["loop"]:
+                return None
+            time.sleep(options["interval"])
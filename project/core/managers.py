@@ -0,0 +1,31 @@
+from django.db import models
+from django.utils import timezone
+
+
+class OutboxMessageManager(models.Manager):
+    """Custom outbox message manager."""
+
+    def enqueue(self, email_message):
+        """
+        Store a django.core.mail.EmailMessage (or EmailMultiAlternatives) in
+        the outbox and return the created row.
+        """
+        html_body = ""
+        for content, mimetype in getattr(email_message, "alternatives", []):
+            if mimetype == "text/html":
+                html_body = content
+                break
+        return self.create(
+            subject=email_message.subject,
+            body=email_message.body,
+            html_body=html_body,
+            from_email=email_message.from_email,
+            to=list(email_message.to),
+        )
+
+    def due(self):
+        """Return pending messages whose next delivery attempt is due."""
+        return self.filter(
+            status=self.model.Status.PENDING,
+            next_attempt_at__lte=timezone.now(),
+        ).order_by("next_attempt_at", "pk")
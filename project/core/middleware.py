@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.utils.deprecation import MiddlewareMixin
+
+from . import routers, views
+
+
+class ReplicaMiddleware(MiddlewareMixin):
+    """
+    Pin the requests of a client that just wrote to the database, and the
+    views declared with decorators.use_primary(), to the primary database.
+    The writes of the views declared with decorators.read_only() don't pin.
+    """
+
+    cookie_name = "use_primary"
+
+    def process_request(self, request):
+        routers.reset()
+        if request.COOKIES.get(self.cookie_name):
+            routers.pin_to_primary()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if getattr(view_func, "use_primary", False):
+            routers.pin_to_primary()
+        routers.set_read_only(getattr(view_func, "read_only", False))
+
+    def process_response(self, request, response):
+        if routers.has_written() and settings.DATABASE_REPLICA_PIN_SECONDS:
+            response.set_cookie(
+                self.cookie_name,
+                "1",
+                max_age=settings.DATABASE_REPLICA_PIN_SECONDS,
+                secure=settings.SESSION_COOKIE_SECURE,
+                httponly=True,
+                samesite="Lax",
+            )
+        routers.reset()
+        return response
+
+
+class HealthCheckMiddleware:
+    """
+    Answer the health check URLs before the other middleware run: no
+    sessions, CSRF, locale or messages, and no host or HTTPS redirection, as
+    load balancers probe nodes by IP over HTTP. Must be the first middleware.
+    As the host isn't validated, the views don't disclose anything to clients
+    outside of HEALTH_CHECK_DETAIL_NETWORKS.
+    """
+
+    views = {"/healthz": views.healthz, "/readyz": views.readyz}
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        view = self.views.get(request.path_info)
+        if view is not None:
+            return view(request)
+        return self.get_response(request)
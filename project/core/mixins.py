@@ -0,0 +1,25 @@
+from .decorators import non_atomic, read_only, use_primary
+
+
+class NonAtomicMixin:
+    """Exclude the view from ATOMIC_REQUESTS, see decorators.non_atomic()."""
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        return non_atomic(super().as_view(**initkwargs))
+
+
+class ReadOnlyMixin:
+    """Mark the view as read-only, see decorators.read_only()."""
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        return read_only(super().as_view(**initkwargs))
+
+
+class UsePrimaryMixin:
+    """Read from the primary database, see decorators.use_primary()."""
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        return use_primary(super().as_view(**initkwargs))
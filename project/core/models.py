@@ -1,3 +1,50 @@
 from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
 
-# Create your models here.
+from .managers import OutboxMessageManager
+
+
+class OutboxMessage(models.Model):
+    """
+    An email waiting to be delivered by the `send_outbox` management command.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", _("Pending")
+        SENT = "sent", _("Sent")
+        FAILED = "failed", _("Failed")
+
+    subject = models.CharField(verbose_name=_("subject"), max_length=998)
+    body = models.TextField(verbose_name=_("body"))
+    html_body = models.TextField(verbose_name=_("HTML body"), blank=True)
+    from_email = models.CharField(verbose_name=_("from email"), max_length=254)
+    to = models.JSONField(verbose_name=_("recipients"), default=list)
+    status = models.CharField(
+        verbose_name=_("status"),
+        max_length=10,
+        choices=Status.choices,
+        default=Status.PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField(verbose_name=_("attempts"), default=0)
+    last_error = models.TextField(verbose_name=_("last error"), blank=True)
+    next_attempt_at = models.DateTimeField(
+        verbose_name=_("next attempt at"), default=timezone.now
+    )
+    created_at = models.DateTimeField(verbose_name=_("created at"), auto_now_add=True)
+    sent_at = models.DateTimeField(verbose_name=_("sent at"), null=True, blank=True)
+
+    objects = OutboxMessageManager()
+
+    class Meta:
+        verbose_name = _("outbox message")
+        verbose_name_plural = _("outbox messages")
+        indexes = [
+            models.Index(
+                fields=["status", "next_attempt_at"],
+                name="core_outbox_due_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return self.subject
@@ -0,0 +1,294 @@
+"""
+Pagination of large querysets.
+
+Counting the rows of a large table takes a full scan, and OFFSET pagination
+reads every row it skips. EstimatedCountPaginator uses the row count
+estimated by the database when it's large, and fetches deep pages by keyset:
+the rows following the last one of the previous page in the queryset
+ordering, which is a range scan of the index on the ordering fields.
+
+Keyset pagination only saves the scan when paging sequentially: the
+previous, next and last pages are located from the current one, or from the
+end of the queryset. Other pages still read the keys of the rows they skip,
+which a filtered queryset reads from the table rather than from the index.
+"""
+
+import json
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import EmptyResultSet, FieldDoesNotExist
+from django.core.paginator import EmptyPage, Paginator
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+
+# Query string parameter of the keyset cursor of a page.
+CURSOR_VAR = "cursor"
+CURSOR_SALT = "project.core.paginator"
+
+
+def estimate_count(queryset):
+    """
+    Return the number of rows of `queryset` estimated by the database, or
+    None when it can't. PostgreSQL estimates any query with the planner,
+    SQLite only whole tables, from the statistics gathered by ANALYZE.
+    """
+    connection = connections[queryset.db]
+    query = queryset.query
+    if connection.vendor == "postgresql":
+        try:
+            sql, params = query.chain().get_compiler(using=queryset.db).as_sql()
+        except EmptyResultSet:
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return plan[0]["Plan"]["Plan Rows"]
+    if connection.vendor == "sqlite":
+        if (
+            query.where
+            or query.distinct
+            or query.combinator
+            or query.is_sliced
+            or query.extra
+        ):
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND "
+                "name = 'sqlite_stat1'"
+            )
+            if cursor.fetchone() is None:
+                return None
+            # The first number of the statistics of an index is the number of
+            # rows it holds.
+            cursor.execute(
+                "SELECT stat FROM sqlite_stat1 WHERE tbl = %s",
+                [queryset.model._meta.db_table],
+            )
+            counts = [int(stat.split()[0]) for (stat,) in cursor.fetchall()]
+        return max(counts, default=None)
+    return None
+
+
+def unique_prefix(model, ordering):
+    """
+    Return the fields of `ordering` up to the first unique and non-null one:
+    the following ones don't change the order.
+    """
+    prefix = []
+    for field in ordering:
+        prefix.append(field)
+        name = field.removeprefix("-")
+        if name == "pk":
+            break
+        try:
+            model_field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            continue
+        if model_field.unique and not model_field.null:
+            break
+    return tuple(prefix)
+
+
+def reverse_ordering(ordering):
+    return tuple(
+        field.removeprefix("-") if field.startswith("-") else f"-{field}"
+        for field in ordering
+    )
+
+
+def keyset_filter(ordering, key):
+    """
+    Return a filter of the rows following the `key` values of the `ordering`
+    fields, which must be non-null.
+    """
+    condition = None
+    for field, value in reversed(list(zip(ordering, key))):
+        lookup = "lt" if field.startswith("-") else "gt"
+        field = field.removeprefix("-")
+        following = Q(**{f"{field}__{lookup}": value})
+        if condition is not None:
+            following |= Q(**{field: value}) & condition
+        condition = following
+    # The bound on the first field alone gives the database an index range.
+    first = ordering[0]
+    lookup = "lte" if first.startswith("-") else "gte"
+    return Q(**{f"{first.removeprefix('-')}__{lookup}": key[0]}) & condition
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginate a queryset using the row count estimated by the database when
+    it's at least `estimate_threshold`, and keyset pagination for the pages
+    past `keyset_offset` rows when the queryset is ordered by the `keyset`
+    fields.
+
+    `cursor` is the value returned by get_cursor() or get_previous_cursor()
+    for an adjacent page, if any. Without it, the key of the previous page is
+    read from the keyset fields alone, which the index on them covers when
+    the queryset isn't filtered. The keyset is cut after its first unique
+    field.
+
+    Estimated counts may be off in both directions: the pages past the
+    estimated last one can be requested, and may be empty.
+    """
+
+    def __init__(
+        self,
+        object_list,
+        per_page,
+        orphans=0,
+        allow_empty_first_page=True,
+        keyset=(),
+        cursor=None,
+        estimate_threshold=None,
+        keyset_offset=None,
+    ):
+        super().__init__(object_list, per_page, orphans, allow_empty_first_page)
+        if isinstance(object_list, QuerySet):
+            keyset = unique_prefix(object_list.model, keyset)
+        self.keyset = tuple(keyset)
+        self.cursor = cursor
+        if estimate_threshold is None:
+            estimate_threshold = settings.ESTIMATED_COUNT_THRESHOLD
+        self.estimate_threshold = estimate_threshold
+        if keyset_offset is None:
+            keyset_offset = settings.KEYSET_PAGINATION_OFFSET
+        self.keyset_offset = keyset_offset
+        self.estimated = False
+
+    @cached_property
+    def count(self):
+        if isinstance(self.object_list, QuerySet):
+            estimate = estimate_count(self.object_list)
+            if estimate is not None and estimate >= self.estimate_threshold:
+                self.estimated = True
+                return int(estimate)
+        return super().count
+
+    @cached_property
+    def uses_keyset(self):
+        if not self.keyset or not isinstance(self.object_list, QuerySet):
+            return False
+        query = self.object_list.query
+        # Repeated fields, as in the admin changelist ordering, are no-ops.
+        ordering = {}
+        for field in query.order_by:
+            if not isinstance(field, str):
+                return False
+            ordering.setdefault(field.removeprefix("-"), field)
+        return (
+            unique_prefix(self.object_list.model, ordering.values()) == self.keyset
+            and not query.extra_order_by
+        )
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            if self.estimated and int(number) > 1:
+                return int(number)
+            raise
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        if self.uses_keyset and bottom >= max(self.keyset_offset, 1):
+            key = self.get_key(number)
+            if key is None:
+                object_list = self.object_list.none()
+            else:
+                object_list = self.object_list.filter(keyset_filter(self.keyset, key))[
+                    : self.per_page
+                ]
+            return self._get_page(object_list, number, self)
+        if self.estimated:
+            # The last page can't be told from the estimate.
+            top = bottom + self.per_page
+            return self._get_page(self.object_list[bottom:top], number, self)
+        return super().page(number)
+
+    def get_key(self, number):
+        """
+        Return the keyset values of the last row of the page before page
+        `number`, or None when there's no such row.
+        """
+        fields = [field.removeprefix("-") for field in self.keyset]
+        if self.cursor:
+            try:
+                cursor_number, following, *key = signing.loads(
+                    self.cursor, salt=CURSOR_SALT
+                )
+            except (signing.BadSignature, TypeError, ValueError):
+                pass
+            else:
+                if cursor_number == number and len(key) == len(self.keyset):
+                    if following:
+                        return key
+                    # The key of the first row of the next page.
+                    preceding = self.get_preceding_key(self.per_page, key)
+                    if preceding is not None:
+                        return preceding
+        if number == self.num_pages:
+            # Count back from the end.
+            rows = self.count - (number - 1) * self.per_page
+            preceding = self.get_preceding_key(rows)
+            if preceding is not None:
+                return preceding
+        offset = (number - 1) * self.per_page - 1
+        key = self.object_list.order_by(*self.keyset).values_list(*fields)[
+            offset : offset + 1
+        ]
+        return list(key[0]) if key else None
+
+    def get_preceding_key(self, rows, key=None):
+        """
+        Return the keyset values of the row preceding the last `rows` rows,
+        or those preceding the `key` values, or None when there's no such
+        row. The index on the keyset fields is read backward.
+        """
+        fields = [field.removeprefix("-") for field in self.keyset]
+        ordering = reverse_ordering(self.keyset)
+        queryset = self.object_list
+        if key is not None:
+            queryset = queryset.filter(keyset_filter(ordering, key))
+        preceding = queryset.order_by(*ordering).values_list(*fields)[rows : rows + 1]
+        return list(preceding[0]) if preceding else None
+
+    def get_cursor(self, number, object_list):
+        """
+        Return the cursor of the page after page `number`, holding
+        `object_list`, or None when it doesn't use keyset pagination.
+        """
+        if not self.uses_keyset or number * self.per_page < self.keyset_offset:
+            return None
+        rows = list(object_list)
+        if not rows:
+            return None
+        return self._make_cursor(number + 1, True, rows[-1])
+
+    def get_previous_cursor(self, number, object_list):
+        """
+        Return the cursor of the page before page `number`, holding
+        `object_list`, or None when it doesn't use keyset pagination.
+        """
+        if not self.uses_keyset or (number - 2) * self.per_page < max(
+            self.keyset_offset, 1
+        ):
+            return None
+        rows = list(object_list)
+        if not rows:
+            return None
+        return self._make_cursor(number - 1, False, rows[0])
+
+    def _make_cursor(self, number, following, row):
+        """
+        Return the cursor of page `number`, which follows `row` or precedes
+        it.
+        """
+        key = [getattr(row, field.removeprefix("-")) for field in self.keyset]
+        return signing.dumps([number, following, *key], salt=CURSOR_SALT)
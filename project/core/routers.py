@@ -0,0 +1,117 @@
+"""
+Send reads to the read replicas listed in DATABASE_REPLICAS, and writes to
+the primary ("default") database.
+
+Replicas lag behind the primary. Once a thread (a request) writes, its
+reads go to the primary too, so it reads its own writes. ReplicaMiddleware
+extends that to the client's next requests for DATABASE_REPLICA_PIN_SECONDS,
+and pins the views declared with decorators.use_primary().
+
+Some writes don't pin: those of the views declared with
+decorators.read_only(), those made in an unpinned() block, and those to the
+session and database cache tables. Sessions and cache entries are always
+read from the primary instead, they must not lag.
+"""
+
+import random
+from contextlib import contextmanager
+
+from asgiref.local import Local
+from django.conf import settings
+from django.contrib.sessions.base_session import AbstractBaseSession
+from django.db import DEFAULT_DB_ALIAS
+
+_state = Local()
+
+
+def pin_to_primary():
+    """Send the reads of the current request to the primary database."""
+    _state.pinned = True
+
+
+def is_pinned():
+    return getattr(_state, "pinned", False)
+
+
+def has_written():
+    """Return whether the current request wrote to the database."""
+    return getattr(_state, "written", False)
+
+
+def set_read_only(read_only=True):
+    """Declare whether the current request only reads from the database."""
+    _state.read_only = read_only
+
+
+def is_read_only():
+    return getattr(_state, "read_only", False)
+
+
+def reset():
+    """Forget the writes and the pinning, at the start of a request."""
+    _state.pinned = False
+    _state.written = False
+    _state.read_only = False
+    _state.unpinned = False
+
+
+@contextmanager
+def unpinned():
+    """
+    Don't pin the current request for the writes inside the block, for data
+    that can be read from a lagging replica.
+    """
+    unpinned = getattr(_state, "unpinned", False)
+    _state.unpinned = True
+    try:
+        yield
+    finally:
+        _state.unpinned = unpinned
+
+
+def is_primary_only(model):
+    """Return whether `model` is always read from the primary."""
+    return (
+        issubclass(model, AbstractBaseSession)
+        or model._meta.app_label == "django_cache"
+    )
+
+
+@contextmanager
+def use_primary():
+    """Read from the primary database inside the block."""
+    pinned = is_pinned()
+    pin_to_primary()
+    try:
+        yield
+    finally:
+        _state.pinned = pinned
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas or is_pinned() or has_written() or is_primary_only(model):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        if not (
+            is_read_only()
+            or getattr(_state, "unpinned", False)
+            or is_primary_only(model)
+        ):
+            _state.written = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get the schema from the primary.
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
@@ -0,0 +1,81 @@
+"""
+A minimal in-process SMTP server standing in for the real mail server in
+tests and benchmarks. It accepts every message and counts sessions, an
+optional `latency` (in seconds) is added to every reply to mimic a remote
+server.
+"""
+
+import socketserver
+import threading
+import time
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        self.server.count_session()
+        self.reply("220 localhost ESMTP stand-in")
+        data = None
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                break
+            if data is not None:
+                if line.rstrip(b"\r\n") == b".":
+                    self.server.messages.append(b"".join(data))
+                    data = None
+                    self.reply("250 OK")
+                else:
+                    data.append(line)
+                continue
+            command = line[:4].upper()
+            if command in (b"EHLO", b"HELO"):
+                self.reply("250 localhost")
+            elif command in (b"MAIL", b"RCPT", b"RSET", b"NOOP"):
+                self.reply("250 OK")
+            elif command == b"DATA":
+                data = []
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+            elif command == b"QUIT":
+                self.reply("221 Bye")
+                break
+            else:
+                self.reply("502 Command not implemented")
+
+
+class SMTPServer(socketserver.ThreadingTCPServer):
+    """
+    Usage:
+
+        with SMTPServer() as server:
+            get_connection(host=server.host, port=server.port).send_messages(...)
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0):
+        super().__init__((host, port), SMTPHandler)
+        self.host, self.port = self.server_address
+        self.latency = latency
+        self.messages = []
+        self.sessions = 0
+        self._lock = threading.Lock()
+
+    def count_session(self):
+        with self._lock:
+            self.sessions += 1
+
+    def __enter__(self):
+        threading.Thread(
+            target=self.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        ).start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
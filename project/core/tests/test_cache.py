@@ -0,0 +1,310 @@
+import contextlib
+import os
+import shutil
+import struct
+import tempfile
+from unittest import mock
+
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, override_settings
+
+from project.core.cache.backends import sharedmem, tiered
+
+
+class TieredCacheTests(SimpleTestCase):
+    def setUp(self):
+        settings = override_settings(
+            CACHES={
+                "default": {
+                    "BACKEND": "project.core.cache.backends.tiered.TieredCache",
+                    "LOCATION": "test",
+                    "OPTIONS": {
+                        "L2": "shared",
+                        "MAX_ENTRIES": 3,
+                        "L1_TIMEOUT": 60,
+                        "SYNC_INTERVAL": 0,
+                    },
+                },
+                # A stand-in for Redis, shared by the workers of the tests.
+                "shared": {
+                    "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                    "LOCATION": "tiered-test",
+                },
+            }
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.addCleanup(tiered._tiers.clear)
+        self.addCleanup(caches["shared"].clear)
+
+    def make_worker(self):
+        """Return the cache of a new process, with its own L1."""
+        cache = caches.create_connection("default")
+        cache._l1 = tiered.LocalTier(cache._max_entries)
+        return cache
+
+    def test_l1_hit(self):
+        cache = self.make_worker()
+        cache.set("key", {"a": 1})
+        # Served by L1 even when L2 loses it.
+        caches["shared"].delete("key")
+        self.assertEqual(cache.get("key"), {"a": 1})
+        self.assertEqual(cache.get_stats()["l1_hits"], 1)
+
+    def test_l2_hit(self):
+        first, second = self.make_worker(), self.make_worker()
+        first.set("key", "value")
+        self.assertEqual(second.get("key"), "value")
+        self.assertEqual(second.get("key"), "value")
+        stats = second.get_stats()
+        self.assertEqual(stats["l2_hits"], 1)
+        self.assertEqual(stats["l1_hits"], 1)
+
+    def test_miss(self):
+        cache = self.make_worker()
+        self.assertIsNone(cache.get("missing"))
+        self.assertEqual(cache.get("missing", "default"), "default")
+        self.assertEqual(cache.get_stats()["misses"], 2)
+
+    def test_cached_none(self):
+        cache = self.make_worker()
+        cache.set("key", None)
+        self.assertIsNone(cache.get("key", "default"))
+
+    def test_lru_eviction(self):
+        cache = self.make_worker()
+        for key in "abc":
+            cache.set(key, key)
+        cache.get("a")
+        cache.set("d", "d")
+        self.assertEqual(cache.get_stats()["evictions"], 1)
+        self.assertEqual(list(cache._l1.entries), [":1:c", ":1:a", ":1:d"])
+        # Evicted from L1 only.
+        self.assertEqual(cache.get("b"), "b")
+
+    def test_write_invalidates_other_workers(self):
+        first, second = self.make_worker(), self.make_worker()
+        first.set("key", "old")
+        self.assertEqual(second.get("key"), "old")
+        first.set("key", "new")
+        self.assertEqual(second.get("key"), "new")
+        first.delete("key")
+        self.assertIsNone(second.get("key"))
+        self.assertEqual(second.get_stats()["invalidations"], 2)
+
+    def test_incr_invalidates_other_workers(self):
+        first, second = self.make_worker(), self.make_worker()
+        first.set("counter", 1)
+        self.assertEqual(second.get("counter"), 1)
+        self.assertEqual(first.incr("counter"), 2)
+        self.assertEqual(second.get("counter"), 2)
+
+    def test_many(self):
+        first, second = self.make_worker(), self.make_worker()
+        first.set_many({"a": 1, "b": 2})
+        self.assertEqual(second.get_many(["a", "b", "c"]), {"a": 1, "b": 2})
+        first.delete_many(["a"])
+        self.assertEqual(second.get_many(["a", "b"]), {"b": 2})
+
+    def test_versions(self):
+        first, second = self.make_worker(), self.make_worker()
+        first.set("key", "v1", version=1)
+        first.set("key", "v2", version=2)
+        self.assertEqual(second.get("key", version=1), "v1")
+        self.assertEqual(second.get("key", version=2), "v2")
+
+    def test_add(self):
+        first, second = self.make_worker(), self.make_worker()
+        self.assertTrue(first.add("key", "first"))
+        self.assertFalse(second.add("key", "second"))
+        self.assertEqual(second.get("key"), "first")
+
+    def test_stale_read_until_sync(self):
+        first, second = self.make_worker(), self.make_worker()
+        second._sync_interval = 60
+        first.set("key", "old")
+        self.assertEqual(second.get("key"), "old")
+        first.set("key", "new")
+        self.assertEqual(second.get("key"), "old")
+        second._l1.synced_at = 0
+        self.assertEqual(second.get("key"), "new")
+
+    def test_clear_when_too_far_behind(self):
+        first, second = self.make_worker(), self.make_worker()
+        second.set("key", "value")
+        second.get("key")
+        for n in range(tiered.MAX_LOG_READ + 1):
+            first.set(f"other{n}", n)
+        self.assertEqual(second.get("key"), "value")
+        self.assertEqual(second.get_stats()["clears"], 1)
+
+    def test_clear_when_log_lost(self):
+        first, second = self.make_worker(), self.make_worker()
+        first.set("key", "old")
+        second.get("key")
+        caches["shared"].clear()
+        first.set("key", "new")
+        self.assertEqual(second.get("key"), "new")
+
+    def test_l1_timeout_capped_by_timeout(self):
+        cache = self.make_worker()
+        cache.set("key", "value", timeout=0)
+        self.assertIsNone(cache.get("key"))
+
+    def test_write_round_trips(self):
+        cache = self.make_worker()
+        cache._sync_interval = 60
+        cache.set("key", 1)
+        l2 = caches["shared"]
+        with contextlib.ExitStack() as stack:
+            methods = {
+                name: stack.enter_context(
+                    mock.patch.object(l2, name, wraps=getattr(l2, name))
+                )
+                for name in ["get", "get_many", "add", "incr", "set_many"]
+            }
+            cache.set("key", 2)
+        # Besides the value, the log counter and the log entry.
+        self.assertEqual(
+            {name: method.call_count for name, method in methods.items()},
+            {"get": 0, "get_many": 0, "add": 0, "incr": 1, "set_many": 1},
+        )
+
+    def test_l2_without_atomic_incr(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location)
+        shared = {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": location,
+        }
+        with self.settings(CACHES={**caches.settings, "shared": shared}):
+            first, second = self.make_worker(), self.make_worker()
+            self.assertIs(first.enabled, False)
+            first.set("key", "old")
+            self.assertEqual(second.get("key"), "old")
+            first.set("key", "new")
+            self.assertEqual(second.get("key"), "new")
+            self.assertEqual(second.get_stats()["l2_hits"], 2)
+            # Without the invalidation log.
+            self.assertEqual(len(os.listdir(location)), 1)
+
+
+class SharedMemoryCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, "cache")
+        settings = override_settings(
+            CACHES={
+                "default": {
+                    "BACKEND": (
+                        "project.core.cache.backends.sharedmem.SharedMemoryCache"
+                    ),
+                    "LOCATION": self.path,
+                    "OPTIONS": {"MAX_ENTRIES": 4, "SLOT_SIZE": 256, "WAYS": 2},
+                }
+            }
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.addCleanup(self.close_table)
+        self.cache = caches["default"]
+
+    def close_table(self):
+        table = sharedmem._tables.pop(self.path, None)
+        if table is not None:
+            table.close()
+
+    def keys_in_one_set(self, count):
+        """Return `count` keys stored in the same set."""
+        table = self.cache._table
+        keys = {}
+        for n in range(1000):
+            key = f"key{n}"
+            slots = table.slots(table.hash(self.cache._key(key, None)))
+            keys.setdefault(slots.start, []).append(key)
+        return next(keys for keys in keys.values() if len(keys) >= count)[:count]
+
+    def test_get_set(self):
+        self.assertIsNone(self.cache.get("key"))
+        self.cache.set("key", {"a": 1})
+        self.assertEqual(self.cache.get("key"), {"a": 1})
+        self.cache.set("key", None)
+        self.assertIsNone(self.cache.get("key", "default"))
+        self.assertEqual(self.cache.get_stats()["hits"], 2)
+        self.assertEqual(self.cache.get_stats()["misses"], 1)
+
+    def test_versions(self):
+        self.cache.set("key", 1, version=1)
+        self.cache.set("key", 2, version=2)
+        self.assertEqual(self.cache.get("key", version=1), 1)
+        self.assertEqual(self.cache.get("key", version=2), 2)
+
+    def test_expiry(self):
+        self.cache.set("key", "value", timeout=0)
+        self.assertIsNone(self.cache.get("key"))
+        self.cache.set("key", "value")
+        self.assertTrue(self.cache.touch("key", timeout=0))
+        self.assertFalse(self.cache.has_key("key"))
+
+    def test_add_incr_delete(self):
+        self.assertTrue(self.cache.add("counter", 1))
+        self.assertFalse(self.cache.add("counter", 5))
+        self.assertEqual(self.cache.incr("counter", 2), 3)
+        self.assertEqual(self.cache.get("counter"), 3)
+        self.assertTrue(self.cache.delete("counter"))
+        self.assertFalse(self.cache.delete("counter"))
+        with self.assertRaises(ValueError):
+            self.cache.incr("counter")
+
+    def test_lru_eviction(self):
+        first, second, third = self.keys_in_one_set(3)
+        self.cache.set(first, 1)
+        self.cache.set(second, 2)
+        self.cache.get(first)
+        self.cache.set(third, 3)
+        self.assertEqual(self.cache.get_stats()["evictions"], 1)
+        self.assertEqual(
+            self.cache.get_many([first, second, third]), {first: 1, third: 3}
+        )
+
+    def test_value_too_large(self):
+        self.cache.set("key", "small")
+        self.cache.set("key", "x" * 1000)
+        self.assertIsNone(self.cache.get("key"))
+        self.assertFalse(self.cache.add("other", "x" * 1000))
+
+    def test_clear(self):
+        self.cache.set_many({"a": 1, "b": 2})
+        self.cache.clear()
+        self.assertEqual(self.cache.get_many(["a", "b"]), {})
+        self.assertEqual(self.cache.get_stats()["entries"], 0)
+
+    def test_read_during_write_misses(self):
+        self.cache.set("key", "value")
+        table = self.cache._table
+        key_hash = table.hash(self.cache._key("key", None))
+        for offset in table.slots(key_hash):
+            seq = struct.unpack_from("Q", table.mm, offset)[0]
+            struct.pack_into("Q", table.mm, offset, seq | 1)
+        self.assertIsNone(self.cache.get("key"))
+
+    def test_shared_between_processes(self):
+        self.cache.set("parent", 1)
+        pid = os.fork()
+        if pid == 0:
+            try:
+                cache = caches["default"]
+                ok = cache.get("parent") == 1
+                cache.set("child", 2)
+            finally:
+                os._exit(0 if ok else 1)
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+        self.assertEqual(self.cache.get("child"), 2)
+
+    def test_other_options(self):
+        self.cache.set("key", 1)
+        with self.assertRaises(ImproperlyConfigured):
+            sharedmem.Table(self.path, 8, 256, 2)
@@ -0,0 +1,110 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from project.core.db import pool
+from project.core.db.backends.sqlite3.base import DatabaseWrapper
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    def make_pool(self, **kwargs):
+        return pool.ConnectionPool(
+            lambda: sqlite3.connect(":memory:", check_same_thread=False), **kwargs
+        )
+
+    def test_reuse(self):
+        connections = self.make_pool(max_size=2)
+        first = connections.acquire()
+        connections.release(first)
+        self.assertIs(connections.acquire(), first)
+        stats = connections.get_stats()
+        self.assertEqual(stats["created"], 1)
+        self.assertEqual(stats["reused"], 1)
+        self.assertEqual(stats["in_use"], 1)
+
+    def test_timeout(self):
+        connections = self.make_pool(max_size=1, timeout=0.05)
+        connections.acquire()
+        with self.assertRaises(pool.PoolTimeout):
+            connections.acquire()
+        self.assertEqual(connections.get_stats()["timeouts"], 1)
+
+    def test_wait_for_release(self):
+        connections = self.make_pool(max_size=1, timeout=5)
+        first = connections.acquire()
+        threading.Timer(0.05, connections.release, [first]).start()
+        self.assertIs(connections.acquire(), first)
+        self.assertEqual(connections.get_stats()["waits"], 1)
+
+    def test_discard(self):
+        connections = self.make_pool(max_size=1)
+        connections.release(connections.acquire(), discard=True)
+        self.assertIsNot(connections.acquire(), None)
+        stats = connections.get_stats()
+        self.assertEqual((stats["created"], stats["discarded"]), (2, 1))
+
+    def test_health_check(self):
+        def check(connection):
+            connection.execute("SELECT 1")
+
+        connections = self.make_pool(check=check, check_interval=0)
+        first = connections.acquire()
+        connections.release(first)
+        first.close()
+        self.assertIsNot(connections.acquire(), first)
+        self.assertEqual(connections.get_stats()["discarded"], 1)
+
+    def test_max_idle(self):
+        connections = self.make_pool(min_size=1, max_idle=0)
+        connections.fill()
+        first, second = connections.acquire(), connections.acquire()
+        connections.release(first)
+        connections.release(second)
+        # Only the connections above min_size are closed.
+        connections.acquire()
+        self.assertEqual(connections.get_stats()["size"], 1)
+
+    def test_max_idle_below_top(self):
+        connections = self.make_pool(max_idle=0.05)
+        first, second = connections.acquire(), connections.acquire()
+        connections.release(first)
+        time.sleep(0.1)
+        connections.release(second)
+        # The most recently released connection is reused, and the expired
+        # one under it closed.
+        self.assertIs(connections.acquire(), second)
+        stats = connections.get_stats()
+        self.assertEqual((stats["size"], stats["idle"], stats["discarded"]), (1, 0, 1))
+
+
+class PooledBackendTests(TestCase):
+    def setUp(self):
+        self.addCleanup(pool._pools.pop, "pooled", None)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "pooled.sqlite3")
+
+    def test_close_returns_connection_to_pool(self):
+        settings_dict = {
+            **connection.settings_dict,
+            "ENGINE": "project.core.db.backends.sqlite3",
+            "NAME": self.path,
+            "POOL": {"MIN_SIZE": 1, "MAX_SIZE": 2},
+        }
+        wrapper = DatabaseWrapper(settings_dict, alias="pooled")
+        with wrapper.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        raw_connection = wrapper.connection
+        wrapper.close()
+        stats = wrapper.get_pool().get_stats()
+        self.assertEqual((stats["size"], stats["idle"]), (1, 1))
+
+        wrapper.ensure_connection()
+        self.assertIs(wrapper.connection, raw_connection)
+        wrapper.close()
+        wrapper.get_pool().clear()
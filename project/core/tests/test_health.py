@@ -0,0 +1,101 @@
+import sqlite3
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from project.core import health
+
+
+class WaitForTests(SimpleTestCase):
+    def test_backoff_until_connected(self):
+        connect = mock.Mock(side_effect=[OSError, OSError, "connection"])
+        with mock.patch("time.sleep") as sleep:
+            result = health.wait_for(connect, time.monotonic() + 60, initial_delay=1)
+        self.assertEqual(result, ("connection", 3))
+        self.assertEqual([call.args[0] for call in sleep.call_args_list], [1, 2])
+
+    def test_deadline(self):
+        connect = mock.Mock(side_effect=OSError("refused"))
+        with self.assertRaisesMessage(OSError, "refused"):
+            health.wait_for(connect, time.monotonic() + 0.05, initial_delay=0.01)
+        self.assertGreater(connect.call_count, 1)
+
+    def test_no_wait(self):
+        connect = mock.Mock(side_effect=OSError)
+        with self.assertRaises(OSError):
+            health.wait_for(connect, time.monotonic())
+        self.assertEqual(connect.call_count, 1)
+
+
+class MeasureLatencyTests(SimpleTestCase):
+    def test_percentiles(self):
+        connection = sqlite3.connect(":memory:")
+        result = health.measure_latency(connection, 20)
+        connection.close()
+        self.assertEqual(result["count"], 20)
+        self.assertLessEqual(result["p50_ms"], result["p95_ms"])
+        self.assertLessEqual(result["p95_ms"], result["p99_ms"])
+
+
+class HealthEndpointTests(TestCase):
+    def setUp(self):
+        health._readiness = (0, None)
+
+    def test_healthz(self):
+        with self.assertNumQueries(0):
+            # Load balancers probe nodes by IP, not by an allowed host name.
+            response = self.client.get("/healthz", HTTP_HOST="10.0.0.5")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b"ok")
+        self.assertFalse(response.cookies)
+        self.assertNotIn("X-Frame-Options", response)
+
+    @override_settings(HEALTH_CHECK_DETAIL_NETWORKS=["127.0.0.0/8"])
+    def test_readyz(self):
+        response = self.client.get("/readyz", HTTP_HOST="10.0.0.5")
+        self.assertEqual(response.status_code, 200)
+        result = response.json()
+        self.assertIs(result["ok"], True)
+        self.assertEqual(set(result["checks"]), {"database:default", "cache:default"})
+        # Through a proxy, the client may be anyone.
+        response = self.client.get("/readyz", HTTP_X_FORWARDED_FOR="203.0.113.7")
+        self.assertEqual(response.json(), {"ok": True})
+
+    def test_readyz_without_detail(self):
+        response = self.client.get("/readyz")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"ok": True})
+
+    @override_settings(HEALTH_CHECK_CACHE_TTL=60)
+    def test_readyz_is_cached(self):
+        self.client.get("/readyz")
+        with self.assertNumQueries(0):
+            self.client.get("/readyz")
+
+    def test_readyz_failure(self):
+        with mock.patch.object(
+            health, "check_cache", return_value={"ok": False, "error": "down"}
+        ):
+            response = self.client.get("/readyz")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json(), {"ok": False})
+
+    def test_check_error_is_logged(self):
+        with mock.patch.object(health, "ping", side_effect=Exception("password")):
+            with self.assertLogs("project.core.health", "ERROR") as logs:
+                result = health.check_database("default")
+        self.assertEqual(result, {"ok": False})
+        self.assertIn("password", logs.output[0])
+
+    def test_pool_stats(self):
+        self.assertNotIn("pool", health.check_database("default"))
+        pool = mock.Mock(**{"get_stats.return_value": {"size": 1}})
+        with mock.patch.object(health, "get_pools", return_value={"default": pool}):
+            result = health.check_database("default")
+        self.assertEqual(result["pool"], {"size": 1})
+
+    def test_urls(self):
+        self.assertEqual(reverse("healthz"), "/healthz")
+        self.assertEqual(reverse("readyz"), "/readyz")
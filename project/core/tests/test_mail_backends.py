@@ -0,0 +1,92 @@
+import socket
+
+from django.core.mail import EmailMessage, get_connection
+from django.test import SimpleTestCase
+
+from project.core.mail.backends import pooled
+
+from .smtpserver import SMTPServer
+
+
+class PooledEmailBackendTests(SimpleTestCase):
+    def setUp(self):
+        self.server = SMTPServer().__enter__()
+        self.addCleanup(self.server.__exit__)
+
+    def get_connection(
+        self, backend="project.core.mail.backends.pooled.EmailBackend", **kwargs
+    ):
+        return get_connection(
+            backend, host=self.server.host, port=self.server.port, **kwargs
+        )
+
+    def send(self, count, **kwargs):
+        for i in range(count):
+            EmailMessage(
+                f"Subject {i}",
+                "Body",
+                "from@example.com",
+                ["to@example.com"],
+                connection=self.get_connection(**kwargs),
+            ).send()
+
+    def tearDown(self):
+        for pool in pooled._pools.values():
+            pool.clear()
+        pooled._pools.clear()
+
+    def test_sessions_are_reused_across_backends(self):
+        self.send(20)
+
+        self.assertEqual(len(self.server.messages), 20)
+        self.assertEqual(self.server.sessions, 1)
+
+    def test_smtp_backend_opens_a_session_per_message(self):
+        self.send(5, backend="django.core.mail.backends.smtp.EmailBackend")
+
+        self.assertEqual(self.server.sessions, 5)
+
+    def test_send_messages_uses_one_session(self):
+        messages = [
+            EmailMessage("Subject", "Body", "from@example.com", ["to@example.com"])
+            for _ in range(10)
+        ]
+
+        self.assertEqual(self.get_connection().send_messages(messages), 10)
+        self.assertEqual(self.server.sessions, 1)
+
+    def test_pool_size_is_bounded(self):
+        connections = [self.get_connection(pool_size=2) for _ in range(3)]
+        for connection in connections:
+            connection.open()
+        for connection in connections:
+            connection.close()
+
+        pool = connections[0].pool
+        self.assertEqual(len(pool), 2)
+        self.assertEqual(pool.stats["discarded"], 1)
+
+    def test_pool_options(self):
+        self.assertIs(self.get_connection().pool, self.get_connection().pool)
+        pool = self.get_connection(pool_size=2).pool
+        self.assertEqual(pool.max_size, 2)
+        self.assertIsNot(pool, self.get_connection().pool)
+        self.assertIsNot(pool, self.get_connection(pool_size=2, pool_max_idle=0).pool)
+
+    def test_idle_sessions_expire(self):
+        self.send(1, pool_max_idle=0)
+        self.send(1, pool_max_idle=0)
+
+        self.assertEqual(self.server.sessions, 2)
+
+    def test_unhealthy_sessions_are_discarded(self):
+        self.send(1, pool_health_check_interval=0)
+        pool = self.get_connection(pool_health_check_interval=0).pool
+        # Simulate the server dropping the idle session.
+        pool._idle[0][0].sock.shutdown(socket.SHUT_RDWR)
+
+        self.send(1, pool_health_check_interval=0)
+
+        self.assertEqual(len(self.server.messages), 2)
+        self.assertEqual(self.server.sessions, 2)
+        self.assertEqual(pool.stats["discarded"], 1)
@@ -0,0 +1,187 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core import mail
+from django.core.mail import EmailMultiAlternatives
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from project.accounts.utils import send_mail
+from project.core.mail import background
+from project.core.mail.outbox import deliver_outbox, enqueue
+from project.core.models import OutboxMessage
+
+
+class FailingEmailBackend(EmailBackend):
+    def send_messages(self, messages):
+        raise ConnectionError("Mail server unavailable.")
+
+
+class UnreachableEmailBackend(EmailBackend):
+    def open(self):
+        raise ConnectionRefusedError("Connection refused.")
+
+
+class OutboxTests(TestCase):
+    def enqueue(self, subject="Subject", html=None):
+        message = EmailMultiAlternatives(
+            subject, "Body", "from@example.com", ["to@example.com"]
+        )
+        if html:
+            message.attach_alternative(html, "text/html")
+        return enqueue(message)
+
+    def test_enqueue_stores_message(self):
+        message = self.enqueue(html="<p>Body</p>")
+
+        self.assertEqual(message.status, OutboxMessage.Status.PENDING)
+        self.assertEqual(message.to, ["to@example.com"])
+        self.assertEqual(message.html_body, "<p>Body</p>")
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_deliver_sends_due_messages(self):
+        first = self.enqueue("First", html="<p>Body</p>")
+        second = self.enqueue("Second")
+
+        self.assertEqual(deliver_outbox(), (2, 0))
+
+        self.assertEqual([m.subject for m in mail.outbox], ["First", "Second"])
+        self.assertEqual(mail.outbox[0].alternatives, [("<p>Body</p>", "text/html")])
+        for message in (first, second):
+            message.refresh_from_db()
+            self.assertEqual(message.status, OutboxMessage.Status.SENT)
+            self.assertIsNotNone(message.sent_at)
+        self.assertEqual(deliver_outbox(), (0, 0))
+
+    def test_deliver_respects_batch_size(self):
+        for _ in range(3):
+            self.enqueue()
+
+        self.assertEqual(deliver_outbox(batch_size=2), (2, 0))
+        self.assertEqual(deliver_outbox(batch_size=2), (1, 0))
+
+    def test_deliver_skips_messages_not_due(self):
+        message = self.enqueue()
+        message.next_attempt_at = timezone.now() + timedelta(minutes=5)
+        message.save()
+
+        self.assertEqual(deliver_outbox(), (0, 0))
+
+    def test_failed_delivery_is_retried_with_backoff(self):
+        message = self.enqueue()
+
+        sent, failed = deliver_outbox(
+            max_attempts=3, retry_delay=10, connection=FailingEmailBackend()
+        )
+
+        self.assertEqual((sent, failed), (0, 1))
+        message.refresh_from_db()
+        self.assertEqual(message.status, OutboxMessage.Status.PENDING)
+        self.assertEqual(message.attempts, 1)
+        self.assertIn("Mail server unavailable.", message.last_error)
+        self.assertGreater(message.next_attempt_at, timezone.now())
+
+    def test_failed_delivery_gives_up_after_max_attempts(self):
+        message = self.enqueue()
+        message.attempts = 2
+        message.save()
+
+        deliver_outbox(max_attempts=3, connection=FailingEmailBackend())
+
+        message.refresh_from_db()
+        self.assertEqual(message.status, OutboxMessage.Status.FAILED)
+        self.assertEqual(message.attempts, 3)
+
+    def test_claimed_batch_is_leased(self):
+        message = self.enqueue()
+
+        with mock.patch.object(EmailBackend, "send_messages", side_effect=SystemExit):
+            with self.assertRaises(SystemExit):
+                deliver_outbox(lease=600)
+
+        # A worker died while sending, the batch isn't due before its lease ends.
+        self.assertEqual(deliver_outbox(), (0, 0))
+        message.refresh_from_db()
+        self.assertGreater(
+            message.next_attempt_at, timezone.now() + timedelta(seconds=590)
+        )
+
+    def test_connection_failure_marks_batch_failed(self):
+        first = self.enqueue()
+        second = self.enqueue()
+        second.attempts = 2
+        second.save()
+
+        sent, failed = deliver_outbox(
+            max_attempts=3, connection=UnreachableEmailBackend()
+        )
+
+        self.assertEqual((sent, failed), (0, 2))
+        first.refresh_from_db()
+        self.assertEqual(first.status, OutboxMessage.Status.PENDING)
+        self.assertIn("Connection refused.", first.last_error)
+        second.refresh_from_db()
+        self.assertEqual(second.status, OutboxMessage.Status.FAILED)
+
+    def test_send_outbox_command(self):
+        self.enqueue()
+
+        call_command("send_outbox", verbosity=0)
+
+        self.assertEqual(len(mail.outbox), 1)
+
+
+class SendMailTests(TestCase):
+    templates = (
+        "registration/password_reset_subject.txt",
+        "registration/password_reset_email.html",
+    )
+    context = {
+        "email": "to@example.com",
+        "domain": "example.com",
+        "site_name": "example.com",
+        "uid": "MQ",
+        "token": "token",
+        "protocol": "https",
+    }
+
+    @override_settings(EMAIL_DELIVERY="outbox")
+    def test_outbox_delivery_enqueues(self):
+        send_mail(*self.templates, self.context, None, "to@example.com")
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutboxMessage.objects.due().count(), 1)
+
+    @override_settings(EMAIL_DELIVERY="sync")
+    def test_sync_delivery_sends_on_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            send_mail(*self.templates, self.context, None, "to@example.com")
+        self.assertEqual(len(mail.outbox), 0)
+
+        callbacks[0]()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    @override_settings(EMAIL_DELIVERY="background", EMAIL_BACKGROUND_WORKERS=1)
+    def test_background_delivery_sends_on_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            send_mail(*self.templates, self.context, None, "to@example.com")
+        self.assertEqual(len(mail.outbox), 0)
+
+        callbacks[0]()
+        background.shutdown_executor()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    @override_settings(
+        EMAIL_DELIVERY="background",
+        EMAIL_BACKGROUND_WORKERS=1,
+        EMAIL_BACKEND="project.core.tests.test_outbox.FailingEmailBackend",
+    )
+    def test_background_delivery_logs_errors(self):
+        with self.assertLogs("project.core.mail.background", "ERROR"):
+            with self.captureOnCommitCallbacks(execute=True):
+                send_mail(*self.templates, self.context, None, "to@example.com")
+            background.shutdown_executor()
@@ -0,0 +1,108 @@
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from project.core import routers
+from project.accounts.models import UserSession
+from project.core.decorators import read_only, use_primary
+from project.core.middleware import ReplicaMiddleware
+
+UserModel = get_user_model()
+
+
+@override_settings(DATABASE_REPLICAS=["replica1", "replica2"])
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        routers.reset()
+        self.addCleanup(routers.reset)
+        self.router = routers.ReplicaRouter()
+
+    def test_reads_go_to_replicas(self):
+        aliases = {self.router.db_for_read(UserModel) for _ in range(50)}
+        self.assertEqual(aliases, {"replica1", "replica2"})
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas(self):
+        self.assertEqual(self.router.db_for_read(UserModel), "default")
+
+    def test_reads_after_write_go_to_primary(self):
+        self.assertEqual(self.router.db_for_write(UserModel), "default")
+        self.assertEqual(self.router.db_for_read(UserModel), "default")
+        self.assertTrue(routers.has_written())
+
+    def test_session_writes_dont_pin(self):
+        self.assertEqual(self.router.db_for_write(UserSession), "default")
+        self.assertFalse(routers.has_written())
+        self.assertNotEqual(self.router.db_for_read(UserModel), "default")
+        # Sessions must not lag.
+        self.assertEqual(self.router.db_for_read(UserSession), "default")
+
+    def test_unpinned(self):
+        with routers.unpinned():
+            self.router.db_for_write(UserModel)
+        self.assertFalse(routers.has_written())
+        self.router.db_for_write(UserModel)
+        self.assertTrue(routers.has_written())
+
+    def test_use_primary(self):
+        with routers.use_primary():
+            self.assertEqual(self.router.db_for_read(UserModel), "default")
+        self.assertNotEqual(self.router.db_for_read(UserModel), "default")
+
+    def test_allow_migrate(self):
+        self.assertIsNone(self.router.allow_migrate("default", "accounts"))
+        self.assertIs(self.router.allow_migrate("replica1", "accounts"), False)
+
+
+@override_settings(DATABASE_REPLICAS=["replica1"], DATABASE_REPLICA_PIN_SECONDS=5)
+class ReplicaMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.addCleanup(routers.reset)
+        self.factory = RequestFactory()
+        self.router = routers.ReplicaRouter()
+
+    def request(self, view, **cookies):
+        request = self.factory.get("/")
+        request.COOKIES.update(cookies)
+        middleware = ReplicaMiddleware(lambda request: view(request))
+        middleware.process_request(request)
+        middleware.process_view(request, view, (), {})
+        return middleware.process_response(request, view(request))
+
+    def test_write_pins_client(self):
+        def view(request):
+            self.router.db_for_write(UserModel)
+            return HttpResponse()
+
+        response = self.request(view)
+        cookie = response.cookies[ReplicaMiddleware.cookie_name]
+        self.assertEqual(cookie["max-age"], 5)
+        self.assertFalse(routers.is_pinned())
+
+        def read_view(request):
+            return HttpResponse(self.router.db_for_read(UserModel))
+
+        response = self.request(read_view, **{ReplicaMiddleware.cookie_name: "1"})
+        self.assertEqual(response.content, b"default")
+        self.assertNotIn(ReplicaMiddleware.cookie_name, response.cookies)
+
+        response = self.request(read_view)
+        self.assertEqual(response.content, b"replica1")
+
+    def test_use_primary_view(self):
+        @use_primary
+        def view(request):
+            return HttpResponse(self.router.db_for_read(UserModel))
+
+        self.assertEqual(self.request(view).content, b"default")
+
+    def test_read_only_view(self):
+        @read_only
+        def view(request):
+            # An incidental write, it doesn't pin the client.
+            self.router.db_for_write(UserModel)
+            return HttpResponse(self.router.db_for_read(UserModel))
+
+        response = self.request(view)
+        self.assertEqual(response.content, b"replica1")
+        self.assertNotIn(ReplicaMiddleware.cookie_name, response.cookies)
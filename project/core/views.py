@@ -1,5 +1,11 @@
+import ipaddress
+
+from django.conf import settings
 from django.shortcuts import render
 from django.core.files.storage import FileSystemStorage
+from django.http import HttpResponse, JsonResponse
+
+from .health import check_readiness
 
 
 def image_upload(request):
@@ -35,3 +41,55 @@ def image_upload(request):
 
     # else if the request method is not POST
     return render(request, "core/upload.html")
+
+
+def healthz(request):
+    """
+    Liveness probe: the process serves requests. Doesn't touch the database,
+    the cache or the session.
+
+    Args:
+        request (HttpRequest): The request object sent by the client.
+
+    Returns:
+        HttpResponse: "ok", with a 200 status.
+    """
+    return HttpResponse("ok", content_type="text/plain")
+
+
+def readyz(request):
+    """
+    Readiness probe: the databases and caches are reachable. The checks are
+    cached for HEALTH_CHECK_CACHE_TTL seconds, and only detailed to the
+    clients in HEALTH_CHECK_DETAIL_NETWORKS.
+
+    Args:
+        request (HttpRequest): The request object sent by the client.
+
+    Returns:
+        JsonResponse: The result, with a 200 status if all the checks passed
+        and a 503 status otherwise.
+    """
+    result = check_readiness()
+    status = 200 if result["ok"] else 503
+    if not is_internal(request):
+        result = {"ok": result["ok"]}
+    return JsonResponse(result, status=status)
+
+
+def is_internal(request):
+    """
+    Return whether the client connected from HEALTH_CHECK_DETAIL_NETWORKS,
+    without a proxy in between: this runs before the host is validated, and
+    a local proxy would make every client look internal.
+    """
+    if "HTTP_X_FORWARDED_FOR" in request.META:
+        return False
+    try:
+        address = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        return False
+    return any(
+        address in ipaddress.ip_network(network)
+        for network in settings.HEALTH_CHECK_DETAIL_NETWORKS
+    )